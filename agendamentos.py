@@ -0,0 +1,207 @@
+# agendamentos.py
+
+import datetime
+import functools
+import re
+
+from sqlalchemy import func
+
+from calendario import CALENDARIO_PADRAO
+from database import do_utc, para_utc
+from models import Agendamento, MensagemAgendamento
+from scheduler import RegraDiaUtil, RegraHorarios, RegraIntervalo
+
+# Funções de acesso às tabelas "agendamentos" e "mensagens_agendamento":
+# mensagens recorrentes configuradas por servidor, sem constantes no
+# config.py. Só os disparos da próxima janela ficam no agendador; o resto
+# fica no banco, indexado por (ativo, proximo_disparo).
+
+# Antecedência com que os disparos saem do banco para o agendador
+JANELA = datetime.timedelta(hours=1)
+# Disparo vencido há mais que isso (bot fora do ar) é pulado
+TOLERANCIA = datetime.timedelta(hours=1)
+
+_INTERVALO = re.compile(r"^(\d+)([mhd])$")
+_UNIDADES = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def _numeros(texto: str):
+    """ "15,30" -> [15, 30]; "16-21" -> [16, ..., 21]; aceita negativos em listas."""
+    numeros = []
+    for parte in texto.split(","):
+        if re.fullmatch(r"\d+-\d+", parte):
+            inicio, fim = (int(n) for n in parte.split("-"))
+            numeros.extend(range(inicio, fim + 1))
+        else:
+            numeros.append(int(parte))
+    return numeros
+
+
+@functools.lru_cache(maxsize=1024)
+def interpretar_regra(texto: str):
+    """
+    Converte a regra gravada em um objeto do scheduler. Formatos:
+      "30m", "2h", "1d"           intervalo fixo
+      "09:00" ou "09:00,18:00"    todos os dias nesses horários
+      seguidos de filtros "/...":
+        "/d15,30" ou "/d16-21"    dias do mês
+        "/s0-4"                   dias da semana (0 = segunda)
+        "/uteis"                  só dias úteis
+        "/du1,-1"                 N-ésimo dia útil do mês (-1 = último)
+    Regras iguais são compartilhadas entre servidores (cache). ValueError
+    se o texto for inválido.
+    """
+    texto = texto.strip().lower()
+    intervalo = _INTERVALO.match(texto)
+    if intervalo:
+        quantidade, unidade = intervalo.groups()
+        return RegraIntervalo(datetime.timedelta(**{_UNIDADES[unidade]: int(quantidade)}))
+
+    partes = texto.split("/")
+    try:
+        horarios = [
+            datetime.datetime.strptime(horario, "%H:%M").time() for horario in partes[0].split(",")
+        ]
+        filtros = {}
+        for filtro in partes[1:]:
+            if filtro == "uteis":
+                filtros["calendario"] = CALENDARIO_PADRAO
+            elif filtro.startswith("du"):
+                filtros["dias_uteis"] = _numeros(filtro[2:])
+            elif filtro.startswith("d"):
+                filtros["dias_do_mes"] = _numeros(filtro[1:])
+            elif filtro.startswith("s"):
+                filtros["dias_da_semana"] = _numeros(filtro[1:])
+            else:
+                raise ValueError(filtro)
+    except ValueError:
+        raise ValueError(f"Regra inválida: {texto}") from None
+
+    if "dias_uteis" in filtros:
+        if set(filtros) != {"dias_uteis"}:
+            raise ValueError(f"Regra inválida: {texto} (/du não combina com outros filtros)")
+        return RegraDiaUtil(horarios, filtros["dias_uteis"])
+    return RegraHorarios(horarios, **filtros)
+
+
+def instante_proximo(agendamento: Agendamento):
+    """Próximo disparo no fuso configurado (ou None)."""
+    if agendamento.proximo_disparo is None:
+        return None
+    return do_utc(agendamento.proximo_disparo)
+
+
+def _definir_proximo(agendamento: Agendamento, depois: datetime.datetime):
+    proximo = interpretar_regra(agendamento.regra).proximo_disparo(depois)
+    agendamento.proximo_disparo = para_utc(proximo) if proximo else None
+    agendamento.ativo = proximo is not None
+
+
+def buscar_agendamento(session, guild_id: int, nome: str):
+    return session.query(Agendamento).filter_by(guild_id=guild_id, nome=nome).first()
+
+
+def criar_agendamento(
+    session,
+    guild_id: int,
+    nome: str,
+    canal_id: int,
+    regra: str,
+    mensagem: str,
+    agora: datetime.datetime,
+):
+    """Cria o agendamento com a primeira mensagem. ValueError se o nome já existir."""
+    interpretar_regra(regra)  # valida antes de gravar
+    if buscar_agendamento(session, guild_id, nome) is not None:
+        raise ValueError(f"Já existe um agendamento chamado '{nome}'.")
+    agendamento = Agendamento(guild_id=guild_id, nome=nome, canal_id=canal_id, regra=regra)
+    _definir_proximo(agendamento, agora)
+    session.add(agendamento)
+    session.flush()
+    session.add(MensagemAgendamento(agendamento_id=agendamento.id, texto=mensagem))
+    return agendamento
+
+
+def adicionar_mensagem(session, guild_id: int, nome: str, texto: str):
+    """Acrescenta uma mensagem ao conjunto sorteado. Retorna o agendamento ou None."""
+    agendamento = buscar_agendamento(session, guild_id, nome)
+    if agendamento is not None:
+        session.add(MensagemAgendamento(agendamento_id=agendamento.id, texto=texto))
+    return agendamento
+
+
+def remover_agendamento(session, guild_id: int, nome: str):
+    """Apaga o agendamento e suas mensagens. Retorna o id removido ou None."""
+    agendamento = buscar_agendamento(session, guild_id, nome)
+    if agendamento is None:
+        return None
+    session.query(MensagemAgendamento).filter_by(agendamento_id=agendamento.id).delete(
+        synchronize_session=False
+    )
+    session.delete(agendamento)
+    return agendamento.id
+
+
+def agendamentos_da_guilda(session, guild_id: int):
+    """[(agendamento, quantidade de mensagens)] do servidor, por nome."""
+    return (
+        session.query(Agendamento, func.count(MensagemAgendamento.id))
+        .outerjoin(MensagemAgendamento, MensagemAgendamento.agendamento_id == Agendamento.id)
+        .filter(Agendamento.guild_id == guild_id)
+        .group_by(Agendamento.id)
+        .order_by(Agendamento.nome)
+        .all()
+    )
+
+
+def agendamentos_ate(
+    session, limite: datetime.datetime, agora: datetime.datetime, shards=None
+):
+    """
+    Agendamentos ativos com disparo até `limite` (índice (ativo,
+    proximo_disparo)). Disparos vencidos há mais de TOLERANCIA são pulados
+    para o próximo a partir de `agora`. `shards` = (total, ids) restringe às
+    guildas desses shards (ver shards.py), com o filtro feito no SQLite.
+    """
+    limite_utc = para_utc(limite)
+    consulta = session.query(Agendamento).filter(
+        Agendamento.ativo.is_(True), Agendamento.proximo_disparo <= limite_utc
+    )
+    if shards is not None:
+        total, ids = shards
+        shard = Agendamento.guild_id.op(">>")(22).op("%")(total)
+        consulta = consulta.filter(shard.in_(sorted(ids)))
+    agendamentos = consulta.order_by(Agendamento.proximo_disparo).all()
+    vencidos = para_utc(agora - TOLERANCIA)
+    devidos = []
+    for agendamento in agendamentos:
+        if agendamento.proximo_disparo < vencidos:
+            _definir_proximo(agendamento, agora)
+            if not agendamento.ativo or agendamento.proximo_disparo > limite_utc:
+                continue
+        devidos.append(agendamento)
+    return devidos
+
+
+def avancar_agendamento(session, agendamento_id: int, instante: datetime.datetime):
+    """
+    Consome o disparo de `instante`: sorteia a mensagem e grava o próximo
+    disparo. Retorna (agendamento, mensagem) ou None se o disparo não vale
+    mais (agendamento removido, desativado ou com a regra alterada).
+    """
+    agendamento = session.get(Agendamento, agendamento_id)
+    if (
+        agendamento is None
+        or not agendamento.ativo
+        or agendamento.proximo_disparo != para_utc(instante)
+    ):
+        return None
+    mensagem = (
+        session.query(MensagemAgendamento.texto)
+        .filter_by(agendamento_id=agendamento_id)
+        .order_by(func.random())
+        .limit(1)
+        .scalar()
+    )
+    _definir_proximo(agendamento, instante)
+    return agendamento, mensagem
@@ -0,0 +1,154 @@
+# avisos.py
+
+import datetime
+
+from sqlalchemy import insert, update
+
+from models import Aviso
+from scheduler import localizar
+
+# IDs por consulta "IN" (versões antigas do SQLite aceitam até 999 parâmetros)
+LOTE_IDS = 900
+
+# Funções de acesso ao espelho local dos avisos (tabela "avisos").
+# O envio consulta só esta tabela; a planilha é sincronizada à parte.
+
+
+def salvar_avisos(session, alterados):
+    """
+    Insere ou atualiza em lote os avisos vindos da planilha (chave: ID da
+    planilha): uma consulta para os existentes, um INSERT e um UPDATE em massa.
+    """
+    ids = list({aviso["id"] for _, aviso in alterados})
+    existentes = {}
+    for inicio in range(0, len(ids), LOTE_IDS):
+        existentes.update(
+            (aviso_id, {"id": id_, "sent": sent, "sheet_marked": sheet_marked})
+            for id_, aviso_id, sent, sheet_marked in session.query(
+                Aviso.id, Aviso.aviso_id, Aviso.sent, Aviso.sheet_marked
+            ).filter(Aviso.aviso_id.in_(ids[inicio : inicio + LOTE_IDS]))
+        )
+
+    novos = {}
+    atualizados = {}
+    for linha, aviso in alterados:
+        # Um ID repetido na planilha fica com a última linha lida
+        registro = atualizados.get(aviso["id"]) or novos.get(aviso["id"])
+        if registro is None:
+            existente = existentes.get(aviso["id"])
+            if existente is None:
+                registro = novos[aviso["id"]] = {
+                    "aviso_id": aviso["id"],
+                    "sent": False,
+                    "sheet_marked": True,
+                }
+            else:
+                registro = atualizados[aviso["id"]] = dict(existente)
+
+        if aviso["enviado"]:
+            registro["sent"] = True
+            registro["sheet_marked"] = True
+        elif registro["sent"] and registro["sheet_marked"]:
+            # A flag foi limpa na planilha: o aviso volta a ficar pendente
+            registro["sent"] = False
+        # Se foi enviado mas a planilha ainda não foi marcada, mantém como enviado
+
+        registro["linha"] = linha
+        registro["canal_id"] = aviso["canal_id"]
+        registro["mensagem"] = aviso["mensagem"]
+        registro["send_date"] = aviso["data"]
+        registro["send_time"] = aviso["hora"]
+
+    if novos:
+        session.execute(insert(Aviso), list(novos.values()))
+    if atualizados:
+        session.execute(update(Aviso), list(atualizados.values()))
+
+
+def aplicar_sincronizacao(session, alterados, linhas_removidas, ids_lidos):
+    """
+    Grava as linhas alteradas e remove as apagadas/inválidas de uma vez.
+    `ids_lidos`: IDs de todas as linhas da leitura completa; avisos fora
+    dela saíram da planilha (a linha gravada deles pode ser de outro aviso).
+    """
+    salvar_avisos(session, alterados)
+    remover_linhas(session, linhas_removidas)
+    remover_ausentes(session, ids_lidos)
+
+
+def remover_ausentes(session, ids_lidos):
+    """
+    Remove os avisos não enviados que sumiram da planilha e dispensa a
+    marcação dos enviados que sumiram (a linha deles já é de outro aviso).
+    """
+    # Só os pendentes (de envio ou de marcação) importam: são poucos
+    pendentes = (
+        session.query(Aviso.id, Aviso.aviso_id, Aviso.sent)
+        .filter(Aviso.sent.is_(False) | Aviso.sheet_marked.is_(False))
+        .all()
+    )
+    ausentes = [(id_, sent) for id_, aviso_id, sent in pendentes if aviso_id not in ids_lidos]
+    removidos = [id_ for id_, sent in ausentes if not sent]
+    dispensados = [id_ for id_, sent in ausentes if sent]
+    if removidos:
+        session.query(Aviso).filter(Aviso.id.in_(removidos)).delete(synchronize_session=False)
+    if dispensados:
+        session.query(Aviso).filter(Aviso.id.in_(dispensados)).update(
+            {Aviso.sheet_marked: True}, synchronize_session=False
+        )
+    return len(removidos)
+
+
+def remover_linhas(session, linhas):
+    """Remove avisos não enviados das linhas informadas (apagadas ou inválidas)."""
+    if not linhas:
+        return 0
+    return (
+        session.query(Aviso)
+        .filter(Aviso.linha.in_(list(linhas)), Aviso.sent.is_(False))
+        .delete(synchronize_session=False)
+    )
+
+
+def avisos_devidos(session, data):
+    """Avisos ainda não enviados para a data (usa o índice (send_date, sent))."""
+    return (
+        session.query(Aviso)
+        .filter(Aviso.send_date == data, Aviso.sent.is_(False))
+        .order_by(Aviso.linha)
+        .all()
+    )
+
+
+def buscar_aviso(session, aviso_id: str):
+    return session.query(Aviso).filter_by(aviso_id=aviso_id).first()
+
+
+def instante_envio(aviso: Aviso) -> datetime.datetime:
+    """Data/hora de envio no fuso configurado (sem hora: meia-noite)."""
+    return localizar(aviso.send_date, aviso.send_time or datetime.time(0, 0))
+
+
+def marcar_enviado(session, aviso_id: str):
+    aviso = buscar_aviso(session, aviso_id)
+    if aviso:
+        aviso.sent = True
+        aviso.sheet_marked = False
+
+
+def marcar_planilha_atualizada(session, avisos_ids):
+    """Registra que o "Enviado" destes avisos já foi gravado na planilha."""
+    if not avisos_ids:
+        return
+    session.query(Aviso).filter(Aviso.aviso_id.in_(list(avisos_ids))).update(
+        {Aviso.sheet_marked: True}, synchronize_session=False
+    )
+
+
+def aguardando_planilha(session):
+    """Avisos enviados cujo "Enviado" ainda não foi gravado na planilha."""
+    return (
+        session.query(Aviso)
+        .filter(Aviso.sent.is_(True), Aviso.sheet_marked.is_(False))
+        .all()
+    )
@@ -0,0 +1,259 @@
+# benchmarks/bench.py
+"""
+Benchmark do TasksCog sem Discord e sem Google: o cog roda contra um bot,
+canais e uma worksheet em memória (benchmarks/falsos.py), com latência e
+respostas 429 configuráveis.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench                      # todos os cenários
+    python -m benchmarks.bench planilha --linhas 20000
+    python -m benchmarks.bench todos --saida benchmarks/resultados.jsonl
+
+Cada cenário informa vazão, latência de envio (p50/p99, da fila do
+despachante até a confirmação), atraso máximo do event loop e pico de
+memória (tracemalloc). Com --saida, os resultados são acrescentados em um
+arquivo JSON Lines para comparar execuções ao longo do tempo.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+CENARIOS = ("planilha", "transmissao", "regras")
+CABECALHO = ("ID", "Canal_ID", "Mensagem", "Data", "Hora", "Enviado")
+
+
+def percentil(valores, fracao: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[round(fracao * (len(ordenados) - 1))]
+
+
+class Medicao:
+    """Coleta latências de envio, atraso do loop e memória de um cenário."""
+
+    def __init__(self, cog):
+        self.cog = cog
+        self.latencias = []
+        self._enviar = cog.despachante.enviar
+        cog.despachante.enviar = self._enviar_medido
+        cog.monitor_loop.maior_atraso = 0.0
+        cog.monitor_loop.bloqueios = 0
+
+    async def _enviar_medido(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await self._enviar(*args, **kwargs)
+        finally:
+            self.latencias.append(time.perf_counter() - inicio)
+
+    def __enter__(self):
+        tracemalloc.start()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        self.duracao = time.perf_counter() - self.inicio
+        _, self.pico_memoria = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    def resultado(self, cenario: str, operacoes: int, **extras):
+        return {
+            "cenario": cenario,
+            "operacoes": operacoes,
+            "duracao_s": round(self.duracao, 3),
+            "vazao_por_s": round(operacoes / self.duracao, 1) if self.duracao else 0.0,
+            "envio_p50_ms": round(percentil(self.latencias, 0.50) * 1000, 1),
+            "envio_p99_ms": round(percentil(self.latencias, 0.99) * 1000, 1),
+            "loop_atraso_max_ms": round(self.cog.monitor_loop.maior_atraso * 1000, 1),
+            "loop_bloqueios": self.cog.monitor_loop.bloqueios,
+            "memoria_pico_mb": round(self.pico_memoria / (1024 * 1024), 2),
+            **extras,
+        }
+
+
+def criar_cog(bot, worksheet=None):
+    """TasksCog real sobre o bot falso, sem as tasks periódicas (o cenário dispara)."""
+    from benchmarks.falsos import ClienteSheetsFalso
+    from cogs.tasks_cog import TasksCog
+
+    cog = TasksCog(bot, logging.getLogger("discord_bot"))
+    for nome in list(cog.agendador.proximos_disparos()):
+        cog.agendador.cancelar(nome)
+    if worksheet is not None:
+        cog.sheets = ClienteSheetsFalso(worksheet, cog.task_enviar_aviso_excel_logger)
+    return cog
+
+
+def linhas_avisos(quantidade: int, prefixo: str, data, hora="", canais=(1,)):
+    return [
+        (f"{prefixo}{i}", str(canais[i % len(canais)]), f"Aviso {i}", data.isoformat(), hora, "FALSE")
+        for i in range(quantidade)
+    ]
+
+
+async def cenario_planilha(args):
+    """Sincronização de uma planilha grande: leitura completa, sem alterações e 1% alterado."""
+    from benchmarks.falsos import BotFalso, WorksheetFalsa
+
+    ontem = datetime.date.today() - datetime.timedelta(days=1)
+    worksheet = WorksheetFalsa(
+        CABECALHO, linhas_avisos(args.linhas, "p", ontem), latencia=args.latencia_sheets
+    )
+    cog = criar_cog(BotFalso(), worksheet)
+    await asyncio.sleep(0)
+    resultados = []
+    etapas = (
+        ("planilha_completa", None),
+        ("planilha_sem_alteracoes", None),
+        ("planilha_1pct_alterada", max(1, args.linhas // 100)),
+    )
+    for nome, alterar in etapas:
+        if alterar:
+            for linha in range(2, 2 + alterar):
+                worksheet.alterar(linha, "Mensagem", f"Alterado {linha}")
+        chamadas = worksheet.chamadas
+        with Medicao(cog) as medicao:
+            await cog.sincronizar_avisos()
+        resultados.append(
+            medicao.resultado(nome, args.linhas, chamadas_sheets=worksheet.chamadas - chamadas)
+        )
+    cog.cog_unload()
+    return resultados
+
+
+async def cenario_transmissao(args):
+    """Mensagem quinzenal para muitos canais, com latência e 429 injetados."""
+    from benchmarks.falsos import BotFalso
+    from cogs import tasks_cog
+
+    bot = BotFalso(latencia=args.latencia_envio, taxa_429=args.taxa_429, semente=args.semente)
+    canais = [1000 + i for i in range(args.canais)]
+    for canal_id in canais:
+        bot.criar_canal(canal_id)
+    cog = criar_cog(bot)
+    # A lista de canais quinzenais vem do config; o cenário usa a sua
+    tasks_cog.CHANNEL_IDS, original = canais, tasks_cog.CHANNEL_IDS
+    try:
+        with Medicao(cog) as medicao:
+            await cog.quinzenal_message_task(tasks_cog.get_now())
+    finally:
+        tasks_cog.CHANNEL_IDS = original
+        cog.cog_unload()
+    return [
+        medicao.resultado(
+            "transmissao", args.canais, enviadas=bot.enviadas, respostas_429=bot.respostas_429
+        )
+    ]
+
+
+async def cenario_regras(args):
+    """Muitos avisos com o mesmo horário: regras únicas disparando ao mesmo tempo."""
+    from benchmarks.falsos import BotFalso, WorksheetFalsa
+    from scheduler import get_now
+
+    bot = BotFalso(latencia=args.latencia_envio, taxa_429=args.taxa_429, semente=args.semente)
+    canais = [5000 + i for i in range(args.canais)]
+    for canal_id in canais:
+        bot.criar_canal(canal_id)
+    # A coluna Hora tem resolução de segundos
+    disparo = (get_now() + datetime.timedelta(seconds=2)).replace(microsecond=0)
+    worksheet = WorksheetFalsa(
+        CABECALHO,
+        linhas_avisos(
+            args.regras, f"r{int(time.time())}-", disparo.date(),
+            disparo.strftime("%H:%M:%S"), canais,
+        ),
+        latencia=args.latencia_sheets,
+    )
+    cog = criar_cog(bot, worksheet)
+    await cog.sincronizar_avisos()
+    await cog.agendar_avisos_do_dia()
+    # Mede a partir do disparo, não da preparação
+    await asyncio.sleep(max(0.0, (disparo - get_now()).total_seconds()))
+    with Medicao(cog) as medicao:
+        limite = time.monotonic() + args.tempo_maximo
+        # Um 429 em aviso avulso não é reenviado: cada regra termina enviada ou com 429
+        while bot.enviadas + bot.respostas_429 < args.regras and time.monotonic() < limite:
+            await asyncio.sleep(0.05)
+    cog.cog_unload()
+    return [
+        medicao.resultado(
+            "regras", args.regras, enviadas=bot.enviadas, respostas_429=bot.respostas_429
+        )
+    ]
+
+
+def imprimir(resultados):
+    colunas = (
+        "cenario", "operacoes", "duracao_s", "vazao_por_s", "envio_p50_ms",
+        "envio_p99_ms", "loop_atraso_max_ms", "loop_bloqueios", "memoria_pico_mb",
+    )
+    larguras = [max(len(c), *(len(str(r.get(c, ""))) for r in resultados)) for c in colunas]
+    print("  ".join(c.ljust(l) for c, l in zip(colunas, larguras)))
+    for resultado in resultados:
+        print("  ".join(str(resultado.get(c, "")).ljust(l) for c, l in zip(colunas, larguras)))
+
+
+async def executar(args):
+    funcoes = {
+        "planilha": cenario_planilha,
+        "transmissao": cenario_transmissao,
+        "regras": cenario_regras,
+    }
+    escolhidos = CENARIOS if args.cenario == "todos" else (args.cenario,)
+    resultados = []
+    for nome in escolhidos:
+        resultados.extend(await funcoes[nome](args))
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do TasksCog com Discord e Sheets falsos.")
+    parser.add_argument("cenario", nargs="?", default="todos", choices=CENARIOS + ("todos",))
+    parser.add_argument("--linhas", type=int, default=10000, help="linhas da planilha")
+    parser.add_argument("--canais", type=int, default=500, help="canais da transmissão")
+    parser.add_argument("--regras", type=int, default=300, help="avisos com o mesmo horário")
+    parser.add_argument("--latencia-envio", type=float, default=0.05, help="segundos por send()")
+    parser.add_argument("--taxa-429", type=float, default=0.02, help="fração de envios com 429")
+    parser.add_argument("--latencia-sheets", type=float, default=0.2, help="segundos por chamada")
+    parser.add_argument("--tempo-maximo", type=float, default=120, help="limite por cenário (s)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="arquivo JSON Lines onde acrescentar os resultados")
+    args = parser.parse_args(argv)
+    saida = os.path.abspath(args.saida) if args.saida else None
+
+    # Banco e logs descartáveis: o benchmark não toca no bot_database.db real
+    os.chdir(tempfile.mkdtemp(prefix="bench_bot_"))
+    import cogs.tasks_cog  # noqa: F401 (cria o banco e os loggers no diretório temporário)
+    import log_setup
+
+    # Sem mensagens de console por envio; os arquivos de log seguem gravando
+    log_setup.console().setLevel(logging.WARNING)
+
+    resultados = asyncio.run(executar(args))
+    imprimir(resultados)
+    if saida:
+        registro = {
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "parametros": {k: v for k, v in vars(args).items() if k != "saida"},
+            "resultados": resultados,
+        }
+        with open(saida, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
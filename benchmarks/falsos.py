@@ -0,0 +1,170 @@
+# benchmarks/falsos.py
+
+import asyncio
+import random
+import threading
+import time
+
+import discord
+from gspread.utils import a1_to_rowcol
+
+import sheets
+
+
+# =====================================================
+# Discord
+# =====================================================
+class MensagemFalsa:
+    """O que canal.send() devolve: só o que o bot usa (id e conteúdo)."""
+
+    def __init__(self, mensagem_id: int, canal, conteudo):
+        self.id = mensagem_id
+        self.channel = canal
+        self.content = conteudo
+
+
+class CanalFalso:
+    """
+    Canal com `send()` em memória: cada envio demora `latencia` segundos e,
+    com probabilidade `taxa_429`, falha com rate limit (Retry-After de
+    `retry_after` segundos), como o Discord faria.
+    """
+
+    def __init__(self, canal_id: int, bot, latencia: float = 0.05, taxa_429: float = 0.0,
+                 retry_after: float = 0.5):
+        self.id = canal_id
+        self.name = f"canal-{canal_id}"
+        self.bot = bot
+        self.latencia = latencia
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.mensagens = []
+
+    async def send(self, conteudo=None, **kwargs):
+        await asyncio.sleep(self.latencia)
+        if self.taxa_429 and self.bot.aleatorio.random() < self.taxa_429:
+            self.bot.respostas_429 += 1
+            raise discord.RateLimited(self.retry_after)
+        self.mensagens.append((self.bot.relogio(), conteudo))
+        self.bot.enviadas += 1
+        return MensagemFalsa(self.bot.enviadas, self, conteudo)
+
+
+class BotFalso:
+    """Substitui o commands.Bot: canais em memória e pronto desde o início."""
+
+    def __init__(self, latencia: float = 0.05, taxa_429: float = 0.0, semente: int = 0,
+                 relogio=time.monotonic):
+        self.latencia = latencia
+        self.taxa_429 = taxa_429
+        self.aleatorio = random.Random(semente)
+        self.relogio = relogio
+        self.canais = {}
+        self.enviadas = 0
+        self.respostas_429 = 0
+        self.user = "BotFalso#0000"
+        self.guilds = []
+
+    def criar_canal(self, canal_id: int) -> CanalFalso:
+        canal = self.canais.get(canal_id)
+        if canal is None:
+            canal = self.canais[canal_id] = CanalFalso(
+                canal_id, self, self.latencia, self.taxa_429
+            )
+        return canal
+
+    def get_channel(self, canal_id):
+        return self.canais.get(canal_id)
+
+    async def wait_until_ready(self):
+        return None
+
+    def linha_do_tempo(self):
+        """Todas as mensagens enviadas como (instante, canal_id, conteúdo), em ordem."""
+        return sorted(
+            (instante, canal.id, conteudo)
+            for canal in self.canais.values()
+            for instante, conteudo in canal.mensagens
+        )
+
+
+# =====================================================
+# Google Sheets
+# =====================================================
+class _PlanilhaFalsa:
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+
+    def get_lastUpdateTime(self):
+        self._worksheet._esperar()
+        return str(self._worksheet.versao)
+
+
+class WorksheetFalsa:
+    """
+    Worksheet do gspread em memória com as chamadas usadas pelo bot
+    (row_values, batch_get, batch_update e spreadsheet.get_lastUpdateTime).
+    Cada chamada demora `latencia` segundos.
+    """
+
+    def __init__(self, cabecalho, linhas, latencia: float = 0.2):
+        self.cabecalho = list(cabecalho)
+        self.linhas = [list(linha) for linha in linhas]
+        self.latencia = latencia
+        self.versao = 1
+        self.chamadas = 0
+        self.opcoes_entrada = []  # value_input_option de cada batch_update
+        self.spreadsheet = _PlanilhaFalsa(self)
+        self._lock = threading.Lock()
+
+    def _esperar(self):
+        with self._lock:
+            self.chamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def alterar(self, linha: int, coluna: str, valor):
+        """Altera uma célula (linha 1-based, como na planilha) e a versão."""
+        self.linhas[linha - 2][self.cabecalho.index(coluna)] = valor
+        self.versao += 1
+
+    def row_values(self, linha: int):
+        self._esperar()
+        if linha == 1:
+            return list(self.cabecalho)
+        return list(self.linhas[linha - 2])
+
+    def batch_get(self, intervalos):
+        self._esperar()
+        blocos = []
+        for intervalo in intervalos:
+            inicio, fim = intervalo.split(":")
+            linha_inicio, coluna = a1_to_rowcol(inicio)
+            linha_fim, _ = a1_to_rowcol(fim)
+            bloco = [
+                [linha[coluna - 1]] if linha[coluna - 1] != "" else []
+                for linha in self.linhas[linha_inicio - 2 : linha_fim - 1]
+            ]
+            while bloco and not bloco[-1]:
+                bloco.pop()
+            blocos.append(bloco)
+        return blocos
+
+    def batch_update(self, atualizacoes, raw=True, value_input_option=None):
+        self._esperar()
+        self.opcoes_entrada.append(value_input_option or ("RAW" if raw else "USER_ENTERED"))
+        for atualizacao in atualizacoes:
+            linha, coluna = a1_to_rowcol(atualizacao["range"])
+            self.linhas[linha - 2][coluna - 1] = atualizacao["values"][0][0]
+        self.versao += 1
+
+
+class ClienteSheetsFalso(sheets.ClienteSheets):
+    """ClienteSheets real (pool de threads, janelas, cache do cabeçalho) sobre a WorksheetFalsa."""
+
+    def __init__(self, worksheet: WorksheetFalsa, logger=None):
+        super().__init__(logger)
+        self.worksheet_falsa = worksheet
+
+    def _conectar(self):
+        return self.worksheet_falsa
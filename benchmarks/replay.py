@@ -0,0 +1,164 @@
+# benchmarks/replay.py
+"""
+Replay com relógio virtual: roda o TasksCog real (agendador, despachante,
+Settings e avisos) sobre um bot falso, saltando de uma espera para a
+próxima em vez de esperar em tempo real. Um ano de agendamentos leva
+segundos e gera a linha do tempo completa de envios.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.replay --inicio 2026-01-01 --fim 2026-12-31 --sem-teste
+    python -m benchmarks.replay --inicio 2026-03-01 --fim 2026-03-31 --saida marco.csv
+    python -m benchmarks.replay --inicio 2026-01-01 --fim 2026-12-31 --perfil
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import cProfile
+import csv
+import datetime
+import logging
+import os
+import pstats
+import random
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+# Rodadas de sleep(0) sem trabalho pronto antes de considerar o loop ocioso
+RODADAS_OCIOSIDADE = 2
+MAX_RODADAS = 10000
+
+
+class _ExecutorImediato(concurrent.futures.Executor):
+    """Executa na hora, na thread do loop: o replay não espera threads em tempo real."""
+
+    def submit(self, fn, *args, **kwargs):
+        futuro = concurrent.futures.Future()
+        try:
+            futuro.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            futuro.set_exception(e)
+        return futuro
+
+
+async def _aguardar_ociosidade():
+    """Deixa todas as corrotinas avançarem até ficarem esperando o relógio."""
+    loop = asyncio.get_running_loop()
+    ociosas = 0
+    for _ in range(MAX_RODADAS):
+        await asyncio.sleep(0)
+        # _ready: callbacks prontos do loop (não há API pública equivalente)
+        if getattr(loop, "_ready", None):
+            ociosas = 0
+        else:
+            ociosas += 1
+            if ociosas >= RODADAS_OCIOSIDADE:
+                return
+
+
+def canais_configurados():
+    import config
+
+    canais = {
+        config.GOOD_AFTERNOON_CHANNEL_ID,
+        config.AVISOS_GERAIS_CANAL,
+        config.CANAL_DOIS_ID,
+        config.REALOCACAO_CANAL,
+    }
+    canais.update(config.CHANNEL_IDS)
+    return canais
+
+
+async def reproduzir(inicio: datetime.datetime, fim: datetime.datetime, sem_teste=False):
+    """Executa o cog de `inicio` a `fim` e retorna [(instante, canal_id, mensagem)]."""
+    import database
+    import relogio
+    import sheets
+    from benchmarks.bench import CABECALHO
+    from benchmarks.falsos import BotFalso, ClienteSheetsFalso, WorksheetFalsa
+    from cogs.tasks_cog import TasksCog
+
+    relogio_virtual = relogio.RelogioVirtual(inicio)
+    relogio.definir(relogio_virtual)
+    database._executor_db = _ExecutorImediato()
+    sheets._executor = _ExecutorImediato()
+
+    bot = BotFalso(latencia=0, relogio=relogio_virtual.agora)
+    for canal_id in canais_configurados():
+        bot.criar_canal(canal_id)
+
+    cog = TasksCog(bot, logging.getLogger("discord_bot"))
+    cog.monitor_loop.parar()  # mede o loop em tempo real; não faz sentido aqui
+    cog.sheets = ClienteSheetsFalso(WorksheetFalsa(CABECALHO, [], latencia=0))
+    if sem_teste:
+        cog.agendador.cancelar("send_good_afternoon_message")
+
+    while True:
+        await _aguardar_ociosidade()
+        proximo = relogio_virtual.proximo()
+        if proximo is None or proximo > fim:
+            break
+        relogio_virtual.avancar()
+
+    cog.cog_unload()
+    return bot.linha_do_tempo()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay do agendamento com relógio virtual.")
+    parser.add_argument("--inicio", required=True, type=datetime.date.fromisoformat)
+    parser.add_argument("--fim", required=True, type=datetime.date.fromisoformat)
+    parser.add_argument("--semente", type=int, default=0, help="semente do random")
+    parser.add_argument(
+        "--sem-teste", action="store_true", help="omite a mensagem de teste de 15 em 15 minutos"
+    )
+    parser.add_argument("--saida", help="grava a linha do tempo em CSV")
+    parser.add_argument("--perfil", action="store_true", help="perfil (cProfile) do replay")
+    args = parser.parse_args(argv)
+    saida = os.path.abspath(args.saida) if args.saida else None
+
+    # Banco e logs descartáveis: o replay não toca no bot_database.db real
+    os.chdir(tempfile.mkdtemp(prefix="replay_bot_"))
+    import cogs.tasks_cog  # noqa: F401 (cria o banco e os loggers no diretório temporário)
+    import log_setup
+    from scheduler import localizar
+
+    log_setup.console().setLevel(logging.WARNING)
+    random.seed(args.semente)
+
+    inicio = localizar(args.inicio, datetime.time(0, 0))
+    fim = localizar(args.fim + datetime.timedelta(days=1), datetime.time(0, 0))
+    perfil = cProfile.Profile() if args.perfil else None
+    relogio_real = time.perf_counter()
+    if perfil:
+        perfil.enable()
+    linha_do_tempo = asyncio.run(reproduzir(inicio, fim, args.sem_teste))
+    if perfil:
+        perfil.disable()
+    duracao = time.perf_counter() - relogio_real
+
+    if saida:
+        with open(saida, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(("instante", "canal_id", "mensagem"))
+            for instante, canal_id, mensagem in linha_do_tempo:
+                escritor.writerow((instante.isoformat(), canal_id, mensagem))
+    else:
+        for instante, canal_id, mensagem in linha_do_tempo:
+            print(f"{instante.strftime('%Y-%m-%d %a %H:%M:%S')}  {canal_id}  {mensagem}")
+    print(
+        f"{len(linha_do_tempo)} envio(s) de {args.inicio} a {args.fim} "
+        f"simulados em {duracao:.2f}s.",
+        file=sys.stderr,
+    )
+    if perfil:
+        pstats.Stats(perfil, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# calendario.py
+
+import calendar
+import datetime
+
+import config
+
+# Calendário de dias úteis usado pelas regras do agendador: fins de semana,
+# feriados nacionais (fixos e móveis) e os feriados extras de config.FERIADOS.
+# Os dias úteis de cada mês são calculados uma vez e ficam em cache.
+
+# Feriados nacionais de data fixa (mês, dia)
+FERIADOS_FIXOS = (
+    (1, 1),  # Confraternização Universal
+    (4, 21),  # Tiradentes
+    (5, 1),  # Dia do Trabalho
+    (9, 7),  # Independência
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),  # Finados
+    (11, 15),  # Proclamação da República
+    (11, 20),  # Consciência Negra (nacional a partir de 2024)
+    (12, 25),  # Natal
+)
+
+
+def pascoa(ano: int) -> datetime.date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(ano: int) -> set:
+    feriados = {
+        datetime.date(ano, mes, dia)
+        for mes, dia in FERIADOS_FIXOS
+        if (mes, dia) != (11, 20) or ano >= 2024
+    }
+    feriados.add(pascoa(ano) - datetime.timedelta(days=2))  # Sexta-feira Santa
+    return feriados
+
+
+class Calendario:
+    """
+    Dias úteis: segunda a sexta, fora dos feriados. `feriados` são datas
+    extras (feriados locais, recessos); `nacionais=False` ignora os
+    feriados nacionais.
+    """
+
+    def __init__(self, feriados=(), nacionais: bool = True):
+        self.extras = frozenset(feriados)
+        self.nacionais = nacionais
+        self._feriados = {}  # ano -> frozenset de datas
+        self._dias_uteis = {}  # (ano, mês) -> tupla ordenada de datas
+
+    def feriados(self, ano: int) -> frozenset:
+        if ano not in self._feriados:
+            datas = feriados_nacionais(ano) if self.nacionais else set()
+            datas.update(d for d in self.extras if d.year == ano)
+            self._feriados[ano] = frozenset(datas)
+        return self._feriados[ano]
+
+    def dia_util(self, data: datetime.date) -> bool:
+        return data.weekday() < 5 and data not in self.feriados(data.year)
+
+    def dias_uteis(self, ano: int, mes: int) -> tuple:
+        """Dias úteis do mês, em ordem."""
+        chave = (ano, mes)
+        if chave not in self._dias_uteis:
+            _, ultimo = calendar.monthrange(ano, mes)
+            self._dias_uteis[chave] = tuple(
+                data
+                for data in (datetime.date(ano, mes, dia) for dia in range(1, ultimo + 1))
+                if self.dia_util(data)
+            )
+        return self._dias_uteis[chave]
+
+    def enesimo_dia_util(self, ano: int, mes: int, n: int):
+        """
+        N-ésimo dia útil do mês (1 = primeiro; -1 = último). Retorna None se
+        o mês não tiver tantos dias úteis.
+        """
+        if n == 0:
+            raise ValueError("n deve ser diferente de zero")
+        dias = self.dias_uteis(ano, mes)
+        indice = n - 1 if n > 0 else n
+        if -len(dias) <= indice < len(dias):
+            return dias[indice]
+        return None
+
+
+# config.py antigos não têm FERIADOS
+CALENDARIO_PADRAO = Calendario(getattr(config, "FERIADOS", ()))
@@ -1,15 +1,12 @@
 # cogs/tasks_cog.py
 
-import os
-from google.oauth2.service_account import Credentials
 import random
 import datetime
-import gspread
-from discord.ext import tasks, commands
+import discord
+from discord.ext import commands
 from config import (
     CHANNEL_IDS,
     GOOD_AFTERNOON_CHANNEL_ID,
-    TIMEZONE,
     QUINZENAL_MESSAGES,
     SEMANAL_MESSAGES,
     AVISOS_GERAIS_CANAL,
@@ -17,48 +14,88 @@ from config import (
     REALOCACAO_CANAL,
     MENSAGENS_ALERTA_REALOCACAO,
     MENSAGENS_ALERTA_ORACLE_CONFIGURACAO,
-    GOOGLE_SHEETS_CREDENTIALS,
-    GOOGLE_SHEETS_SPREADSHEET,
-    GOOGLE_SHEETS_WORKSHEET,
     CANAL_DOIS_ID,
-    CAHAMADA_MESSAGES,
+    CAHAMADA_MESSAGES,  # Atualizado para CAHAMADA
     DEBUG,
 )
 import asyncio
-from database import session
-from models import Settings
+import functools
+from database import CacheSettings, executar_db
+from scheduler import (
+    Agendador,
+    PoliticaAtraso,
+    RegraHorarios,
+    RegraIntervalo,
+    RegraJanela,
+    RegraUnica,
+    get_now,
+)
+import relogio
+import shards
+import sheets
+import agendamentos
+import avisos
+import disparos
+import envios_agendados
+import historico_envios
+from dispatcher import (
+    LIMITE_GLOBAL,
+    CanalNaoEncontrado,
+    Despachante,
+    PRIORIDADE_ALTA,
+    PRIORIDADE_NORMAL,
+    PRIORIDADE_BAIXA,
+)
 import logging
+import log_setup
+import metrics
+from monitor_loop import MonitorLoop
+
+# Saída de console (antes print) pela mesma fila de logs
+console = log_setup.console()
+
+# Tarefas do layout fixo do config.py. Com os shards divididos entre
+# processos, rodam só no processo que enxerga os canais do config.
+TAREFAS_CONFIG = (
+    "semanal_message_task",
+    "ajustar_ponto_task",
+    "quinzenal_message_task",
+    "enviar_realocacao_ticket",
+    "oracle_configuracao_task",
+    "agendar_avisos_do_dia",
+    "send_good_afternoon_message",
+    "sincronizar_avisos_task",
+    "cahamada_task",
+)
 
 
-# Função auxiliar para retornar a data/hora no fuso definido.
-def get_now():
-    return datetime.datetime.now(TIMEZONE)
+def canais_config():
+    return {
+        GOOD_AFTERNOON_CHANNEL_ID,
+        AVISOS_GERAIS_CANAL,
+        CANAL_DOIS_ID,
+        REALOCACAO_CANAL,
+        *CHANNEL_IDS,
+    }
 
 
-# Função para conectar ao Google Sheets (em stand by)
-def conectar_google_sheets():
-    """Conecta-se ao Google Sheets e retorna a worksheet especificada."""
-    try:
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        creds = Credentials.from_service_account_file(
-            GOOGLE_SHEETS_CREDENTIALS, scopes=scopes
-        )
-        client = gspread.authorize(creds)
-        sheet = client.open(GOOGLE_SHEETS_SPREADSHEET)
-        worksheet = sheet.worksheet(GOOGLE_SHEETS_WORKSHEET)
-        return worksheet
-    except Exception as e:
-        # O log de erro será tratado pela task que chama esta função
-        raise e
+def interpretar_hora(texto: str) -> datetime.time:
+    """Converte "HH:MM" ou "HH:MM:SS" em datetime.time (ValueError se inválido)."""
+    for formato in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.datetime.strptime(texto, formato).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Hora inválida: {texto}")
 
 
 class TasksCog(commands.Cog):
-    def __init__(self, bot: commands.Bot, geral_logger: logging.Logger):
+    def __init__(self, bot: commands.Bot, geral_logger: logging.Logger, eleicao=None):
         self.bot = bot
         self.geral_logger = geral_logger
+        # Várias instâncias: só a líder (lideranca.Eleicao) executa os disparos
+        self.eleicao = eleicao
+        self.layout_config = True
 
         # Configuração dos loggers específicos para cada task
         self.task_semanal_logger = self.setup_logger(
@@ -82,675 +119,362 @@ class TasksCog(commands.Cog):
         self.task_enviar_aviso_excel_logger = self.setup_logger(
             "discord_bot.task_enviar_aviso_excel", "enviar_aviso_excel.log"
         )
-        self.task_mundo_animal_logger = self.setup_logger(
-            "discord_bot.task_mundo_animal", "mundo_animal.log"
+        self.task_cahamada_logger = self.setup_logger(
+            "discord_bot.task_cahamada", "cahamada.log"
+        )  # Novo logger
+        self.scheduler_logger = self.setup_logger(
+            "discord_bot.scheduler", "scheduler.log"
         )
-
-        # Iniciar as tasks (elas só rodam quando o bot está pronto).
-        self.semanal_message_task.start()
-        self.send_good_afternoon_message.start()
-        self.ajustar_ponto_task.start()
-        self.quinzenal_message_task.start()
-        self.enviar_realocacao_ticket.start()
-        self.oracle_configuracao_task.start()
-        self.enviar_aviso_excel.start()
-        self.mundo_animal_task.start()
-
-    def setup_logger(self, logger_name: str, log_filename: str) -> logging.Logger:
-        """
-        Configura um logger específico para uma task.
-        """
-        logger = logging.getLogger(logger_name)
-        logger.setLevel(logging.INFO)
-        log_file_path = os.path.join("logs", log_filename)
-        handler = logging.FileHandler(
-            filename=log_file_path, encoding="utf-8", mode="a"
+        self.task_agendamentos_logger = self.setup_logger(
+            "discord_bot.task_agendamentos", "agendamentos.log"
         )
-        formatter = logging.Formatter("%(asctime)s:%(levelname)s:%(name)s: %(message)s")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        return logger
 
-    # =====================================================
-    # Evento: quando o bot estiver pronto
-    # =====================================================
-    @commands.Cog.listener()
-    async def on_ready(self):
-        self.geral_logger.info(
-            f"INICIALIZAÇÃO - Cog de Tasks carregado!Bot conectado como {self.bot.user}"
-        )
-        print(
-            f"INICIALIZAÇÃO - Cog de Tasks carregado! Bot conectado como {self.bot.user}"
+        # Vigia o event loop e registra qual chamada o bloqueou
+        self.monitor_loop = MonitorLoop(
+            self.setup_logger("discord_bot.loop_lag", "loop_lag.log")
         )
 
-    # =====================================================
-    # Tarefa: Mensagem Semanal (uma vez por semana, qualquer dia entre 09:00 e 18:00)
-    # =====================================================
-    @tasks.loop(hours=1)  # Executa a task a cada hora
-    async def semanal_message_task(self):
-        try:
-            now = get_now()
-            current_week = now.isocalendar()[1]  # Número da semana atual
-
-            # Recuperar a última semana enviada do banco de dados
-            setting = session.query(Settings).filter_by(key="last_week_sent").first()
-            last_week_sent = int(setting.value) if setting else None
+        # Cliente do Google Sheets reutilizado entre as execuções
+        self.sheets = sheets.ClienteSheets(self.task_enviar_aviso_excel_logger)
+        # Estado da última leitura da planilha (detecção de alterações)
+        self.modificacao_avisos = None
+        self.hashes_avisos = {}  # linha -> hash do conteúdo
+
+        # Settings servidas da memória; gravações vão direto para o SQLite
+        self.settings = CacheSettings()
+
+        # Todas as mensagens saem pela fila central (limites do Discord e prioridades).
+        # O limite global é do token do bot: com os shards divididos entre
+        # processos, cada um fica com a sua parte.
+        envios_por_periodo, periodo = LIMITE_GLOBAL
+        self.despachante = Despachante(
+            self.setup_logger("discord_bot.dispatcher", "dispatcher.log"),
+            limite_global=(
+                max(1, int(envios_por_periodo * shards.fracao_local(bot))),
+                periodo,
+            ),
+        )
 
-            if current_week != last_week_sent:
-                current_hour = now.hour
+        # Índice de rotação das mensagens quinzenais (persistido em Settings)
+        self.quinzenal_index = 0
 
-                # Verifica se está entre 09:00 e 18:00
-                if 9 <= current_hour < 18:
-                    # Seleciona uma mensagem aleatória da lista semanal
-                    message = random.choice(SEMANAL_MESSAGES)
+        # Histórico de envios por (regra, período, canal), servido da memória
+        self.historico = historico_envios.HistoricoEnvios()
 
-                    # Enviar a mensagem para o canal especificado
-                    channel = self.bot.get_channel(AVISOS_GERAIS_CANAL)
-                    if channel:
-                        try:
-                            await channel.send(message)
-                            self.task_semanal_logger.info(
-                                f"Mensagem semanal enviada no canal {AVISOS_GERAIS_CANAL} às {now.strftime('%H:%M:%S')}."
-                            )
-                            print(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem semanal no canal {AVISOS_GERAIS_CANAL}."
-                            )
+        # Regras com horário definido vão para o agendador central, que dorme
+        # até o próximo disparo em vez de acordar a cada minuto.
+        # Regras com política gravam o último disparo; se o bot estava fora do
+        # ar no horário (ou a liderança trocou de instância), o disparo perdido
+        # é tratado ao iniciar/assumir. Nas de janela (semanal, Oracle) a
+        # tolerância é a própria janela e a task deduplica por período.
+        self.agendador = Agendador(
+            self.scheduler_logger, registro=disparos.RegistroDisparos(), lideranca=eleicao
+        )
+        self.agendador.agendar(
+            "semanal_message_task",
+            RegraJanela("semana", hora_inicio=9, hora_fim=18),
+            self.semanal_message_task,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=9)),
+        )
+        self.agendador.agendar(
+            "ajustar_ponto_task",
+            RegraHorarios(
+                [datetime.time(10, 10), datetime.time(18, 14)],
+                dias_do_mes=[16, 17, 18, 19, 20, 21],
+            ),
+            self.ajustar_ponto_task,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=2)),
+        )
+        self.agendador.agendar(
+            "quinzenal_message_task",
+            RegraHorarios([datetime.time(9, 0)], dias_do_mes=[15, 30]),
+            self.quinzenal_message_task,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=9)),
+        )
+        self.agendador.agendar(
+            "enviar_realocacao_ticket",
+            RegraHorarios([datetime.time(9, 0)]),
+            self.enviar_realocacao_ticket,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=4)),
+        )
+        self.agendador.agendar(
+            "oracle_configuracao_task",
+            RegraJanela("mes", hora_inicio=9, hora_fim=18),
+            self.oracle_configuracao_task,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=9)),
+        )
+        # Na virada do dia, os avisos da planilha do novo dia entram na fila
+        self.agendador.agendar(
+            "agendar_avisos_do_dia",
+            RegraHorarios([datetime.time(0, 0)]),
+            self.agendar_avisos_do_dia,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(days=1)),
+        )
+        # Tarefas de intervalo fixo (antes tasks.loop): também pelo agendador,
+        # para que todo o tempo do bot passe pelo relógio injetável
+        self.agendador.agendar(
+            "send_good_afternoon_message",
+            RegraIntervalo(datetime.timedelta(minutes=15)),
+            self.send_good_afternoon_message,
+        )
+        self.agendador.agendar(
+            "sincronizar_avisos_task",
+            RegraIntervalo(datetime.timedelta(minutes=15)),
+            self.sincronizar_avisos_task,
+        )
+        self.agendador.agendar(
+            "cahamada_task",
+            RegraIntervalo(datetime.timedelta(hours=24)),
+            self.cahamada_task,
+        )
+        # Agendamentos por servidor (tabela agendamentos): a cada janela, só
+        # os disparos da janela seguinte saem do banco para o agendador
+        self._limite_agendamentos = None
+        self.agendador.agendar(
+            "carregar_agendamentos",
+            RegraIntervalo(agendamentos.JANELA),
+            self.carregar_agendamentos,
+        )
+        self._gravacao_planilha = None
 
-                            # Atualizar a semana enviada no banco de dados
-                            if setting:
-                                setting.value = str(current_week)
-                            else:
-                                new_setting = Settings(
-                                    key="last_week_sent", value=str(current_week)
-                                )
-                                session.add(new_setting)
-                            session.commit()
-                        except Exception as e:
-                            self.task_semanal_logger.exception(
-                                f"Erro ao enviar mensagem semanal: {e}"
-                            )
-                            print(f"Erro ao enviar mensagem semanal: {e}")
-                    else:
-                        self.task_semanal_logger.error(
-                            f"Canal com IDDDD {AVISOS_GERAIS_CANAL} não encontrado."
-                        )
-                        print(f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado.")
-            else:
-                self.task_semanal_logger.info(
-                    "Mensagem semanal já foi enviada esta semana."
-                )
-                print("Mensagem semanal já foi enviada esta semana.")
-        except Exception as e:
-            self.task_semanal_logger.exception(
-                f"Erro na task semanal_message_task: {e}"
-            )
+        # Iniciar as tasks (elas só rodam quando o bot está pronto).
+        self.monitor_loop.iniciar()
+        self.despachante.iniciar()
+        self.agendador.iniciar(aguardar=self.preparar)
 
-    @semanal_message_task.before_loop
-    async def before_semanal_message_task(self):
+    async def preparar(self):
+        """Aguarda o bot ficar pronto e carrega as Settings em memória."""
         await self.bot.wait_until_ready()
-        self.task_semanal_logger.info("Tarefa semanal_message_task iniciada.")
-        print("Tarefa semanal_message_task iniciada.")
+        await self.settings.carregar()
+        await self.historico.carregar(get_now())
+        await self.importar_settings_antigas(get_now())
+        if shards.shards_locais(self.bot) is not None and not any(
+            self.bot.get_channel(canal_id) for canal_id in canais_config()
+        ):
+            # Os canais do config.py estão em guildas de outro processo
+            self.layout_config = False
+            for nome in TAREFAS_CONFIG:
+                self.agendador.cancelar(nome)
+            self.scheduler_logger.info(
+                "Canais do config.py fora dos shards deste processo; "
+                "apenas os agendamentos por servidor rodam aqui."
+            )
+        else:
+            await self.carregar_envios_agendados()
+            self.task_enviar_aviso_excel_logger.info(
+                "Tarefa sincronizar_avisos_task iniciada."
+            )
+            self.task_cahamada_logger.info("Tarefa CAHAMADA iniciada.")
+            console.info("Tarefa CAHAMADA iniciada.")
+        if self.eleicao is not None:
+            self.eleicao.iniciar(self.assumir_lideranca)
 
-    ## listar canais no discord
-    def listar_canais_acessiveis(self):
+    async def importar_settings_antigas(self, agora: datetime.datetime):
         """
-        Lista todos os canais que o bot pode acessar na guilda.
+        Primeira execução com o histórico de envios: a semana/o mês marcados
+        nas Settings antigas ("last_week_sent", "last_month_oracle_sent")
+        entram no histórico, senão a mensagem do período sairia de novo.
         """
-        canais = []
-        for guild in self.bot.guilds:
-            for channel in guild.channels:
-                canais.append((guild.name, channel.id, channel.name))
-        return canais
+        for chave_setting, valor_atual, regra, periodo in (
+            (
+                "last_week_sent",
+                agora.isocalendar()[1],
+                "semanal_message_task",
+                historico_envios.periodo_semana(agora),
+            ),
+            (
+                "last_month_oracle_sent",
+                agora.month,
+                "oracle_configuracao_task",
+                historico_envios.periodo_mes(agora),
+            ),
+        ):
+            if await self.historico.importar_setting(
+                chave_setting, valor_atual, regra, periodo, AVISOS_GERAIS_CANAL, agora
+            ):
+                self.scheduler_logger.info(
+                    f"Envio de '{regra}' no período {periodo} importado de '{chave_setting}'."
+                )
+        # As Settings migradas foram apagadas do banco
+        self.settings.invalidar("last_week_sent")
+        self.settings.invalidar("last_month_oracle_sent")
 
-    @commands.command(name="listar_canais")
-    async def listar_canais(self, ctx):
+    async def assumir_lideranca(self):
         """
-        Comando para listar todos os canais que o bot pode acessar.
+        Esta instância virou a líder: relê o estado que a anterior pode ter
+        alterado e recupera o que ficou sem disparar na troca.
         """
-        canais = self.listar_canais_acessiveis()
-        mensagem = "Canais que o bot pode acessar:\n"
-        for guild_name, channel_id, channel_name in canais:
-            mensagem += (
-                f"Guilda: {guild_name} | ID: {channel_id} | Nome: {channel_name}\n"
-            )
-        await ctx.send(mensagem)
+        self.settings.invalidar()
+        await self.settings.carregar()
+        await self.historico.carregar(get_now())
+        await self.agendador.recuperar_perdidos()
+        agora = get_now()
+        if self.layout_config:
+            await self.carregar_envios_agendados()
+            await self.agendar_avisos_do_dia(agora)
+        await self.carregar_agendamentos(agora)
 
     # =====================================================
-    # Tarefa de 15 em 15 minutos
+    # Envios atrasados/avulsos persistidos (tabela envios_agendados)
     # =====================================================
-    @tasks.loop(minutes=15)
-    async def send_good_afternoon_message(self):
-        try:
-            now = get_now()
-            message = f"@everyone teste chat funcional food afternon de 15 em 15 minutos as  ({now.strftime('%Y-%m-%d %H:%M:%S')})"
-
-            channel = self.bot.get_channel(GOOD_AFTERNOON_CHANNEL_ID)
-            if channel:
-                try:
-                    await channel.send(message)
-                    self.task_good_afternoon_logger.info(
-                        f"[{now.strftime('%H:%M:%S')}] Mensagem de teste enviada no canal {GOOD_AFTERNOON_CHANNEL_ID}."
-                    )
-                except Exception as e:
-                    self.task_good_afternoon_logger.exception(
-                        f"Erro ao enviar mensagem de teste: {e}"
-                    )
-            else:
-                self.task_good_afternoon_logger.error(
-                    f"Canal com ID {GOOD_AFTERNOON_CHANNEL_ID} não encontrado."
-                )
-        except Exception as e:
-            self.task_good_afternoon_logger.exception(
-                f"Erro na task send_good_afternoon_message: {e}"
+    async def carregar_envios_agendados(self):
+        """Recoloca no agendador os envios pendentes gravados antes do reinício."""
+        pendentes = await executar_db(envios_agendados.envios_pendentes)
+        for envio in pendentes:
+            self._agendar_envio(envio)
+        if pendentes:
+            self.scheduler_logger.info(
+                f"{len(pendentes)} envio(s) pendente(s) recarregado(s) do banco."
             )
 
-    # =====================================================
-    # Tarefa para enviar lembrete de ajustar ponto
-    # =====================================================
-    @tasks.loop(minutes=1)
-    async def ajustar_ponto_task(self):
-        try:
-            now = get_now()
-            # Verifica se é dia 16, 17, 18, 19, 20 ou 21 e se o horário é 10:10 ou 18:14
-            if now.day in [16, 17, 18, 19, 20, 21] and now.strftime("%H:%M") in [
-                "10:10",
-                "18:14",
-            ]:
-                # Seleciona uma mensagem aleatória da lista
-                message = random.choice(MENSAGENS_ALERTA_PONTO)
-
-                # Obtém o canal específico
-                channel = self.bot.get_channel(AVISOS_GERAIS_CANAL)
-                if channel:
-                    try:
-                        await channel.send(message)
-                        self.task_ajustar_ponto_logger.info(
-                            f"[{now.strftime('%Y-%m-%d %H:%M')}] Alerta de ponto enviado no canal {AVISOS_GERAIS_CANAL}."
-                        )
-                        print(
-                            f"[{now.strftime('%Y-%m-%d %H:%M')}] Alerta de ponto enviado no canal {AVISOS_GERAIS_CANAL}."
-                        )
-                    except Exception as e:
-                        self.task_ajustar_ponto_logger.exception(
-                            f"Erro ao enviar alerta de ponto: {e}"
-                        )
-                else:
-                    self.task_ajustar_ponto_logger.error(
-                        f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado."
-                    )
-        except Exception as e:
-            self.task_ajustar_ponto_logger.exception(
-                f"Erro na task ajustar_ponto_task: {e}"
-            )
+    async def agendar_envio(
+        self,
+        chave: str,
+        origem: str,
+        canal_id: int,
+        mensagem: str,
+        instante: datetime.datetime,
+        prioridade: int = PRIORIDADE_NORMAL,
+    ):
+        """
+        Grava o envio no banco e põe o timer no agendador. Uma chave já
+        existente não é agendada de novo.
+        """
+        envio = await executar_db(
+            envios_agendados.criar_envio,
+            chave,
+            origem,
+            canal_id,
+            mensagem,
+            instante,
+            prioridade,
+        )
+        if envio.status == envios_agendados.PENDENTE:
+            self._agendar_envio(envio)
+        return envio
+
+    def _agendar_envio(self, envio):
+        self.agendador.agendar(
+            f"envio:{envio.id}",
+            RegraUnica(envios_agendados.instante_execucao(envio)),
+            functools.partial(self.executar_envio_agendado, envio_id=envio.id),
+        )
 
-    # =====================================================
-    # Tarefa para enviar mensagem quinzenalmente
-    # =====================================================
-    @tasks.loop(hours=24)
-    async def quinzenal_message_task(self):
+    async def executar_envio_agendado(self, instante: datetime.datetime, envio_id: int):
+        """Disparado pelo agendador no horário de um envio persistido."""
+        envio = await executar_db(envios_agendados.buscar_envio, envio_id)
+        if envio is None or envio.status != envios_agendados.PENDENTE:
+            return
         try:
-            now = get_now()
-            # Dia divisível por 15 (ex.: dia 15, 30, etc.)
-            if now.day % 15 == 0:
-                for channel_id in CHANNEL_IDS:
-                    channel = self.bot.get_channel(channel_id)
-                    if channel:
-                        try:
-                            await channel.send(QUINZENAL_MESSAGES[self.quinzenal_index])
-                            self.task_quinzenal_logger.info(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem quinzenal no canal {channel_id}"
-                            )
-                            print(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem quinzenal no canal {channel_id}"
-                            )
-                        except Exception as e:
-                            self.task_quinzenal_logger.exception(
-                                f"Erro ao enviar mensagem quinzenal no canal {channel_id}: {e}"
-                            )
-                # Atualiza o índice (rotação circular)
-                self.quinzenal_index = (self.quinzenal_index + 1) % len(
-                    QUINZENAL_MESSAGES
-                )
-        except Exception as e:
-            self.task_quinzenal_logger.exception(
-                f"Erro na task quinzenal_message_task: {e}"
+            canal = self.obter_canal(envio.canal_id, envio.origem)
+            if canal is None:
+                raise CanalNaoEncontrado(f"Canal com ID {envio.canal_id} não encontrado.")
+            # Chave do envio como período: se a mensagem saiu mas o status não
+            # foi gravado (queda entre os dois), o histórico evita o reenvio
+            enviada = await self.enviar_uma_vez(
+                envio.origem,
+                envio.chave,
+                canal,
+                envio.mensagem,
+                instante,
+                prioridade=envio.prioridade,
             )
-
-    @quinzenal_message_task.before_loop
-    async def before_quinzenal_message_task(self):
-        await self.bot.wait_until_ready()
-        self.task_quinzenal_logger.info("Tarefa quinzenal_message_task iniciada.")
-        print("Tarefa quinzenal_message_task iniciada.")
-
-    # =====================================================
-    # Tarefa para enviar lembrete de realocação de ticket
-    # =====================================================
-    @tasks.loop(minutes=1)
-    async def enviar_realocacao_ticket(self):
-        try:
-            now = get_now()
-            # Verifica se é 09:00 da manhã
-            if now.strftime("%H:%M") == "09:00":
-                # Seleciona uma mensagem aleatória da lista específica
-                message = random.choice(MENSAGENS_ALERTA_REALOCACAO)
-
-                # Enviar a mensagem no canal específico
-                channel = self.bot.get_channel(
-                    REALOCACAO_CANAL
-                )  # Substitua pelo canal correto
-                if channel:
-                    try:
-                        await channel.send(message)
-                        self.task_enviar_realocacao_ticket_logger.info(
-                            f"Mensagem de realocação enviada no canal {REALOCACAO_CANAL} às {now.strftime('%H:%M:%S')}."
-                        )
-                        print(
-                            f"Mensagem de realocação enviada no canal {REALOCACAO_CANAL} às {now.strftime('%H:%M:%S')}."
-                        )
-                    except Exception as e:
-                        self.task_enviar_realocacao_ticket_logger.exception(
-                            f"Erro ao enviar mensagem de realocação no canal {REALOCACAO_CANAL}: {e}"
-                        )
-                else:
-                    self.task_enviar_realocacao_ticket_logger.error(
-                        f"Canal com ID {REALOCACAO_CANAL} não encontrado."
-                    )
         except Exception as e:
-            self.task_enviar_realocacao_ticket_logger.exception(
-                f"Erro na task enviar_realocacao_ticket: {e}"
+            envio = await executar_db(envios_agendados.registrar_falha, envio_id, get_now())
+            self.scheduler_logger.exception(
+                f"Erro no envio agendado '{envio.chave}' "
+                f"(tentativa {envio.tentativas}/{envios_agendados.MAX_TENTATIVAS}): {e}"
             )
+            if envio.status == envios_agendados.PENDENTE:
+                self._agendar_envio(envio)
+            return
+
+        await executar_db(envios_agendados.concluir_envio, envio_id)
+        if enviada is None:
+            self.scheduler_logger.info(f"Envio agendado '{envio.chave}' já tinha sido enviado.")
+            return
+        posterior = {"cahamada_task": self.cahamada_enviada}.get(envio.origem)
+        if posterior:
+            await posterior(envio, instante)
 
     # =====================================================
-    # Task: Enviar Mensagem Oracle Configuração (Mensal)
+    # Agendamentos por servidor (tabelas agendamentos/mensagens_agendamento)
     # =====================================================
-    @tasks.loop(hours=1)  # Executa a task a cada hora
-    async def oracle_configuracao_task(self):
-        try:
-            now = get_now()
-            current_month = now.month  # Mês atual
-
-            # Recuperar o último mês enviado do banco de dados
-            setting = (
-                session.query(Settings).filter_by(key="last_month_oracle_sent").first()
-            )
-            last_month_sent = int(setting.value) if setting else None
-
-            if current_month != last_month_sent:
-                current_hour = now.hour
-                # Verifica se está entre 09:00 e 18:00
-                if 9 <= current_hour < 18:
-                    # Seleciona uma mensagem aleatória da lista de configurações Oracle
-                    message = random.choice(MENSAGENS_ALERTA_ORACLE_CONFIGURACAO)
-
-                    # Enviar a mensagem para o canal especificado
-                    channel = self.bot.get_channel(
-                        AVISOS_GERAIS_CANAL
-                    )  # Substitua pelo canal correto
-                    if channel:
-                        try:
-                            await channel.send(message)
-                            self.task_oracle_configuracao_logger.info(
-                                f"Mensagem Oracle enviada no canal {AVISOS_GERAIS_CANAL} às {now.strftime('%H:%M:%S')}."
-                            )
-                            print(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem Oracle no canal {AVISOS_GERAIS_CANAL}."
-                            )
-
-                            # Atualizar o mês enviado no banco de dados
-                            if setting:
-                                setting.value = str(current_month)
-                            else:
-                                new_setting = Settings(
-                                    key="last_month_oracle_sent",
-                                    value=str(current_month),
-                                )
-                                session.add(new_setting)
-                            session.commit()
-                        except Exception as e:
-                            self.task_oracle_configuracao_logger.exception(
-                                f"Erro ao enviar mensagem Oracle: {e}"
-                            )
-                            print(f"Erro ao enviar mensagem Oracle: {e}")
-                    else:
-                        self.task_oracle_configuracao_logger.error(
-                            f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado."
-                        )
-                        print(f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado.")
-            else:
-                self.task_oracle_configuracao_logger.info(
-                    "Mensagem Oracle já foi enviada este mês."
-                )
-                print("Mensagem Oracle já foi enviada este mês.")
-        except Exception as e:
-            self.task_oracle_configuracao_logger.exception(
-                f"Erro na task oracle_configuracao_task: {e}"
+    async def carregar_agendamentos(self, instante: datetime.datetime):
+        """Põe no agendador os disparos até o fim da próxima janela."""
+        # Duas janelas: cobre um atraso do próprio carregamento
+        limite = instante + 2 * agendamentos.JANELA
+        # Só as guildas dos shards deste processo
+        devidos = await executar_db(
+            agendamentos.agendamentos_ate, limite, instante, shards.shards_locais(self.bot)
+        )
+        self._limite_agendamentos = limite
+        novos = sum(self._agendar_agendamento(agendamento) for agendamento in devidos)
+        if novos:
+            self.task_agendamentos_logger.info(
+                f"{novos} disparo(s) de agendamentos carregado(s) até "
+                f"{limite.strftime('%Y-%m-%d %H:%M:%S')}."
             )
 
-    @oracle_configuracao_task.before_loop
-    async def before_oracle_configuracao_task(self):
-        await self.bot.wait_until_ready()
-        self.task_oracle_configuracao_logger.info(
-            "Tarefa oracle_configuracao_task iniciada."
+    def _agendar_agendamento(self, agendamento) -> bool:
+        """Agenda o próximo disparo se ele cair na janela carregada."""
+        instante = agendamentos.instante_proximo(agendamento)
+        if instante is None or self._limite_agendamentos is None:
+            return False
+        if instante > self._limite_agendamentos:
+            return False
+        nome = f"agendamento:{agendamento.id}"
+        existente = self.agendador.tarefa(nome)
+        if existente and existente.proximo == instante:
+            return False
+        self.agendador.agendar(
+            nome,
+            RegraUnica(instante),
+            functools.partial(self.executar_agendamento, agendamento_id=agendamento.id),
         )
-        print("Tarefa oracle_configuracao_task iniciada.")
+        return True
 
-    # =====================================================
-    # Task: Enviar Aviso a partir do Google Sheets
-    # =====================================================
-    @tasks.loop(minutes=15)  # Temporariamente rodando a cada minuto para testes
-    async def enviar_aviso_excel(self):
+    async def executar_agendamento(self, instante: datetime.datetime, agendamento_id: int):
+        """Disparado pelo agendador: sorteia a mensagem e envia no canal do agendamento."""
         try:
-            self.task_enviar_aviso_excel_logger.info(
-                "Iniciando a execução da task 'enviar_aviso_excel'."
+            resultado = await executar_db(
+                agendamentos.avancar_agendamento, agendamento_id, instante
             )
-            worksheet = conectar_google_sheets()
-            if worksheet is None:
-                self.task_enviar_aviso_excel_logger.error(
-                    "Não foi possível conectar ao Google Sheets."
-                )
+            if resultado is None:
                 return
+            agendamento, mensagem = resultado
+            self._agendar_agendamento(agendamento)
 
-            # Obter todas as linhas da planilha como dicionários
-            registros = worksheet.get_all_records()
-            self.task_enviar_aviso_excel_logger.info(
-                f"Número de registros encontrados na planilha: {len(registros)}."
-            )
-
-            for registro in registros:
-                self.task_enviar_aviso_excel_logger.debug(
-                    f"Processando registro: {registro}"
+            if mensagem is None:
+                self.task_agendamentos_logger.warning(
+                    f"Agendamento '{agendamento.nome}' (guilda {agendamento.guild_id}) sem mensagens."
                 )
-                # Verificar se o aviso já foi enviado
-                enviado = registro.get("Enviado", "").strip().upper()
-                self.task_enviar_aviso_excel_logger.debug(
-                    f"Aviso ID {registro.get('ID')}: Enviado = {enviado}"
+                return
+            canal = self.obter_canal(agendamento.canal_id, "agendamento")
+            if canal is None:
+                self.task_agendamentos_logger.error(
+                    f"Canal com ID {agendamento.canal_id} não encontrado "
+                    f"(agendamento '{agendamento.nome}', guilda {agendamento.guild_id})."
                 )
-
-                if enviado != "TRUE":
-                    canal_id = registro.get("Canal_ID")
-                    mensagem = registro.get("Mensagem")
-                    data_envio_str = registro.get("Data")
-                    id_aviso = registro.get("ID")
-
-                    # Validar campos essenciais
-                    if not (canal_id and mensagem and data_envio_str and id_aviso):
-                        self.task_enviar_aviso_excel_logger.warning(
-                            f"Aviso com ID {id_aviso} possui campos incompletos. Pulando."
-                        )
-                        continue
-
-                    # Converter string de data para objeto date
-                    try:
-                        data_envio = datetime.datetime.strptime(
-                            data_envio_str, "%Y-%m-%d"
-                        ).date()
-                    except ValueError as ve:
-                        self.task_enviar_aviso_excel_logger.error(
-                            f"Formato de data inválido para aviso ID {id_aviso}: {data_envio_str}. Pulando."
-                        )
-                        continue
-
-                    hoje = datetime.datetime.now().date()
-                    self.task_enviar_aviso_excel_logger.debug(
-                        f"Aviso ID {id_aviso}: Data de envio = {data_envio} | Data atual = {hoje}"
-                    )
-
-                    # Verificar se a data de envio é hoje
-                    if data_envio == hoje:
-                        try:
-                            canal = self.bot.get_channel(int(canal_id))
-                            if canal:
-                                await canal.send(mensagem)
-                                self.task_enviar_aviso_excel_logger.info(
-                                    f"Mensagem enviada para o canal {canal_id}: {mensagem}"
-                                )
-                                print(
-                                    f"Mensagem enviada para o canal {canal_id}: {mensagem}"
-                                )
-
-                                # Atualizar a flag 'Enviado' na planilha
-                                try:
-                                    cell = worksheet.find(str(id_aviso))
-                                    if cell:
-                                        # Assumindo que a coluna 'Enviado' é a 5ª coluna (E)
-                                        worksheet.update_cell(cell.row, 5, "TRUE")
-                                        self.task_enviar_aviso_excel_logger.info(
-                                            f"Aviso ID {id_aviso} marcado como enviado."
-                                        )
-                                    else:
-                                        self.task_enviar_aviso_excel_logger.error(
-                                            f"Aviso ID {id_aviso} não encontrado na planilha."
-                                        )
-                                except Exception as update_exc:
-                                    self.task_enviar_aviso_excel_logger.exception(
-                                        f"Erro ao atualizar a planilha para aviso ID {id_aviso}: {update_exc}"
-                                    )
-                            else:
-                                self.task_enviar_aviso_excel_logger.error(
-                                    f"Canal com ID {canal_id} não encontrado."
-                                )
-                                print(f"Canal com ID {canal_id} não encontrado.")
-                        except Exception as send_exc:
-                            self.task_enviar_aviso_excel_logger.exception(
-                                f"Erro ao enviar mensagem para o canal {canal_id}: {send_exc}"
-                            )
-        except Exception as e:
-            self.task_enviar_aviso_excel_logger.exception(
-                f"Erro na task enviar_aviso_excel: {e}"
-            )
-            print(f"Erro na task enviar_aviso_excel: {e}")
-
-    @enviar_aviso_excel.before_loop
-    async def before_enviar_aviso_excel(self):
-        await self.bot.wait_until_ready()
-        self.task_enviar_aviso_excel_logger.info("Tarefa enviar_aviso_excel iniciada.")
-        print("Tarefa enviar_aviso_excel iniciada.")
-
-    # =====================================================
-    # Task: MUNDO ANIMAL (Enviar mensagem a cada 10 dias)
-    # =====================================================
-    @tasks.loop(hours=24)  # Executa a task diariamente
-    async def mundo_animal_task(self):
-        try:
-            now = self.get_now()
-            today = now.date()
-
-            # Recuperar a última data de envio do banco de dados
-            setting = (
-                session.query(Settings).filter_by(key="last_mundo_animal_sent").first()
+                return
+            await self.despachante.enviar(
+                canal, mensagem, prioridade=PRIORIDADE_NORMAL, origem="agendamento"
             )
-            last_sent_date = (
-                datetime.datetime.strptime(setting.value, "%Y-%m-%d").date()
-                if setting
-                else None
+            self.task_agendamentos_logger.info(
+                f"Agendamento '{agendamento.nome}' (guilda {agendamento.guild_id}) enviado "
+                f"no canal {agendamento.canal_id} às {instante.strftime('%H:%M:%S')}."
             )
-
-            if setting:
-                days_since_last = (today - last_sent_date).days
-            else:
-                days_since_last = 10  # Força o envio na primeira execução
-
-            # Definir o intervalo de dias com base na flag DEBUG
-            required_days = 10 if not DEBUG else 1  # 1 dia para teste
-
-            if days_since_last >= required_days:
-                # Escolher uma mensagem aleatória
-                message = random.choice(MUNDO_ANIMAL_MESSAGES)
-
-                # Escolher uma hora aleatória entre 15h e 23h
-                send_hour = random.randint(
-                    15, 22
-                )  # 22 para garantir que a hora não ultrapasse 23h após random minutos
-                send_minute = random.randint(0, 59)
-
-                # Calcular o tempo atual e o tempo de envio
-                send_time = now.replace(
-                    hour=send_hour, minute=send_minute, second=0, microsecond=0
-                )
-
-                # Se o tempo de envio já passou hoje, agendar para amanhã
-                if send_time < now:
-                    send_time += datetime.timedelta(days=1)
-
-                delay = (send_time - now).total_seconds()
-
-                self.task_mundo_animal_logger.info(
-                    f"Mensagem MUNDO ANIMAL agendada para {send_time.strftime('%Y-%m-%d %H:%M:%S')}."
-                )
-
-                # Esperar até o tempo de envio
-                await asyncio.sleep(delay)
-
-                # Enviar a mensagem
-                channel = self.bot.get_channel(CANAL_DOIS_ID)
-
-                if channel:
-                    try:
-                        await channel.send(message)
-                        self.task_mundo_animal_logger.info(
-                            f"Mensagem MUNDO ANIMAL enviada no canal {CANAL_DOIS_ID} às {send_time.strftime('%H:%M:%S')}."
-                        )
-                        print(
-                            f"[{send_time.strftime('%Y-%m-%d %H:%M:%S')}] Mensagem MUNDO ANIMAL enviada no canal {CANAL_DOIS_ID}."
-                        )
-
-                        # Atualizar a última data de envio no banco de dados
-                        if setting:
-                            setting.value = today.strftime("%Y-%m-%d")
-                        else:
-                            new_setting = Settings(
-                                key="last_mundo_animal_sent",
-                                value=today.strftime("%Y-%m-%d"),
-                            )
-                            session.add(new_setting)
-                        session.commit()
-                    except Exception as e:
-                        self.task_mundo_animal_logger.exception(
-                            f"Erro ao enviar mensagem MUNDO ANIMAL: {e}"
-                        )
-                else:
-                    self.task_mundo_animal_logger.error(
-                        f"Canal com ID {CANAL_DOIS_ID} não encontrado."
-                    )
-                    print(f"Canal com ID {CANAL_DOIS_ID} não encontrado.")
-            else:
-                self.task_mundo_animal_logger.info(
-                    f"Ainda faltam {required_days - days_since_last} dias para a próxima mensagem MUNDO ANIMAL."
-                )
-                print(
-                    f"Ainda faltam {required_days - days_since_last} dias para a próxima mensagem MUNDO ANIMAL."
-                )
         except Exception as e:
-            self.task_mundo_animal_logger.exception(
-                f"Erro na task mundo_animal_task: {e}"
+            self.task_agendamentos_logger.exception(
+                f"Erro no agendamento ID {agendamento_id}: {e}"
             )
 
-    @mundo_animal_task.before_loop
-    async def before_mundo_animal_task(self):
-        await self.bot.wait_until_ready()
-        self.task_mundo_animal_logger.info("Tarefa MUNDO ANIMAL iniciada.")
-        print("Tarefa MUNDO ANIMAL iniciada.")
-
-    # Método auxiliar para obter o tempo atual com fuso horário
-    def get_now(self):
-        return datetime.datetime.now(TIMEZONE)  # cogs/tasks_cog.py
-
-
-import os
-from google.oauth2.service_account import Credentials
-import random
-import datetime
-import gspread
-from discord.ext import tasks, commands
-from config import (
-    CHANNEL_IDS,
-    GOOD_AFTERNOON_CHANNEL_ID,
-    TIMEZONE,
-    QUINZENAL_MESSAGES,
-    SEMANAL_MESSAGES,
-    AVISOS_GERAIS_CANAL,
-    MENSAGENS_ALERTA_PONTO,
-    REALOCACAO_CANAL,
-    MENSAGENS_ALERTA_REALOCACAO,
-    MENSAGENS_ALERTA_ORACLE_CONFIGURACAO,
-    GOOGLE_SHEETS_CREDENTIALS,
-    GOOGLE_SHEETS_SPREADSHEET,
-    GOOGLE_SHEETS_WORKSHEET,
-    CANAL_DOIS_ID,
-    CAHAMADA_MESSAGES,  # Atualizado para CAHAMADA
-    DEBUG,
-)
-import asyncio
-from database import session
-from models import Settings
-import logging
-
-
-# Função auxiliar para retornar a data/hora no fuso definido.
-def get_now():
-    return datetime.datetime.now(TIMEZONE)
-
-
-# Função para conectar ao Google Sheets (em stand by)
-def conectar_google_sheets():
-    """Conecta-se ao Google Sheets e retorna a worksheet especificada."""
-    try:
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        creds = Credentials.from_service_account_file(
-            GOOGLE_SHEETS_CREDENTIALS, scopes=scopes
-        )
-        client = gspread.authorize(creds)
-        sheet = client.open(GOOGLE_SHEETS_SPREADSHEET)
-        worksheet = sheet.worksheet(GOOGLE_SHEETS_WORKSHEET)
-        return worksheet
-    except Exception as e:
-        # O log de erro será tratado pela task que chama esta função
-        raise e
-
-
-class TasksCog(commands.Cog):
-    def __init__(self, bot: commands.Bot, geral_logger: logging.Logger):
-        self.bot = bot
-        self.geral_logger = geral_logger
-
-        # Configuração dos loggers específicos para cada task
-        self.task_semanal_logger = self.setup_logger(
-            "discord_bot.task_semanal", "task_semanal.log"
-        )
-        self.task_good_afternoon_logger = self.setup_logger(
-            "discord_bot.task_good_afternoon", "task_good_afternoon.log"
-        )
-        self.task_ajustar_ponto_logger = self.setup_logger(
-            "discord_bot.task_ajustar_ponto", "ajustar_ponto.log"
-        )
-        self.task_quinzenal_logger = self.setup_logger(
-            "discord_bot.task_quinzenal", "quinzenal_message.log"
-        )
-        self.task_enviar_realocacao_ticket_logger = self.setup_logger(
-            "discord_bot.task_enviar_realocacao_ticket", "enviar_realocacao_ticket.log"
-        )
-        self.task_oracle_configuracao_logger = self.setup_logger(
-            "discord_bot.task_oracle_configuracao", "oracle_configuracao.log"
-        )
-        self.task_enviar_aviso_excel_logger = self.setup_logger(
-            "discord_bot.task_enviar_aviso_excel", "enviar_aviso_excel.log"
-        )
-        self.task_cahamada_logger = self.setup_logger(
-            "discord_bot.task_cahamada", "cahamada.log"
-        )  # Novo logger
-
-        # Iniciar as tasks (elas só rodam quando o bot está pronto).
-        self.semanal_message_task.start()
-        self.send_good_afternoon_message.start()
-        self.ajustar_ponto_task.start()
-        self.quinzenal_message_task.start()
-        self.enviar_realocacao_ticket.start()
-        self.oracle_configuracao_task.start()
-        self.enviar_aviso_excel.start()
-        self.cahamada_task.start()  # Iniciar a nova task
+    def cog_unload(self):
+        if self.eleicao is not None:
+            self.eleicao.parar()
+        self.monitor_loop.parar()
+        self.agendador.parar()
+        self.despachante.parar()
 
     def setup_logger(self, logger_name: str, log_filename: str) -> logging.Logger:
         """
@@ -758,15 +482,45 @@ class TasksCog(commands.Cog):
         """
         logger = logging.getLogger(logger_name)
         logger.setLevel(logging.INFO)
-        log_file_path = os.path.join("logs", log_filename)
-        handler = logging.FileHandler(
-            filename=log_file_path, encoding="utf-8", mode="a"
-        )
-        formatter = logging.Formatter("%(asctime)s:%(levelname)s:%(name)s: %(message)s")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        log_file_path = log_setup.caminho(log_filename)
+        # Escrita via fila em thread de fundo; chamadas repetidas não duplicam o handler
+        log_setup.anexar_arquivo(logger, log_file_path, formato_texto=log_setup.FORMATO_TASK)
         return logger
 
+    def obter_canal(self, canal_id: int, origem: str):
+        """bot.get_channel, contando nas métricas os canais não encontrados."""
+        canal = self.bot.get_channel(canal_id)
+        if canal is None:
+            metrics.CANAL_NAO_ENCONTRADO.inc(task=origem)
+        return canal
+
+    async def enviar_uma_vez(
+        self,
+        regra: str,
+        periodo: str,
+        canal,
+        conteudo,
+        instante: datetime.datetime,
+        prioridade: int = PRIORIDADE_NORMAL,
+        origem: str = None,
+    ):
+        """
+        Envia pelo despachante só se (regra, período, canal) ainda não está no
+        histórico. Retorna a mensagem enviada, ou None se já tinha saído.
+        `origem` (rótulo das métricas) é a própria regra se não informada.
+        """
+        if not self.historico.reservar(regra, periodo, canal.id):
+            return None
+        try:
+            mensagem = await self.despachante.enviar(
+                canal, conteudo, prioridade=prioridade, origem=origem or regra
+            )
+        except Exception:
+            self.historico.desfazer(regra, periodo, canal.id)
+            raise
+        await self.historico.confirmar(regra, periodo, canal.id, mensagem, instante)
+        return mensagem
+
     # =====================================================
     # Evento: quando o bot estiver pronto
     # =====================================================
@@ -775,24 +529,22 @@ class TasksCog(commands.Cog):
         self.geral_logger.info(
             f"INICIALIZAÇÃO - Cog de Tasks carregado! Bot conectado como {self.bot.user}"
         )
-        print(
+        console.info(
             f"INICIALIZAÇÃO - Cog de Tasks carregado! Bot conectado como {self.bot.user}"
         )
 
     # =====================================================
     # Tarefa: Mensagem Semanal (uma vez por semana, qualquer dia entre 09:00 e 18:00)
     # =====================================================
-    @tasks.loop(hours=1)  # Executa a task a cada hora
-    async def semanal_message_task(self):
+    async def semanal_message_task(self, instante: datetime.datetime):
         try:
-            now = get_now()
-            current_week = now.isocalendar()[1]  # Número da semana atual
+            now = instante
+            # Semana ISO com o ano (ex.: "2026-W11"), chave no histórico de envios
+            periodo = historico_envios.periodo_semana(now)
 
-            # Recuperar a última semana enviada do banco de dados
-            setting = session.query(Settings).filter_by(key="last_week_sent").first()
-            last_week_sent = int(setting.value) if setting else None
-
-            if current_week != last_week_sent:
+            if not self.historico.ja_enviado(
+                "semanal_message_task", periodo, AVISOS_GERAIS_CANAL
+            ):
                 current_hour = now.hour
 
                 # Verifica se está entre 09:00 e 18:00
@@ -801,52 +553,44 @@ class TasksCog(commands.Cog):
                     message = random.choice(SEMANAL_MESSAGES)
 
                     # Enviar a mensagem para o canal especificado
-                    channel = self.bot.get_channel(AVISOS_GERAIS_CANAL)
+                    channel = self.obter_canal(AVISOS_GERAIS_CANAL, "semanal_message_task")
                     if channel:
                         try:
-                            await channel.send(message)
-                            self.task_semanal_logger.info(
-                                f"Mensagem semanal enviada no canal {AVISOS_GERAIS_CANAL} às {now.strftime('%H:%M:%S')}."
-                            )
-                            print(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem semanal no canal {AVISOS_GERAIS_CANAL}."
+                            enviada = await self.enviar_uma_vez(
+                                "semanal_message_task",
+                                periodo,
+                                channel,
+                                message,
+                                now,
+                                prioridade=PRIORIDADE_NORMAL,
                             )
-
-                            # Atualizar a semana enviada no banco de dados
-                            if setting:
-                                setting.value = str(current_week)
-                            else:
-                                new_setting = Settings(
-                                    key="last_week_sent", value=str(current_week)
+                            if enviada is not None:
+                                self.task_semanal_logger.info(
+                                    f"Mensagem semanal enviada no canal {AVISOS_GERAIS_CANAL} às {now.strftime('%H:%M:%S')}."
+                                )
+                                console.info(
+                                    f"[{now.strftime('%H:%M:%S')}] Enviada mensagem semanal no canal {AVISOS_GERAIS_CANAL}."
                                 )
-                                session.add(new_setting)
-                            session.commit()
                         except Exception as e:
                             self.task_semanal_logger.exception(
                                 f"Erro ao enviar mensagem semanal: {e}"
                             )
-                            print(f"Erro ao enviar mensagem semanal: {e}")
+                            console.info(f"Erro ao enviar mensagem semanal: {e}")
                     else:
                         self.task_semanal_logger.error(
                             f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado."
                         )
-                        print(f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado.")
+                        console.info(f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado.")
             else:
                 self.task_semanal_logger.info(
                     "Mensagem semanal já foi enviada esta semana."
                 )
-                print("Mensagem semanal já foi enviada esta semana.")
+                console.info("Mensagem semanal já foi enviada esta semana.")
         except Exception as e:
             self.task_semanal_logger.exception(
                 f"Erro na task semanal_message_task: {e}"
             )
 
-    @semanal_message_task.before_loop
-    async def before_semanal_message_task(self):
-        await self.bot.wait_until_ready()
-        self.task_semanal_logger.info("Tarefa semanal_message_task iniciada.")
-        print("Tarefa semanal_message_task iniciada.")
-
     ## listar canais no discord
     def listar_canais_acessiveis(self):
         """
@@ -871,19 +615,99 @@ class TasksCog(commands.Cog):
             )
         await ctx.send(mensagem)
 
+    @commands.command(name="agendar")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def agendar(
+        self, ctx, nome: str, canal: discord.TextChannel, regra: str, *, mensagem: str
+    ):
+        """
+        Cria uma mensagem recorrente neste servidor.
+        Ex.: !agendar ponto #avisos 10:10,18:14/d16-21 Lembrete de ajustar o ponto
+        """
+        try:
+            agendamento = await executar_db(
+                agendamentos.criar_agendamento,
+                ctx.guild.id,
+                nome,
+                canal.id,
+                regra,
+                mensagem,
+                get_now(),
+            )
+        except ValueError as e:
+            await ctx.send(f"Não foi possível agendar: {e}")
+            return
+        self._agendar_agendamento(agendamento)
+        proximo = agendamentos.instante_proximo(agendamento)
+        await ctx.send(
+            f"Agendamento '{nome}' criado. Próximo envio: "
+            f"{proximo.strftime('%Y-%m-%d %H:%M') if proximo else 'nenhum'}."
+        )
+
+    @commands.command(name="mensagem_agendamento")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def mensagem_agendamento(self, ctx, nome: str, *, mensagem: str):
+        """Acrescenta uma mensagem às sorteadas pelo agendamento."""
+        agendamento = await executar_db(
+            agendamentos.adicionar_mensagem, ctx.guild.id, nome, mensagem
+        )
+        if agendamento is None:
+            await ctx.send(f"Agendamento '{nome}' não encontrado.")
+            return
+        await ctx.send(f"Mensagem adicionada ao agendamento '{nome}'.")
+
+    @commands.command(name="remover_agendamento")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def remover_agendamento(self, ctx, nome: str):
+        agendamento_id = await executar_db(
+            agendamentos.remover_agendamento, ctx.guild.id, nome
+        )
+        if agendamento_id is None:
+            await ctx.send(f"Agendamento '{nome}' não encontrado.")
+            return
+        self.agendador.cancelar(f"agendamento:{agendamento_id}")
+        await ctx.send(f"Agendamento '{nome}' removido.")
+
+    @commands.command(name="agendamentos")
+    @commands.guild_only()
+    async def listar_agendamentos(self, ctx):
+        """Lista os agendamentos deste servidor."""
+        registros = await executar_db(agendamentos.agendamentos_da_guilda, ctx.guild.id)
+        if not registros:
+            await ctx.send("Nenhum agendamento neste servidor.")
+            return
+        mensagem = "Agendamentos deste servidor:\n"
+        for agendamento, quantidade in registros:
+            proximo = agendamentos.instante_proximo(agendamento)
+            mensagem += (
+                f"{agendamento.nome} | Canal: <#{agendamento.canal_id}> | Regra: {agendamento.regra} | "
+                f"Mensagens: {quantidade} | Próximo: "
+                f"{proximo.strftime('%Y-%m-%d %H:%M') if proximo else '-'}\n"
+            )
+        await ctx.send(mensagem)
+
     # =====================================================
     # Tarefa de 15 em 15 minutos
     # =====================================================
-    @tasks.loop(minutes=15)
-    async def send_good_afternoon_message(self):
+    async def send_good_afternoon_message(self, instante: datetime.datetime):
         try:
-            now = get_now()
-            message = f"@everyone teste chat funcional good afternoon de 15 em 15 minutos às ({now.strftime('%Y-%m-%d %H:%M:%S')})"
+            now = instante
+            message = f"@everyone teste chat funcional food afternon de 15 em 15 minutos as  ({now.strftime('%Y-%m-%d %H:%M:%S')})"
 
-            channel = self.bot.get_channel(GOOD_AFTERNOON_CHANNEL_ID)
+            channel = self.obter_canal(
+                GOOD_AFTERNOON_CHANNEL_ID, "send_good_afternoon_message"
+            )
             if channel:
                 try:
-                    await channel.send(message)
+                    await self.despachante.enviar(
+                        channel,
+                        message,
+                        prioridade=PRIORIDADE_BAIXA,
+                        origem="send_good_afternoon_message",
+                    )
                     self.task_good_afternoon_logger.info(
                         f"[{now.strftime('%H:%M:%S')}] Mensagem de teste enviada no canal {GOOD_AFTERNOON_CHANNEL_ID}."
                     )
@@ -903,37 +727,45 @@ class TasksCog(commands.Cog):
     # =====================================================
     # Tarefa para enviar lembrete de ajustar ponto
     # =====================================================
-    @tasks.loop(minutes=1)
-    async def ajustar_ponto_task(self):
+    # Disparada pelo agendador nos dias 16 a 21, às 10:10 e às 18:14
+    async def ajustar_ponto_task(self, instante: datetime.datetime):
         try:
-            now = get_now()
-            # Verifica se é dia 16, 17, 18, 19, 20 ou 21 e se o horário é 10:10 ou 18:14
-            if now.day in [16, 17, 18, 19, 20, 21] and now.strftime("%H:%M") in [
-                "10:10",
-                "18:14",
-            ]:
-                # Seleciona uma mensagem aleatória da lista
-                message = random.choice(MENSAGENS_ALERTA_PONTO)
-
-                # Obtém o canal específico
-                channel = self.bot.get_channel(AVISOS_GERAIS_CANAL)
-                if channel:
-                    try:
-                        await channel.send(message)
+            now = instante
+            # Seleciona uma mensagem aleatória da lista
+            message = random.choice(MENSAGENS_ALERTA_PONTO)
+
+            # Obtém o canal específico
+            channel = self.obter_canal(AVISOS_GERAIS_CANAL, "ajustar_ponto_task")
+            if channel:
+                try:
+                    # Um alerta por horário agendado, mesmo após reconexão ou reinício
+                    enviada = await self.enviar_uma_vez(
+                        "ajustar_ponto_task",
+                        historico_envios.periodo_disparo(now),
+                        channel,
+                        message,
+                        now,
+                        prioridade=PRIORIDADE_ALTA,
+                    )
+                    if enviada is None:
                         self.task_ajustar_ponto_logger.info(
-                            f"[{now.strftime('%Y-%m-%d %H:%M')}] Alerta de ponto enviado no canal {AVISOS_GERAIS_CANAL}."
+                            f"[{now.strftime('%Y-%m-%d %H:%M')}] Alerta de ponto deste horário já enviado."
                         )
-                        print(
+                    else:
+                        self.task_ajustar_ponto_logger.info(
                             f"[{now.strftime('%Y-%m-%d %H:%M')}] Alerta de ponto enviado no canal {AVISOS_GERAIS_CANAL}."
                         )
-                    except Exception as e:
-                        self.task_ajustar_ponto_logger.exception(
-                            f"Erro ao enviar alerta de ponto: {e}"
+                        console.info(
+                            f"[{now.strftime('%Y-%m-%d %H:%M')}] Alerta de ponto enviado no canal {AVISOS_GERAIS_CANAL}."
                         )
-                else:
-                    self.task_ajustar_ponto_logger.error(
-                        f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado."
+                except Exception as e:
+                    self.task_ajustar_ponto_logger.exception(
+                        f"Erro ao enviar alerta de ponto: {e}"
                     )
+            else:
+                self.task_ajustar_ponto_logger.error(
+                    f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado."
+                )
         except Exception as e:
             self.task_ajustar_ponto_logger.exception(
                 f"Erro na task ajustar_ponto_task: {e}"
@@ -942,75 +774,120 @@ class TasksCog(commands.Cog):
     # =====================================================
     # Tarefa para enviar mensagem quinzenalmente
     # =====================================================
-    @tasks.loop(hours=24)
-    async def quinzenal_message_task(self):
+    # Disparada pelo agendador nos dias divisíveis por 15 (dia 15 e 30)
+    async def quinzenal_message_task(self, instante: datetime.datetime):
         try:
-            now = get_now()
-            # Dia divisível por 15 (ex.: dia 15, 30, etc.)
-            if now.day % 15 == 0:
-                for channel_id in CHANNEL_IDS:
-                    channel = self.bot.get_channel(channel_id)
-                    if channel:
-                        try:
-                            await channel.send(QUINZENAL_MESSAGES[self.quinzenal_index])
-                            self.task_quinzenal_logger.info(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem quinzenal no canal {channel_id}"
-                            )
-                            print(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem quinzenal no canal {channel_id}"
-                            )
-                        except Exception as e:
-                            self.task_quinzenal_logger.exception(
-                                f"Erro ao enviar mensagem quinzenal no canal {channel_id}: {e}"
-                            )
-                # Atualiza o índice (rotação circular)
-                self.quinzenal_index = (self.quinzenal_index + 1) % len(
-                    QUINZENAL_MESSAGES
+            now = instante
+            periodo = historico_envios.periodo_dia(now)
+            # Índice persistido: aponta para a mensagem do próximo período.
+            # Lido antes de reservar: um erro aqui não deixa reservas presas.
+            quinzenal_index = await self.settings.obter("quinzenal_index", int, 0)
+
+            # Só os canais que ainda não receberam a mensagem deste dia
+            pendentes = [
+                channel_id
+                for channel_id in CHANNEL_IDS
+                if self.historico.reservar("quinzenal_message_task", periodo, channel_id)
+            ]
+            if not pendentes:
+                self.task_quinzenal_logger.info("Mensagem quinzenal já enviada hoje.")
+                return
+
+            # Se parte dos canais já recebeu a mensagem deste período, repete a mesma
+            primeira_vez = len(pendentes) == len(CHANNEL_IDS)
+            if not primeira_vez:
+                quinzenal_index -= 1
+            quinzenal_index %= len(QUINZENAL_MESSAGES)
+            self.quinzenal_index = quinzenal_index
+
+            # Envia para todos os canais ao mesmo tempo (limitado pelo despachante)
+            try:
+                resultado = await self.despachante.transmitir(
+                    pendentes,
+                    QUINZENAL_MESSAGES[quinzenal_index],
+                    obter_canal=functools.partial(
+                        self.obter_canal, origem="quinzenal_message_task"
+                    ),
+                    prioridade=PRIORIDADE_NORMAL,
+                    origem="quinzenal_message_task",
+                )
+            except Exception:
+                for channel_id in pendentes:
+                    self.historico.desfazer("quinzenal_message_task", periodo, channel_id)
+                raise
+            for channel_id, mensagem in resultado.sucessos.items():
+                await self.historico.confirmar(
+                    "quinzenal_message_task", periodo, channel_id, mensagem, now
+                )
+                self.task_quinzenal_logger.info(
+                    f"[{now.strftime('%H:%M:%S')}] Enviada mensagem quinzenal no canal {channel_id}"
+                )
+                console.info(
+                    f"[{now.strftime('%H:%M:%S')}] Enviada mensagem quinzenal no canal {channel_id}"
+                )
+            for channel_id, erro in resultado.falhas.items():
+                # Sem registro: a próxima tentativa neste período envia de novo
+                self.historico.desfazer("quinzenal_message_task", periodo, channel_id)
+                self.task_quinzenal_logger.error(
+                    f"Erro ao enviar mensagem quinzenal no canal {channel_id}: {erro}"
+                )
+            self.task_quinzenal_logger.info(
+                f"Transmissão quinzenal concluída em {resultado.duracao:.2f}s "
+                f"({len(resultado.sucessos)} ok, {len(resultado.falhas)} falha(s))."
+            )
+            # Atualiza o índice (rotação circular)
+            if primeira_vez:
+                await self.settings.salvar(
+                    "quinzenal_index", (quinzenal_index + 1) % len(QUINZENAL_MESSAGES)
                 )
         except Exception as e:
             self.task_quinzenal_logger.exception(
                 f"Erro na task quinzenal_message_task: {e}"
             )
 
-    @quinzenal_message_task.before_loop
-    async def before_quinzenal_message_task(self):
-        await self.bot.wait_until_ready()
-        self.task_quinzenal_logger.info("Tarefa quinzenal_message_task iniciada.")
-        print("Tarefa quinzenal_message_task iniciada.")
-
     # =====================================================
     # Tarefa para enviar lembrete de realocação de ticket
     # =====================================================
-    @tasks.loop(minutes=1)
-    async def enviar_realocacao_ticket(self):
+    # Disparada pelo agendador todos os dias às 09:00
+    async def enviar_realocacao_ticket(self, instante: datetime.datetime):
         try:
-            now = get_now()
-            # Verifica se é 09:00 da manhã
-            if now.strftime("%H:%M") == "09:00":
-                # Seleciona uma mensagem aleatória da lista específica
-                message = random.choice(MENSAGENS_ALERTA_REALOCACAO)
-
-                # Enviar a mensagem no canal específico
-                channel = self.bot.get_channel(
-                    REALOCACAO_CANAL
-                )  # Substitua pelo canal correto
-                if channel:
-                    try:
-                        await channel.send(message)
+            now = instante
+            # Seleciona uma mensagem aleatória da lista específica
+            message = random.choice(MENSAGENS_ALERTA_REALOCACAO)
+
+            # Enviar a mensagem no canal específico
+            channel = self.obter_canal(
+                REALOCACAO_CANAL, "enviar_realocacao_ticket"
+            )  # Substitua pelo canal correto
+            if channel:
+                try:
+                    enviada = await self.enviar_uma_vez(
+                        "enviar_realocacao_ticket",
+                        historico_envios.periodo_dia(now),
+                        channel,
+                        message,
+                        now,
+                        prioridade=PRIORIDADE_ALTA,
+                    )
+                    if enviada is None:
                         self.task_enviar_realocacao_ticket_logger.info(
-                            f"Mensagem de realocação enviada no canal {REALOCACAO_CANAL} às {now.strftime('%H:%M:%S')}."
+                            "Mensagem de realocação já enviada hoje."
                         )
-                        print(
+                    else:
+                        self.task_enviar_realocacao_ticket_logger.info(
                             f"Mensagem de realocação enviada no canal {REALOCACAO_CANAL} às {now.strftime('%H:%M:%S')}."
                         )
-                    except Exception as e:
-                        self.task_enviar_realocacao_ticket_logger.exception(
-                            f"Erro ao enviar mensagem de realocação no canal {REALOCACAO_CANAL}: {e}"
+                        console.info(
+                            f"Mensagem de realocação enviada no canal {REALOCACAO_CANAL} às {now.strftime('%H:%M:%S')}."
                         )
-                else:
-                    self.task_enviar_realocacao_ticket_logger.error(
-                        f"Canal com ID {REALOCACAO_CANAL} não encontrado."
+                except Exception as e:
+                    self.task_enviar_realocacao_ticket_logger.exception(
+                        f"Erro ao enviar mensagem de realocação no canal {REALOCACAO_CANAL}: {e}"
                     )
+            else:
+                self.task_enviar_realocacao_ticket_logger.error(
+                    f"Canal com ID {REALOCACAO_CANAL} não encontrado."
+                )
         except Exception as e:
             self.task_enviar_realocacao_ticket_logger.exception(
                 f"Erro na task enviar_realocacao_ticket: {e}"
@@ -1019,19 +896,15 @@ class TasksCog(commands.Cog):
     # =====================================================
     # Task: Enviar Mensagem Oracle Configuração (Mensal)
     # =====================================================
-    @tasks.loop(hours=1)  # Executa a task a cada hora
-    async def oracle_configuracao_task(self):
+    async def oracle_configuracao_task(self, instante: datetime.datetime):
         try:
-            now = get_now()
-            current_month = now.month  # Mês atual
+            now = instante
+            # Mês com o ano (ex.: "2026-03"), chave no histórico de envios
+            periodo = historico_envios.periodo_mes(now)
 
-            # Recuperar o último mês enviado do banco de dados
-            setting = (
-                session.query(Settings).filter_by(key="last_month_oracle_sent").first()
-            )
-            last_month_sent = int(setting.value) if setting else None
-
-            if current_month != last_month_sent:
+            if not self.historico.ja_enviado(
+                "oracle_configuracao_task", periodo, AVISOS_GERAIS_CANAL
+            ):
                 current_hour = now.hour
                 # Verifica se está entre 09:00 e 18:00
                 if 9 <= current_hour < 18:
@@ -1039,189 +912,323 @@ class TasksCog(commands.Cog):
                     message = random.choice(MENSAGENS_ALERTA_ORACLE_CONFIGURACAO)
 
                     # Enviar a mensagem para o canal especificado
-                    channel = self.bot.get_channel(
-                        AVISOS_GERAIS_CANAL
+                    channel = self.obter_canal(
+                        AVISOS_GERAIS_CANAL, "oracle_configuracao_task"
                     )  # Substitua pelo canal correto
                     if channel:
                         try:
-                            await channel.send(message)
-                            self.task_oracle_configuracao_logger.info(
-                                f"Mensagem Oracle enviada no canal {AVISOS_GERAIS_CANAL} às {now.strftime('%H:%M:%S')}."
+                            enviada = await self.enviar_uma_vez(
+                                "oracle_configuracao_task",
+                                periodo,
+                                channel,
+                                message,
+                                now,
+                                prioridade=PRIORIDADE_NORMAL,
                             )
-                            print(
-                                f"[{now.strftime('%H:%M:%S')}] Enviada mensagem Oracle no canal {AVISOS_GERAIS_CANAL}."
-                            )
-
-                            # Atualizar o mês enviado no banco de dados
-                            if setting:
-                                setting.value = str(current_month)
-                            else:
-                                new_setting = Settings(
-                                    key="last_month_oracle_sent",
-                                    value=str(current_month),
+                            if enviada is not None:
+                                self.task_oracle_configuracao_logger.info(
+                                    f"Mensagem Oracle enviada no canal {AVISOS_GERAIS_CANAL} às {now.strftime('%H:%M:%S')}."
+                                )
+                                console.info(
+                                    f"[{now.strftime('%H:%M:%S')}] Enviada mensagem Oracle no canal {AVISOS_GERAIS_CANAL}."
                                 )
-                                session.add(new_setting)
-                            session.commit()
                         except Exception as e:
                             self.task_oracle_configuracao_logger.exception(
                                 f"Erro ao enviar mensagem Oracle: {e}"
                             )
-                            print(f"Erro ao enviar mensagem Oracle: {e}")
+                            console.info(f"Erro ao enviar mensagem Oracle: {e}")
                     else:
                         self.task_oracle_configuracao_logger.error(
                             f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado."
                         )
-                        print(f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado.")
+                        console.info(f"Canal com ID {AVISOS_GERAIS_CANAL} não encontrado.")
             else:
                 self.task_oracle_configuracao_logger.info(
                     "Mensagem Oracle já foi enviada este mês."
                 )
-                print("Mensagem Oracle já foi enviada este mês.")
+                console.info("Mensagem Oracle já foi enviada este mês.")
         except Exception as e:
             self.task_oracle_configuracao_logger.exception(
                 f"Erro na task oracle_configuracao_task: {e}"
             )
 
-    @oracle_configuracao_task.before_loop
-    async def before_oracle_configuracao_task(self):
-        await self.bot.wait_until_ready()
-        self.task_oracle_configuracao_logger.info(
-            "Tarefa oracle_configuracao_task iniciada."
-        )
-        print("Tarefa oracle_configuracao_task iniciada.")
-
     # =====================================================
     # Task: Enviar Aviso a partir do Google Sheets
     # =====================================================
-    @tasks.loop(minutes=15)  # Temporariamente rodando a cada minuto para testes
-    async def enviar_aviso_excel(self):
+    # Cada aviso é um disparo único no agendador, no dia/hora da planilha
+    async def enviar_aviso_excel(self, instante: datetime.datetime, aviso_id: str):
         try:
-            self.task_enviar_aviso_excel_logger.info(
-                "Iniciando a execução da task 'enviar_aviso_excel'."
-            )
-            worksheet = conectar_google_sheets()
-            if worksheet is None:
-                self.task_enviar_aviso_excel_logger.error(
-                    "Não foi possível conectar ao Google Sheets."
+            # Consulta apenas o espelho local: funciona mesmo sem acesso ao Google
+            aviso = await executar_db(avisos.buscar_aviso, aviso_id)
+            if aviso is None or aviso.sent:
+                return
+            if instante != avisos.instante_envio(aviso):
+                # Data/hora mudou na planilha depois que o disparo foi agendado
+                self.task_enviar_aviso_excel_logger.info(
+                    f"Aviso ID {aviso_id} reagendado para "
+                    f"{avisos.instante_envio(aviso).strftime('%Y-%m-%d %H:%M:%S')}. "
+                    "Disparo antigo ignorado."
                 )
                 return
 
-            # Obter todas as linhas da planilha como dicionários
-            registros = worksheet.get_all_records()
-            self.task_enviar_aviso_excel_logger.info(
-                f"Número de registros encontrados na planilha: {len(registros)}."
+            canal_id = aviso.canal_id
+            mensagem = aviso.mensagem
+            canal = self.obter_canal(canal_id, "enviar_aviso_excel")
+            if canal:
+                # O aviso volta à fila a cada sincronização enquanto não for
+                # marcado: o histórico impede um segundo envio em paralelo
+                regra = f"enviar_aviso_excel:{aviso_id}"
+                periodo = aviso.send_date.isoformat()
+                enviada = await self.enviar_uma_vez(
+                    regra,
+                    periodo,
+                    canal,
+                    mensagem,
+                    instante,
+                    prioridade=PRIORIDADE_ALTA,
+                    origem="enviar_aviso_excel",
+                )
+                if enviada is None:
+                    if not self.historico.em_envio(regra, periodo, canal_id):
+                        # Já saiu antes, mas a marcação no banco não foi gravada
+                        await executar_db(avisos.marcar_enviado, aviso_id)
+                        self.agendar_gravacao_planilha()
+                    self.task_enviar_aviso_excel_logger.info(
+                        f"Aviso ID {aviso_id} já enviado (ou em envio). Ignorado."
+                    )
+                    return
+                self.task_enviar_aviso_excel_logger.info(
+                    f"Mensagem enviada para o canal {canal_id}: {mensagem} "
+                    f"(agendada para {instante.strftime('%Y-%m-%d %H:%M:%S')})"
+                )
+                console.info(f"Mensagem enviada para o canal {canal_id}: {mensagem}")
+                await executar_db(avisos.marcar_enviado, aviso_id)
+                self.agendar_gravacao_planilha()
+            else:
+                self.task_enviar_aviso_excel_logger.error(
+                    f"Canal com ID {canal_id} não encontrado."
+                )
+                console.info(f"Canal com ID {canal_id} não encontrado.")
+        except Exception as e:
+            self.task_enviar_aviso_excel_logger.exception(
+                f"Erro ao enviar o aviso ID {aviso_id}: {e}"
+            )
+            console.info(f"Erro na task enviar_aviso_excel: {e}")
+
+    async def agendar_avisos_do_dia(self, instante: datetime.datetime = None):
+        """Coloca na fila do agendador os avisos de hoje ainda não enviados."""
+        hoje = (instante or get_now()).date()
+        devidos = await executar_db(avisos.avisos_devidos, hoje)
+        # Avisos que saíram de hoje (data mudada, linha apagada, já enviados) perdem o disparo
+        nomes = {f"aviso:{aviso.aviso_id}" for aviso in devidos}
+        for nome in list(self.agendador.proximos_disparos()):
+            if nome.startswith("aviso:") and nome not in nomes:
+                self.agendador.cancelar(nome)
+        for aviso in devidos:
+            nome = f"aviso:{aviso.aviso_id}"
+            envio = avisos.instante_envio(aviso)
+            existente = self.agendador.tarefa(nome)
+            if existente and existente.proximo == envio:
+                continue
+            self.agendador.agendar(
+                nome,
+                RegraUnica(envio),
+                functools.partial(self.enviar_aviso_excel, aviso_id=aviso.aviso_id),
             )
 
-            for registro in registros:
-                self.task_enviar_aviso_excel_logger.debug(
-                    f"Processando registro: {registro}"
-                )
-                # Verificar se o aviso já foi enviado
-                enviado = registro.get("Enviado", "").strip().upper()
-                self.task_enviar_aviso_excel_logger.debug(
-                    f"Aviso ID {registro.get('ID')}: Enviado = {enviado}"
+    def agendar_gravacao_planilha(self, atraso: float = 5):
+        """
+        Agrupa as marcações de "Enviado": avisos que saem juntos são gravados
+        na planilha em uma única escrita, alguns segundos depois.
+        """
+        if self._gravacao_planilha and not self._gravacao_planilha.done():
+            return
+
+        async def gravar():
+            await relogio.atual().dormir(atraso)
+            try:
+                await self.gravar_enviados_na_planilha()
+            except Exception as update_exc:
+                # A sincronização tenta de novo no próximo ciclo
+                self.task_enviar_aviso_excel_logger.exception(
+                    f"Erro ao atualizar a planilha: {update_exc}"
                 )
 
-                if enviado != "TRUE":
-                    canal_id = registro.get("Canal_ID")
-                    mensagem = registro.get("Mensagem")
-                    data_envio_str = registro.get("Data")
-                    id_aviso = registro.get("ID")
+        self._gravacao_planilha = asyncio.ensure_future(gravar())
 
-                    # Validar campos essenciais
-                    if not (canal_id and mensagem and data_envio_str and id_aviso):
-                        self.task_enviar_aviso_excel_logger.warning(
-                            f"Aviso com ID {id_aviso} possui campos incompletos. Pulando."
-                        )
-                        continue
-
-                    # Converter string de data para objeto date
-                    try:
-                        data_envio = datetime.datetime.strptime(
-                            data_envio_str, "%Y-%m-%d"
-                        ).date()
-                    except ValueError as ve:
-                        self.task_enviar_aviso_excel_logger.error(
-                            f"Formato de data inválido para aviso ID {id_aviso}: {data_envio_str}. Pulando."
-                        )
-                        continue
+    # =====================================================
+    # Task: Sincronizar avisos do Google Sheets com o banco local
+    # =====================================================
+    async def sincronizar_avisos_task(self, instante: datetime.datetime):
+        try:
+            await self.gravar_enviados_na_planilha()
+            await self.sincronizar_avisos()
+        except Exception as e:
+            self.task_enviar_aviso_excel_logger.exception(
+                f"Erro na task sincronizar_avisos_task: {e}"
+            )
+        # Mesmo sem acesso ao Google, os avisos já espelhados seguem agendados
+        await self.agendar_avisos_do_dia(instante)
 
-                    hoje = datetime.datetime.now().date()
-                    self.task_enviar_aviso_excel_logger.debug(
-                        f"Aviso ID {id_aviso}: Data de envio = {data_envio} | Data atual = {hoje}"
-                    )
+    async def sincronizar_avisos(self):
+        """
+        Atualiza a tabela local de avisos a partir da planilha. Se o
+        modifiedTime não mudou, a leitura é pulada; se mudou, só as linhas
+        cujo hash é diferente do último snapshot são gravadas no banco.
+        """
+        # Todo acesso ao Sheets roda no pool de threads, reutilizando a conexão
+        modificacao = await self.sheets.ultima_modificacao()
+        if modificacao == self.modificacao_avisos:
+            self.task_enviar_aviso_excel_logger.info(
+                "Planilha de avisos sem alterações desde a última leitura. Leitura ignorada."
+            )
+            return
+
+        # A planilha mudou: relê o cabeçalho (uma coluna "Hora" pode ter surgido)
+        await self.sheets.mapa_colunas(recarregar=True)
+        # Ler apenas as colunas usadas, em janelas de tamanho fixo
+        # Snapshot novo montado à parte: só substitui o atual depois que o
+        # banco confirmar a gravação (se ela falhar, a próxima passada refaz)
+        hashes = {}
+        ids_lidos = set()
+        linhas_invalidas = set()
+        alterados = []  # (linha, aviso) gravados no banco em uma única transação
+        async for linha, registro in self.sheets.ler_registros():
+            assinatura = sheets.hash_registro(registro)
+            hashes[linha] = assinatura
+            if registro.get("ID"):
+                ids_lidos.add(str(registro["ID"]))  # mesma chave de interpretar_aviso
+            if self.hashes_avisos.get(linha) == assinatura:
+                continue
+
+            aviso = self.interpretar_aviso(registro)
+            if aviso:
+                alterados.append((linha, aviso))
+            else:
+                linhas_invalidas.add(linha)
+
+        # Linhas removidas da planilha saem do snapshot e do banco; avisos
+        # cujo ID sumiu (linhas de baixo sobem) também
+        linhas_removidas = set(self.hashes_avisos) - set(hashes)
+        await executar_db(
+            avisos.aplicar_sincronizacao,
+            alterados,
+            linhas_invalidas | linhas_removidas,
+            ids_lidos,
+        )
 
-                    # Verificar se a data de envio é hoje
-                    if data_envio == hoje:
-                        try:
-                            canal = self.bot.get_channel(int(canal_id))
-                            if canal:
-                                await canal.send(mensagem)
-                                self.task_enviar_aviso_excel_logger.info(
-                                    f"Mensagem enviada para o canal {canal_id}: {mensagem}"
-                                )
-                                print(
-                                    f"Mensagem enviada para o canal {canal_id}: {mensagem}"
-                                )
+        self.hashes_avisos = hashes
+        self.modificacao_avisos = modificacao
+        self.task_enviar_aviso_excel_logger.info(
+            f"Número de registros encontrados na planilha: {len(hashes)} "
+            f"({len(alterados) + len(linhas_invalidas)} alterado(s), reconexões ao Sheets: {self.sheets.reconexoes})."
+        )
 
-                                # Atualizar a flag 'Enviado' na planilha
-                                try:
-                                    cell = worksheet.find(str(id_aviso))
-                                    if cell:
-                                        # Assumindo que a coluna 'Enviado' é a 5ª coluna (E)
-                                        worksheet.update_cell(cell.row, 5, "TRUE")
-                                        self.task_enviar_aviso_excel_logger.info(
-                                            f"Aviso ID {id_aviso} marcado como enviado."
-                                        )
-                                    else:
-                                        self.task_enviar_aviso_excel_logger.error(
-                                            f"Aviso ID {id_aviso} não encontrado na planilha."
-                                        )
-                                except Exception as update_exc:
-                                    self.task_enviar_aviso_excel_logger.exception(
-                                        f"Erro ao atualizar a planilha para aviso ID {id_aviso}: {update_exc}"
-                                    )
-                            else:
-                                self.task_enviar_aviso_excel_logger.error(
-                                    f"Canal com ID {canal_id} não encontrado."
-                                )
-                                print(f"Canal com ID {canal_id} não encontrado.")
-                        except Exception as send_exc:
-                            self.task_enviar_aviso_excel_logger.exception(
-                                f"Erro ao enviar mensagem para o canal {canal_id}: {send_exc}"
-                            )
-        except Exception as e:
-            self.task_enviar_aviso_excel_logger.exception(
-                f"Erro na task enviar_aviso_excel: {e}"
+    def interpretar_aviso(self, registro):
+        """
+        Valida um registro da planilha. Retorna o aviso (dict) ou None se
+        estiver incompleto/inválido.
+        """
+        self.task_enviar_aviso_excel_logger.debug(f"Processando registro: {registro}")
+        enviado = str(registro.get("Enviado", "")).strip().upper()
+        self.task_enviar_aviso_excel_logger.debug(
+            f"Aviso ID {registro.get('ID')}: Enviado = {enviado}"
+        )
+
+        canal_id = registro.get("Canal_ID")
+        mensagem = registro.get("Mensagem")
+        data_envio_str = str(registro.get("Data", "")).strip()
+        hora_envio_str = str(registro.get("Hora", "")).strip()
+        id_aviso = registro.get("ID")
+
+        # Validar campos essenciais
+        if not (canal_id and mensagem and data_envio_str and id_aviso):
+            self.task_enviar_aviso_excel_logger.warning(
+                f"Aviso com ID {id_aviso} possui campos incompletos. Pulando."
             )
-            print(f"Erro na task enviar_aviso_excel: {e}")
+            return None
 
-    @enviar_aviso_excel.before_loop
-    async def before_enviar_aviso_excel(self):
-        await self.bot.wait_until_ready()
-        self.task_enviar_aviso_excel_logger.info("Tarefa enviar_aviso_excel iniciada.")
-        print("Tarefa enviar_aviso_excel iniciada.")
+        # "Data" aceita "AAAA-MM-DD" ou "AAAA-MM-DD HH:MM"; "Hora" é opcional
+        if " " in data_envio_str and not hora_envio_str:
+            data_envio_str, hora_envio_str = data_envio_str.split(None, 1)
+
+        # Converter strings de data/hora (fuso de config.TIMEZONE)
+        try:
+            data_envio = datetime.datetime.strptime(data_envio_str, "%Y-%m-%d").date()
+            hora_envio = interpretar_hora(hora_envio_str) if hora_envio_str else None
+            canal_id = int(canal_id)
+        except ValueError:
+            self.task_enviar_aviso_excel_logger.error(
+                f"Formato de data, hora ou canal inválido para aviso ID {id_aviso}: "
+                f"{data_envio_str} {hora_envio_str} / {canal_id}. Pulando."
+            )
+            return None
+
+        return {
+            "id": str(id_aviso),
+            "canal_id": canal_id,
+            "mensagem": mensagem,
+            "data": data_envio,
+            "hora": hora_envio,
+            "enviado": enviado == "TRUE",
+        }
+
+    async def gravar_enviados_na_planilha(self):
+        """Grava o "Enviado" de todos os avisos pendentes em uma única escrita."""
+        aguardando = await executar_db(avisos.aguardando_planilha)
+        if not aguardando:
+            return
+        # A linha gravada pode estar velha (linhas apagadas acima dela): só
+        # marca onde o ID ainda confere; as demais esperam a próxima leitura
+        ids_atuais = await self.sheets.valores_nas_linhas(
+            [aviso.linha for aviso in aguardando], await self.sheets.coluna("ID")
+        )
+        conferidos = [
+            aviso for aviso in aguardando if str(ids_atuais.get(aviso.linha)) == aviso.aviso_id
+        ]
+        if len(conferidos) < len(aguardando):
+            self.modificacao_avisos = None  # força a releitura completa
+            self.task_enviar_aviso_excel_logger.warning(
+                f"{len(aguardando) - len(conferidos)} aviso(s) mudaram de linha na planilha; "
+                "marcação adiada até a próxima sincronização."
+            )
+        if not conferidos:
+            return
+        coluna_enviado = await self.sheets.coluna("Enviado")
+        await self.sheets.atualizar_celulas(
+            [aviso.linha for aviso in conferidos], coluna_enviado, "TRUE"
+        )
+        await executar_db(
+            avisos.marcar_planilha_atualizada, [aviso.aviso_id for aviso in conferidos]
+        )
+        self.task_enviar_aviso_excel_logger.info(
+            f"{len(conferidos)} aviso(s) marcado(s) como enviado(s) na planilha."
+        )
 
     # =====================================================
     # Task: CAHAMADA (Enviar mensagem a cada 10 dias)
     # =====================================================
-    @tasks.loop(hours=24)  # Executa a task diariamente
-    async def cahamada_task(self):
+    # Disparada pelo agendador uma vez por dia; o envio em si fica na tabela
+    # envios_agendados, que sobrevive a reinícios
+    async def cahamada_task(self, instante: datetime.datetime):
         try:
-            now = self.get_now()
+            now = instante
             today = now.date()
 
+            pendentes = await executar_db(envios_agendados.envios_pendentes, "cahamada_task")
+            if pendentes:
+                self.task_cahamada_logger.info(
+                    f"Mensagem CAHAMADA já agendada para "
+                    f"{envios_agendados.instante_execucao(pendentes[0]).strftime('%Y-%m-%d %H:%M:%S')}."
+                )
+                return
+
             # Recuperar a última data de envio do banco de dados
-            setting = (
-                session.query(Settings).filter_by(key="last_cahamada_sent").first()
-            )
-            last_sent_date = (
-                datetime.datetime.strptime(setting.value, "%Y-%m-%d").date()
-                if setting
-                else None
+            last_sent_date = await self.settings.obter(
+                "last_cahamada_sent", datetime.date.fromisoformat
             )
 
-            if setting:
+            if last_sent_date:
                 days_since_last = (today - last_sent_date).days
             else:
                 days_since_last = 10  # Força o envio na primeira execução
@@ -1248,63 +1255,38 @@ class TasksCog(commands.Cog):
                 if send_time < now:
                     send_time += datetime.timedelta(days=1)
 
-                delay = (send_time - now).total_seconds()
-
+                # Persistido: o envio acontece mesmo se o bot reiniciar até lá
+                await self.agendar_envio(
+                    f"cahamada_task:{send_time.date().isoformat()}",
+                    "cahamada_task",
+                    CANAL_DOIS_ID,
+                    message,
+                    send_time,
+                    prioridade=PRIORIDADE_BAIXA,
+                )
                 self.task_cahamada_logger.info(
                     f"Mensagem CAHAMADA agendada para {send_time.strftime('%Y-%m-%d %H:%M:%S')}."
                 )
-
-                # Esperar até o tempo de envio
-                await asyncio.sleep(delay)
-
-                # Enviar a mensagem
-                channel = self.bot.get_channel(CANAL_DOIS_ID)
-
-                if channel:
-                    try:
-                        await channel.send(message)
-                        self.task_cahamada_logger.info(
-                            f"Mensagem CAHAMADA enviada no canal {CANAL_DOIS_ID} às {send_time.strftime('%H:%M:%S')}."
-                        )
-                        print(
-                            f"[{send_time.strftime('%Y-%m-%d %H:%M:%S')}] Mensagem CAHAMADA enviada no canal {CANAL_DOIS_ID}."
-                        )
-
-                        # Atualizar a última data de envio no banco de dados
-                        if setting:
-                            setting.value = today.strftime("%Y-%m-%d")
-                        else:
-                            new_setting = Settings(
-                                key="last_cahamada_sent",
-                                value=today.strftime("%Y-%m-%d"),
-                            )
-                            session.add(new_setting)
-                        session.commit()
-                    except Exception as e:
-                        self.task_cahamada_logger.exception(
-                            f"Erro ao enviar mensagem CAHAMADA: {e}"
-                        )
-                else:
-                    self.task_cahamada_logger.error(
-                        f"Canal com ID {CANAL_DOIS_ID} não encontrado."
-                    )
-                    print(f"Canal com ID {CANAL_DOIS_ID} não encontrado.")
             else:
                 self.task_cahamada_logger.info(
                     f"Ainda faltam {required_days - days_since_last} dias para a próxima mensagem CAHAMADA."
                 )
-                print(
+                console.info(
                     f"Ainda faltam {required_days - days_since_last} dias para a próxima mensagem CAHAMADA."
                 )
         except Exception as e:
             self.task_cahamada_logger.exception(f"Erro na task cahamada_task: {e}")
 
-    @cahamada_task.before_loop
-    async def before_cahamada_task(self):
-        await self.bot.wait_until_ready()
-        self.task_cahamada_logger.info("Tarefa CAHAMADA iniciada.")
-        print("Tarefa CAHAMADA iniciada.")
+    async def cahamada_enviada(self, envio, instante: datetime.datetime):
+        self.task_cahamada_logger.info(
+            f"Mensagem CAHAMADA enviada no canal {envio.canal_id} às {instante.strftime('%H:%M:%S')}."
+        )
+        console.info(
+            f"[{instante.strftime('%Y-%m-%d %H:%M:%S')}] Mensagem CAHAMADA enviada no canal {envio.canal_id}."
+        )
+        # Atualizar a última data de envio no banco de dados
+        await self.settings.salvar("last_cahamada_sent", instante.date())
 
     # Método auxiliar para obter o tempo atual com fuso horário
     def get_now(self):
-        return datetime.datetime.now(TIMEZONE)
+        return get_now()
@@ -30,6 +30,11 @@ CHANNEL_IDS = [
 
 REALOCACAO_CANAL = 123456789012345678  # ID do canal de realocação de ticket
 
+# Feriados além dos nacionais (locais, recessos); usados nas regras de dias úteis
+FERIADOS = [
+    # datetime.date(2026, 1, 25),
+]
+
 
 # Mensagens e Configurações
 SEMANAL_MESSAGES = [
@@ -1,15 +1,177 @@
 # database.py
 
-from sqlalchemy import create_engine
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from models import Base
+
+import metrics
+from config import TIMEZONE
+from models import Base, Settings
 
 # Criação do engine para conectar ao SQLite (banco de dados local)
-engine = create_engine("sqlite:///bot_database.db", echo=False)
+engine = create_engine(
+    "sqlite:///bot_database.db",
+    echo=False,
+    connect_args={"check_same_thread": False},
+)
+
+
+@event.listens_for(engine, "connect")
+def _configurar_sqlite(conexao, _registro):
+    # WAL: leituras não esperam escritas e o fsync sai do caminho de cada commit
+    cursor = conexao.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 
 # Criação das tabelas no banco de dados
 Base.metadata.create_all(engine)
 
-# Criação de uma sessão para interagir com o banco de dados
-Session = sessionmaker(bind=engine)
-session = Session()
+# Fábrica de sessões: cada unidade de trabalho usa a sua (ver session_scope)
+Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+# Colunas DateTime guardam UTC sem fuso; a conversão fica só aqui
+def para_utc(instante: datetime.datetime) -> datetime.datetime:
+    """Instante com fuso -> UTC ingênuo (como gravado no banco)."""
+    return instante.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def do_utc(valor: datetime.datetime) -> datetime.datetime:
+    """UTC ingênuo lido do banco -> instante no fuso configurado."""
+    return valor.replace(tzinfo=datetime.timezone.utc).astimezone(TIMEZONE)
+
+
+# Todo acesso ao banco roda nesta thread, fora do event loop do discord.py
+_executor_db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+
+@contextmanager
+def session_scope():
+    """Sessão de uma unidade de trabalho: commit no fim, rollback em erro."""
+    session = Session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+async def executar_db(func, *args, **kwargs):
+    """
+    Executa `func(session, *args, **kwargs)` na thread do banco, em uma
+    sessão própria, e retorna o resultado. Os objetos retornados ficam
+    desanexados da sessão (somente leitura).
+    """
+
+    def unidade_de_trabalho():
+        # Cronometrado na thread do banco: não inclui a espera na fila
+        with metrics.DB_SEGUNDOS.cronometrar(query=getattr(func, "__name__", "outro")):
+            with session_scope() as session:
+                return func(session, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor_db, unidade_de_trabalho)
+
+
+def obter_setting(session, key: str):
+    """Valor (string) da chave em Settings, ou None."""
+    setting = session.query(Settings).filter_by(key=key).first()
+    return setting.value if setting else None
+
+
+def salvar_setting(session, key: str, value: str):
+    setting = session.query(Settings).filter_by(key=key).first()
+    if setting:
+        setting.value = value
+    else:
+        session.add(Settings(key=key, value=value))
+
+
+def _todas_settings(session):
+    return {setting.key: setting.value for setting in session.query(Settings).all()}
+
+
+class CacheSettings:
+    """
+    Cache em memória da tabela Settings. Carregada uma vez, servida da
+    memória (inclusive chaves ausentes) e gravada no SQLite a cada alteração
+    (write-through). `invalidar` força a próxima leitura a ir ao banco.
+    """
+
+    def __init__(self):
+        self._valores = {}  # key -> valor bruto (string) ou None se ausente
+        self._invalidadas = set()  # chaves que precisam ser relidas do banco
+        self._convertidos = {}  # (key, conversor) -> valor já convertido
+        self._carregado = False
+        self.hits = 0
+        self.misses = 0
+
+    async def carregar(self):
+        """Lê todas as chaves de uma vez (chamado na inicialização)."""
+        self._valores = await executar_db(_todas_settings)
+        self._convertidos.clear()
+        self._invalidadas.clear()
+        self._carregado = True
+
+    async def obter(self, key: str, conversor=str, padrao=None):
+        """
+        Valor da chave convertido por `conversor` (ex.: int,
+        datetime.date.fromisoformat), ou `padrao` se não existir.
+        """
+        if not self._carregado:
+            self.misses += 1
+            metrics.CACHE_SETTINGS.inc(result="miss")
+            await self.carregar()
+        elif key in self._invalidadas:
+            # Chave invalidada: volta ao banco só para ela
+            self.misses += 1
+            metrics.CACHE_SETTINGS.inc(result="miss")
+            self._valores[key] = await executar_db(obter_setting, key)
+            self._invalidadas.discard(key)
+        else:
+            self.hits += 1
+            metrics.CACHE_SETTINGS.inc(result="hit")
+
+        bruto = self._valores.get(key)
+        if bruto is None:
+            return padrao
+        chave = (key, conversor)
+        if chave not in self._convertidos:
+            self._convertidos[chave] = conversor(bruto)
+        return self._convertidos[chave]
+
+    async def salvar(self, key: str, valor):
+        """Grava no SQLite e atualiza a memória (datas em ISO, demais via str)."""
+        bruto = valor.isoformat() if hasattr(valor, "isoformat") else str(valor)
+        await executar_db(salvar_setting, key, bruto)
+        self._valores[key] = bruto
+        self._invalidadas.discard(key)
+        self._descartar_convertidos(key)
+
+    def invalidar(self, key: str = None):
+        """Descarta uma chave (ou todo o cache) da memória."""
+        if key is None:
+            self._valores.clear()
+            self._convertidos.clear()
+            self._invalidadas.clear()
+            self._carregado = False
+            return
+        self._valores.pop(key, None)
+        self._invalidadas.add(key)
+        self._descartar_convertidos(key)
+
+    def _descartar_convertidos(self, key: str):
+        for chave in [chave for chave in self._convertidos if chave[0] == key]:
+            del self._convertidos[chave]
+
+    def estatisticas(self):
+        return {"hits": self.hits, "misses": self.misses, "chaves": len(self._valores)}
@@ -0,0 +1,36 @@
+# disparos.py
+
+import datetime
+
+from database import do_utc, executar_db, para_utc
+from models import UltimoDisparo
+
+# Último disparo de cada regra do agendador (tabela "ultimos_disparos"),
+# usado para recuperar disparos perdidos enquanto o bot esteve fora do ar.
+
+
+def ultimos_disparos(session):
+    """{regra: último disparo no fuso configurado}, lido em uma única consulta."""
+    return {
+        registro.regra: do_utc(registro.instante)
+        for registro in session.query(UltimoDisparo).all()
+    }
+
+
+def registrar_disparo(session, regra: str, instante: datetime.datetime):
+    utc = para_utc(instante)
+    registro = session.query(UltimoDisparo).filter_by(regra=regra).first()
+    if registro is None:
+        session.add(UltimoDisparo(regra=regra, instante=utc))
+    elif utc > registro.instante:
+        registro.instante = utc
+
+
+class RegistroDisparos:
+    """Registro de disparos do Agendador gravado no SQLite."""
+
+    async def carregar(self):
+        return await executar_db(ultimos_disparos)
+
+    async def registrar(self, regra: str, instante: datetime.datetime):
+        await executar_db(registrar_disparo, regra, instante)
@@ -0,0 +1,260 @@
+# dispatcher.py
+
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+
+import discord
+
+import metrics
+import relogio
+
+# Prioridades de envio (menor = sai primeiro)
+PRIORIDADE_ALTA = 0  # alertas com horário (ponto, realocação, avisos da planilha)
+PRIORIDADE_NORMAL = 1  # mensagens periódicas (semanal, quinzenal, Oracle)
+PRIORIDADE_BAIXA = 2  # mensagens de descontração (CAHAMADA, teste de 15 min)
+
+# Limites do Discord: ~50 requisições/s no total e 5 mensagens a cada 5 s por canal
+LIMITE_GLOBAL = (50, 1.0)
+LIMITE_POR_CANAL = (5, 5.0)
+MAX_ENVIOS_SIMULTANEOS = 5
+# Transmissões para vários canais: envios pendentes ao mesmo tempo e retentativas em 429
+MAX_TRANSMISSAO_SIMULTANEA = 20
+MAX_RETENTATIVAS_429 = 3
+
+
+class CanalNaoEncontrado(LookupError):
+    pass
+
+
+def tempo_retry_after(erro: Exception):
+    """Segundos pedidos pelo Discord em um 429, ou None se não for rate limit."""
+    if isinstance(erro, discord.RateLimited):
+        return erro.retry_after
+    if isinstance(erro, discord.HTTPException) and erro.status == 429:
+        cabecalho = getattr(erro.response, "headers", {}).get("Retry-After")
+        try:
+            return float(cabecalho)
+        except (TypeError, ValueError):
+            return 1.0
+    return None
+
+
+class BaldeDeTokens:
+    """Token bucket simples: `capacidade` tokens repostos a cada `periodo` segundos."""
+
+    def __init__(self, capacidade: int, periodo: float):
+        self.capacidade = capacidade
+        self.taxa = capacidade / periodo
+        self.tokens = float(capacidade)
+        self.atualizado = relogio.atual().monotonic()
+
+    def _repor(self):
+        agora = relogio.atual().monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def espera(self) -> float:
+        """Segundos até haver um token disponível (0 se já houver)."""
+        self._repor()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.taxa
+
+    def consumir(self):
+        self._repor()
+        self.tokens -= 1
+
+
+class Envio:
+    def __init__(self, canal, conteudo, prioridade: int, kwargs, origem: str = ""):
+        self.canal = canal
+        self.conteudo = conteudo
+        self.prioridade = prioridade
+        self.kwargs = kwargs
+        self.origem = origem
+        self.enfileirado = relogio.atual().monotonic()
+        self.futuro = asyncio.get_running_loop().create_future()
+
+
+class ResultadoTransmissao:
+    """Resultado de uma transmissão: mensagens por canal, falhas e tempo total."""
+
+    def __init__(self):
+        self.sucessos = {}  # canal_id -> mensagem enviada
+        self.falhas = {}  # canal_id -> exceção
+        self.retentativas = 0
+        self.duracao = 0.0
+
+    def __repr__(self):
+        return (
+            f"<ResultadoTransmissao(sucessos={len(self.sucessos)}, "
+            f"falhas={len(self.falhas)}, duracao={self.duracao:.2f}s)>"
+        )
+
+
+class Despachante:
+    """
+    Fila central de saída de mensagens. Cada canal tem sua fila FIFO (a ordem
+    por canal é preservada); entre canais, o próximo envio é escolhido pela
+    prioridade da mensagem na frente da fila. A vazão respeita um token
+    bucket global e um por canal, com no máximo `concorrencia` envios em voo.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger = None,
+        concorrencia: int = MAX_ENVIOS_SIMULTANEOS,
+        limite_global=LIMITE_GLOBAL,
+        limite_por_canal=LIMITE_POR_CANAL,
+    ):
+        self.logger = logger or logging.getLogger("discord_bot.dispatcher")
+        self.concorrencia = concorrencia
+        self.limite_por_canal = limite_por_canal
+        self._balde_global = BaldeDeTokens(*limite_global)
+        self._baldes = {}  # canal_id -> BaldeDeTokens
+        self._filas = {}  # canal_id -> deque[Envio]
+        self._prontos = []  # heap (prioridade, seq, canal_id) de canais livres com envios
+        self._seq = itertools.count()
+        self._ocupados = set()  # canais com envio em andamento
+        self._sinal = None
+        self._workers = []
+
+    def iniciar(self):
+        if not self._workers:
+            self._sinal = asyncio.Event()
+            self._workers = [
+                asyncio.ensure_future(self._worker()) for _ in range(self.concorrencia)
+            ]
+
+    def parar(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def pendentes(self) -> int:
+        return sum(len(fila) for fila in self._filas.values())
+
+    async def enviar(
+        self,
+        canal,
+        conteudo=None,
+        prioridade: int = PRIORIDADE_NORMAL,
+        origem: str = "",
+        **kwargs,
+    ):
+        """
+        Enfileira `canal.send(conteudo, **kwargs)` e aguarda o envio.
+        Retorna a mensagem enviada ou propaga a exceção do envio.
+        `origem` (nome da task) identifica o envio nas métricas.
+        """
+        envio = Envio(canal, conteudo, prioridade, kwargs, origem)
+        fila = self._filas.setdefault(canal.id, collections.deque())
+        fila.append(envio)
+        if len(fila) == 1 and canal.id not in self._ocupados:
+            self._marcar_pronto(canal.id)
+        return await envio.futuro
+
+    async def transmitir(
+        self,
+        canais_ids,
+        conteudo=None,
+        obter_canal=None,
+        prioridade: int = PRIORIDADE_NORMAL,
+        limite: int = MAX_TRANSMISSAO_SIMULTANEA,
+        origem: str = "",
+        **kwargs,
+    ) -> ResultadoTransmissao:
+        """
+        Envia o mesmo conteúdo para vários canais ao mesmo tempo (no máximo
+        `limite` pendentes), respeitando o Retry-After de respostas 429.
+        `obter_canal` converte ID em canal (ex.: bot.get_channel).
+        """
+        resultado = ResultadoTransmissao()
+        semaforo = asyncio.Semaphore(limite)
+        inicio = relogio.atual().monotonic()
+
+        async def enviar_para(canal_id):
+            async with semaforo:
+                canal = obter_canal(canal_id) if obter_canal else canal_id
+                if canal is None:
+                    resultado.falhas[canal_id] = CanalNaoEncontrado(
+                        f"Canal com ID {canal_id} não encontrado."
+                    )
+                    return
+                for tentativa in range(MAX_RETENTATIVAS_429 + 1):
+                    try:
+                        resultado.sucessos[canal_id] = await self.enviar(
+                            canal, conteudo, prioridade=prioridade, origem=origem, **kwargs
+                        )
+                        return
+                    except Exception as e:
+                        espera = tempo_retry_after(e)
+                        if espera is None or tentativa == MAX_RETENTATIVAS_429:
+                            resultado.falhas[canal_id] = e
+                            return
+                        resultado.retentativas += 1
+                        metrics.RETENTATIVAS_429.inc(task=origem)
+                        self.logger.warning(
+                            f"Rate limit no canal {canal_id}; nova tentativa em {espera:.2f}s."
+                        )
+                        await relogio.atual().dormir(espera)
+
+        await asyncio.gather(*(enviar_para(canal_id) for canal_id in canais_ids))
+        resultado.duracao = relogio.atual().monotonic() - inicio
+        return resultado
+
+    def _marcar_pronto(self, canal_id):
+        fila = self._filas[canal_id]
+        heapq.heappush(self._prontos, (fila[0].prioridade, next(self._seq), canal_id))
+        if self._sinal is not None:
+            self._sinal.set()
+
+    async def _proximo_canal(self):
+        while not self._prontos:
+            self._sinal.clear()
+            await self._sinal.wait()
+        _, _, canal_id = heapq.heappop(self._prontos)
+        self._ocupados.add(canal_id)
+        return canal_id
+
+    async def _aguardar_tokens(self, canal_id):
+        balde = self._baldes.get(canal_id)
+        if balde is None:
+            balde = self._baldes[canal_id] = BaldeDeTokens(*self.limite_por_canal)
+        while True:
+            espera = max(self._balde_global.espera(), balde.espera())
+            if espera <= 0:
+                break
+            await relogio.atual().dormir(espera)
+        self._balde_global.consumir()
+        balde.consumir()
+
+    async def _worker(self):
+        while True:
+            canal_id = await self._proximo_canal()
+            fila = self._filas[canal_id]
+            try:
+                await self._aguardar_tokens(canal_id)
+                envio = fila.popleft()
+                try:
+                    mensagem = await envio.canal.send(envio.conteudo, **envio.kwargs)
+                except Exception as e:
+                    metrics.ENVIO_FALHAS.inc(task=envio.origem)
+                    self.logger.warning(f"Falha ao enviar mensagem no canal {canal_id}: {e}")
+                    if not envio.futuro.done():
+                        envio.futuro.set_exception(e)
+                else:
+                    metrics.ENVIO_SEGUNDOS.observar(
+                        relogio.atual().monotonic() - envio.enfileirado, task=envio.origem
+                    )
+                    if not envio.futuro.done():
+                        envio.futuro.set_result(mensagem)
+            finally:
+                self._ocupados.discard(canal_id)
+                if fila:
+                    self._marcar_pronto(canal_id)
+                else:
+                    self._filas.pop(canal_id, None)
@@ -0,0 +1,88 @@
+# envios_agendados.py
+
+import datetime
+
+from database import do_utc, para_utc
+from models import EnvioAgendado
+
+# Funções de acesso à tabela "envios_agendados": envios atrasados/avulsos
+# que precisam sobreviver a reinícios. O agendador guarda só o timer; o
+# conteúdo e o estado ficam aqui.
+
+PENDENTE = "pendente"
+ENVIADO = "enviado"
+FALHOU = "falhou"
+
+MAX_TENTATIVAS = 3
+ESPERA_RETENTATIVA = datetime.timedelta(minutes=5)
+
+
+def instante_execucao(envio: EnvioAgendado) -> datetime.datetime:
+    """Horário do envio no fuso configurado."""
+    return do_utc(envio.executar_em)
+
+
+def criar_envio(
+    session,
+    chave: str,
+    origem: str,
+    canal_id: int,
+    mensagem: str,
+    instante: datetime.datetime,
+    prioridade: int = 1,
+):
+    """
+    Registra um envio para `instante`. Se a chave já existir, devolve o
+    envio existente sem alterá-lo (agendar de novo não duplica).
+    """
+    envio = session.query(EnvioAgendado).filter_by(chave=chave).first()
+    if envio is None:
+        envio = EnvioAgendado(
+            chave=chave,
+            origem=origem,
+            canal_id=canal_id,
+            mensagem=mensagem,
+            prioridade=prioridade,
+            executar_em=para_utc(instante),
+            status=PENDENTE,
+            tentativas=0,
+        )
+        session.add(envio)
+        session.flush()
+    return envio
+
+
+def envios_pendentes(session, origem: str = None):
+    """Envios ainda não executados, do mais próximo ao mais distante (índice status/executar_em)."""
+    consulta = session.query(EnvioAgendado).filter(EnvioAgendado.status == PENDENTE)
+    if origem is not None:
+        consulta = consulta.filter(EnvioAgendado.origem == origem)
+    return consulta.order_by(EnvioAgendado.executar_em).all()
+
+
+def buscar_envio(session, envio_id: int):
+    return session.get(EnvioAgendado, envio_id)
+
+
+def concluir_envio(session, envio_id: int):
+    envio = buscar_envio(session, envio_id)
+    if envio:
+        envio.status = ENVIADO
+        envio.tentativas += 1
+    return envio
+
+
+def registrar_falha(session, envio_id: int, agora: datetime.datetime):
+    """
+    Conta uma tentativa falha. Devolve o envio com o novo horário (daqui a
+    ESPERA_RETENTATIVA) ou marcado como FALHOU após MAX_TENTATIVAS.
+    """
+    envio = buscar_envio(session, envio_id)
+    if envio is None:
+        return None
+    envio.tentativas += 1
+    if envio.tentativas >= MAX_TENTATIVAS:
+        envio.status = FALHOU
+    else:
+        envio.executar_em = para_utc(agora + ESPERA_RETENTATIVA)
+    return envio
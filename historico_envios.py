@@ -0,0 +1,162 @@
+# historico_envios.py
+
+import datetime
+
+from sqlalchemy.dialects.sqlite import insert
+
+from database import executar_db, para_utc
+from models import EnvioRealizado, Settings
+
+# Histórico de envios (tabela "historico_envios"): um registro por
+# (regra, período, canal), com o ID da mensagem no Discord. As chaves
+# recentes ficam em memória, então conferir se um envio já saiu não vai ao
+# banco; uma reconexão ou reinício no mesmo período não envia de novo.
+
+# Quanto do histórico fica em memória (e no banco): cobre o maior período usado (mês)
+RETENCAO = datetime.timedelta(days=62)
+
+
+def periodo_semana(instante: datetime.datetime) -> str:
+    ano, semana, _ = instante.isocalendar()
+    return f"{ano}-W{semana:02d}"
+
+
+def periodo_mes(instante: datetime.datetime) -> str:
+    return instante.strftime("%Y-%m")
+
+
+def periodo_dia(instante: datetime.datetime) -> str:
+    return instante.date().isoformat()
+
+
+def periodo_disparo(instante: datetime.datetime) -> str:
+    """Um período por disparo (regras com vários horários no dia)."""
+    return instante.strftime("%Y-%m-%dT%H:%M")
+
+
+def chaves_recentes(session, desde: datetime.datetime):
+    """Apaga o que passou da retenção e devolve as chaves restantes, em uma leitura."""
+    session.query(EnvioRealizado).filter(EnvioRealizado.enviado_em < para_utc(desde)).delete(
+        synchronize_session=False
+    )
+    return {
+        (regra, periodo, canal_id)
+        for regra, periodo, canal_id in session.query(
+            EnvioRealizado.regra, EnvioRealizado.periodo, EnvioRealizado.canal_id
+        )
+    }
+
+
+def registrar_envio(
+    session,
+    regra: str,
+    periodo: str,
+    canal_id: int,
+    mensagem_id,
+    instante: datetime.datetime,
+) -> bool:
+    """Grava o envio. Retorna False se a chave já existia (envio duplicado)."""
+    resultado = session.execute(
+        insert(EnvioRealizado)
+        .values(
+            regra=regra,
+            periodo=periodo,
+            canal_id=canal_id,
+            mensagem_id=mensagem_id,
+            enviado_em=para_utc(instante),
+        )
+        .on_conflict_do_nothing(index_elements=["regra", "periodo", "canal_id"])
+    )
+    return resultado.rowcount == 1
+
+
+def importar_setting(
+    session,
+    chave_setting: str,
+    valor_atual,
+    regra: str,
+    periodo: str,
+    canal_id: int,
+    instante: datetime.datetime,
+) -> bool:
+    """
+    Migração das Settings que marcavam o último período enviado (ex.:
+    "last_week_sent"): se a Setting aponta para o período atual, grava a
+    chave no histórico. A Setting é apagada em seguida (migra uma vez só).
+    Retorna se a chave foi importada.
+    """
+    setting = session.query(Settings).filter_by(key=chave_setting).first()
+    if setting is None:
+        return False
+    importada = setting.value == str(valor_atual)
+    if importada:
+        registrar_envio(session, regra, periodo, canal_id, None, instante)
+    session.delete(setting)
+    return importada
+
+
+class HistoricoEnvios:
+    """
+    Cópia em memória das chaves do histórico. `reservar` marca a chave antes
+    do envio (duas execuções simultâneas não enviam as duas); `confirmar`
+    grava no banco com o ID da mensagem; `desfazer` libera a chave se o
+    envio falhou.
+    """
+
+    def __init__(self):
+        self._chaves = set()
+        self._em_envio = set()  # reservadas e ainda não confirmadas
+
+    async def carregar(self, agora: datetime.datetime):
+        # Reservas em andamento continuam valendo (o envio ainda pode sair)
+        self._chaves = await executar_db(chaves_recentes, agora - RETENCAO) | self._em_envio
+
+    async def importar_setting(
+        self, chave_setting, valor_atual, regra, periodo, canal_id, instante
+    ) -> bool:
+        """Ver `importar_setting` (função): grava no banco e na memória."""
+        importada = await executar_db(
+            importar_setting, chave_setting, valor_atual, regra, periodo, canal_id, instante
+        )
+        if importada:
+            self._chaves.add((regra, periodo, canal_id))
+        return importada
+
+    def ja_enviado(self, regra: str, periodo: str, canal_id: int) -> bool:
+        return (regra, periodo, canal_id) in self._chaves
+
+    def em_envio(self, regra: str, periodo: str, canal_id: int) -> bool:
+        """Reservada e ainda não confirmada (o envio pode falhar e ser desfeito)."""
+        return (regra, periodo, canal_id) in self._em_envio
+
+    def reservar(self, regra: str, periodo: str, canal_id: int) -> bool:
+        """Marca a chave. False se o envio já saiu (ou está saindo) neste período."""
+        chave = (regra, periodo, canal_id)
+        if chave in self._chaves:
+            return False
+        self._chaves.add(chave)
+        self._em_envio.add(chave)
+        return True
+
+    def desfazer(self, regra: str, periodo: str, canal_id: int):
+        chave = (regra, periodo, canal_id)
+        self._chaves.discard(chave)
+        self._em_envio.discard(chave)
+
+    async def confirmar(
+        self, regra: str, periodo: str, canal_id: int, mensagem, instante: datetime.datetime
+    ):
+        # A mensagem já saiu: mesmo se a gravação falhar, a chave fica na
+        # memória (não reenvia neste processo)
+        self._em_envio.discard((regra, periodo, canal_id))
+        await executar_db(
+            registrar_envio,
+            regra,
+            periodo,
+            canal_id,
+            getattr(mensagem, "id", None),
+            instante,
+        )
+
+    def __len__(self):
+        return len(self._chaves)
@@ -0,0 +1,177 @@
+# lideranca.py
+
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy.dialects.sqlite import insert
+
+import metrics
+import relogio
+from database import executar_db, para_utc
+from models import Lideranca
+
+# Eleição de líder entre instâncias do bot por concessão com prazo (lease).
+# Só a líder executa os disparos do agendador; as demais acompanham a fila
+# e assumem quando a concessão expira (queda) ou é liberada (parada normal).
+
+# Validade da concessão e intervalo de renovação/tentativa
+DURACAO = datetime.timedelta(seconds=15)
+RENOVACAO = 5.0
+# A líder deixa de se considerar líder um pouco antes de a concessão expirar
+MARGEM = 2.0
+
+
+def adquirir_lideranca(
+    session, nome: str, dono: str, agora: datetime.datetime, expira_em: datetime.datetime
+) -> bool:
+    """
+    Cria ou renova a concessão `nome` para `dono`. Só toma a concessão de
+    outra instância se ela já expirou. Cada passo é um único comando SQL,
+    então duas instâncias nunca ganham ao mesmo tempo.
+    """
+    agora, expira_em = para_utc(agora), para_utc(expira_em)
+    criada = session.execute(
+        insert(Lideranca)
+        .values(nome=nome, dono=dono, expira_em=expira_em)
+        .on_conflict_do_nothing(index_elements=["nome"])
+    )
+    if criada.rowcount:
+        return True
+    atualizadas = (
+        session.query(Lideranca)
+        .filter(
+            Lideranca.nome == nome,
+            (Lideranca.dono == dono) | (Lideranca.expira_em < agora),
+        )
+        .update({Lideranca.dono: dono, Lideranca.expira_em: expira_em}, synchronize_session=False)
+    )
+    return atualizadas == 1
+
+
+def liberar_lideranca(session, nome: str, dono: str):
+    """Expira a concessão agora, se ainda for de `dono` (parada normal)."""
+    session.query(Lideranca).filter_by(nome=nome, dono=dono).update(
+        {Lideranca.expira_em: datetime.datetime(1970, 1, 1)}, synchronize_session=False
+    )
+
+
+class BackendSQLite:
+    """Concessões na tabela "liderancas" do banco compartilhado."""
+
+    async def adquirir(self, nome, dono, agora, expira_em) -> bool:
+        return await executar_db(adquirir_lideranca, nome, dono, agora, expira_em)
+
+    async def liberar(self, nome, dono):
+        await executar_db(liberar_lideranca, nome, dono)
+
+
+class BackendLocal:
+    """
+    Concessões em memória, com a mesma semântica do SQLite. Compartilhado
+    entre várias Eleicao no mesmo processo (replay, testes manuais).
+    """
+
+    def __init__(self):
+        self._concessoes = {}  # nome -> (dono, expira_em)
+
+    async def adquirir(self, nome, dono, agora, expira_em) -> bool:
+        atual = self._concessoes.get(nome)
+        if atual is None or atual[0] == dono or atual[1] < agora:
+            self._concessoes[nome] = (dono, expira_em)
+            return True
+        return False
+
+    async def liberar(self, nome, dono):
+        atual = self._concessoes.get(nome)
+        if atual is not None and atual[0] == dono:
+            del self._concessoes[nome]
+
+
+def identificador_instancia() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Eleicao:
+    """
+    Disputa a concessão `nome` a cada RENOVACAO segundos. `sou_lider()` é
+    só uma consulta em memória: vale até DURACAO - MARGEM após a última
+    renovação bem-sucedida, então uma líder sem acesso ao banco se rebaixa
+    antes de outra instância poder assumir.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        backend,
+        logger: logging.Logger = None,
+        dono: str = None,
+        duracao: datetime.timedelta = DURACAO,
+        renovacao: float = RENOVACAO,
+    ):
+        self.nome = nome
+        self.backend = backend
+        self.logger = logger or logging.getLogger("discord_bot.lideranca")
+        self.dono = dono or identificador_instancia()
+        self.duracao = duracao
+        self.renovacao = renovacao
+        self._lider_ate = None  # relógio monotônico
+        self._ao_assumir = None
+        self._task = None
+
+    def sou_lider(self) -> bool:
+        return self._lider_ate is not None and relogio.atual().monotonic() < self._lider_ate
+
+    def iniciar(self, ao_assumir=None):
+        """`ao_assumir`: corrotina executada sempre que esta instância vira líder."""
+        self._ao_assumir = ao_assumir
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._executar())
+        return self._task
+
+    def parar(self):
+        """Para de disputar e libera a concessão para a próxima instância assumir já."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._lider_ate is not None:
+            self._lider_ate = None
+            liberacao = asyncio.ensure_future(self.backend.liberar(self.nome, self.dono))
+            liberacao.add_done_callback(lambda futuro: futuro.exception())
+
+    async def _executar(self):
+        while True:
+            await self.tentar()
+            await relogio.atual().dormir(self.renovacao)
+
+    async def tentar(self):
+        """Uma rodada: renova (líder) ou tenta assumir (demais)."""
+        inicio = relogio.atual().monotonic()
+        agora = relogio.atual().agora()
+        try:
+            concedida = await self.backend.adquirir(
+                self.nome, self.dono, agora, agora + self.duracao
+            )
+        except Exception as e:
+            # Sem resposta: a liderança atual vale só até o prazo já conhecido
+            self.logger.exception(f"Erro ao renovar a concessão '{self.nome}': {e}")
+            return
+
+        era_lider = self.sou_lider()
+        if concedida:
+            self._lider_ate = inicio + self.duracao.total_seconds() - MARGEM
+            if not era_lider:
+                metrics.LIDERANCA_ASSUMIDA.inc()
+                self.logger.warning(f"Instância {self.dono} assumiu a liderança de '{self.nome}'.")
+                if self._ao_assumir is not None:
+                    try:
+                        await self._ao_assumir()
+                    except Exception as e:
+                        self.logger.exception(f"Erro ao assumir a liderança: {e}")
+        elif self._lider_ate is not None:
+            self._lider_ate = None
+            if era_lider:
+                self.logger.warning(f"Instância {self.dono} perdeu a liderança de '{self.nome}'.")
@@ -0,0 +1,336 @@
+# log_setup.py
+
+import atexit
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import sys
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Formatos de texto usados pelos logs do bot
+FORMATO_GERAL = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+FORMATO_TASK = "%(asctime)s:%(levelname)s:%(name)s: %(message)s"
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+FORMATOS = ("texto", "json")
+# Pasta padrão dos arquivos de log (cada processo pode usar a sua)
+PASTA_PADRAO = "logs"
+
+# Rotação: tamanho máximo de cada arquivo e cópias compactadas (.gz) mantidas
+MAX_BYTES_PADRAO = 5 * 1024 * 1024  # 5 MB
+BACKUPS_PADRAO = 5
+# Espaço total que os arquivos de log podem ocupar em cada pasta
+ORCAMENTO_DISCO_BYTES = 200 * 1024 * 1024  # 200 MB
+# Janela (s) sugerida para descartar mensagens INFO idênticas repetidas.
+# O filtro é opcional: desligado (0) a menos que configurado.
+JANELA_REPETICAO = 600
+
+# Todas as escritas em disco/console acontecem em uma única thread de fundo;
+# os loggers só colocam o registro nesta fila (operação não bloqueante).
+_fila = queue.SimpleQueue()
+_rotas = {}  # nome do logger -> [handlers reais]
+_caminhos = {}  # nome do logger -> {caminho/destino já anexado}
+_lock = threading.Lock()
+_listener = None
+_formato = "texto"
+_janela_repeticao = 0  # padrão dos loggers anexados (ver configurar)
+_pasta = PASTA_PADRAO
+_pastas = set()  # pastas com logs (para o orçamento de disco)
+# Compactação dos arquivos rotacionados fora da thread de escrita
+_compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log_gzip")
+
+
+class FormatoJSON(logging.Formatter):
+    """Uma linha JSON por registro (log estruturado)."""
+
+    def format(self, record):
+        dados = {
+            "time": self.formatTime(record, FORMATO_DATA),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            dados["exception"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False)
+
+
+class FiltroRepeticao(logging.Filter):
+    """
+    Descarta mensagens INFO/DEBUG idênticas repetidas dentro de `janela`
+    segundos. Não altera o registro (outros handlers também o recebem):
+    `verificar` devolve quantas repetições foram omitidas para quem grava
+    anotar na sua própria cópia.
+    """
+
+    def __init__(self, janela: float = JANELA_REPETICAO):
+        super().__init__()
+        self.janela = janela
+        self._vistas = {}  # mensagem -> [instante da última gravação, omitidas]
+        self._lock = threading.Lock()
+
+    def verificar(self, record):
+        """None: descartar. Senão, repetições omitidas desde a última gravação."""
+        if record.levelno > logging.INFO or self.janela <= 0:
+            return 0
+        mensagem = record.getMessage()
+        agora = time.monotonic()
+        with self._lock:
+            vista = self._vistas.get(mensagem)
+            if vista and agora - vista[0] < self.janela:
+                vista[1] += 1
+                return None
+            omitidas = vista[1] if vista else 0
+            self._vistas[mensagem] = [agora, 0]
+            if len(self._vistas) > 1000:
+                # Mantém a memória limitada: esquece as mais antigas
+                for antiga in sorted(self._vistas, key=lambda m: self._vistas[m][0])[:500]:
+                    del self._vistas[antiga]
+        return omitidas
+
+    def filter(self, record):
+        return self.verificar(record) is not None
+
+
+class RotatingGzipHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler cujos arquivos rotacionados são compactados (.gz)
+    em uma thread separada, sem atrasar a escrita dos próximos registros.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = lambda nome: nome + ".gz"
+        self.rotator = self._rotacionar
+        self._compactacao = None
+
+    def doRollover(self):
+        # Os .gz são renumerados a cada rotação: a compactação anterior
+        # precisa ter terminado (só espera em duas rotações seguidas)
+        if self._compactacao is not None:
+            wait([self._compactacao])
+        super().doRollover()
+
+    def _rotacionar(self, origem: str, destino: str):
+        # Renomear é instantâneo; a compactação fica para a thread de gzip.
+        # Nome temporário único: nada sobrescreve um arquivo ainda não compactado
+        temporario = f"{destino[: -len('.gz')]}.{time.time_ns()}"
+        os.replace(origem, temporario)
+        self._compactacao = _compressor.submit(_comprimir, temporario, destino)
+
+
+def _comprimir(origem: str, destino: str):
+    try:
+        with open(origem, "rb") as entrada, gzip.open(destino, "wb") as saida:
+            shutil.copyfileobj(entrada, saida)
+        os.remove(origem)
+    except OSError as e:
+        # O arquivo original fica no disco (sem compactar); nada se perde
+        logging.getLogger("discord_bot").error(f"Erro ao compactar o log {origem}: {e}")
+        return
+    aplicar_orcamento(os.path.dirname(destino))
+
+
+def aplicar_orcamento(pasta: str, limite: int = ORCAMENTO_DISCO_BYTES):
+    """Apaga os .gz mais antigos da pasta até o total caber em `limite`."""
+    arquivos = [
+        caminho for caminho in glob.glob(os.path.join(pasta, "*")) if os.path.isfile(caminho)
+    ]
+    total = sum(os.path.getsize(caminho) for caminho in arquivos)
+    rotacionados = sorted(
+        (caminho for caminho in arquivos if caminho.endswith(".gz")),
+        key=os.path.getmtime,
+    )
+    for caminho in rotacionados:
+        if total <= limite:
+            break
+        total -= os.path.getsize(caminho)
+        os.remove(caminho)
+
+
+class _HandlerFila(QueueHandler):
+    """
+    QueueHandler que marca o logger de origem para o roteamento. Com
+    `janela_repeticao`, descarta repetições antes de enfileirar.
+    """
+
+    def __init__(self, destino: str, janela_repeticao: float = 0):
+        super().__init__(_fila)
+        self.destino = destino
+        self.repeticao = FiltroRepeticao(janela_repeticao) if janela_repeticao > 0 else None
+
+    def handle(self, record):
+        if not self.filter(record):
+            return False
+        omitidas = 0
+        if self.repeticao is not None:
+            omitidas = self.repeticao.verificar(record)
+            if omitidas is None:
+                return False
+        try:
+            # prepare() devolve uma cópia: a anotação não chega aos outros handlers
+            copia = self.prepare(record)
+            if omitidas:
+                copia.msg = f"{copia.msg} (repetida {omitidas} vez(es) desde o último registro)"
+            self.enqueue(copia)
+        except Exception:
+            self.handleError(record)
+        return True
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.destino_log = self.destino
+        return record
+
+
+class _Roteador(logging.Handler):
+    """Entrega cada registro aos handlers reais do logger que o enfileirou."""
+
+    def handle(self, record):
+        for handler in _rotas.get(getattr(record, "destino_log", None), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+def configurar(formato: str = "texto", janela_repeticao: float = None, pasta: str = None):
+    """
+    Inicia a thread de escrita dos logs (idempotente). `formato` escolhe
+    entre linhas legíveis ("texto") e JSON estruturado ("json").
+    `janela_repeticao` (s) liga o filtro de repetições como padrão dos
+    loggers anexados depois (0 desliga). `pasta` troca a pasta dos
+    arquivos (ver `caminho`).
+    """
+    global _listener, _formato, _janela_repeticao, _pasta
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de log inválido: {formato}")
+    with _lock:
+        _formato = formato
+        if janela_repeticao is not None:
+            _janela_repeticao = janela_repeticao
+        if pasta:
+            _pasta = pasta
+        if _listener is None:
+            _listener = QueueListener(_fila, _Roteador())
+            _listener.start()
+            atexit.register(encerrar)
+
+
+def encerrar():
+    """Esvazia a fila e para a thread de escrita (chamado na saída)."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+    _compressor.shutdown(wait=True)
+
+
+def caminho(nome_arquivo: str) -> str:
+    """Caminho de um arquivo de log na pasta configurada."""
+    return os.path.join(_pasta, nome_arquivo)
+
+
+def _formatter(formato_texto: str) -> logging.Formatter:
+    if _formato == "json":
+        return FormatoJSON()
+    return logging.Formatter(fmt=formato_texto, datefmt=FORMATO_DATA)
+
+
+def _anexar(
+    logger: logging.Logger, chave: str, criar_handler, nivel, formato_texto, janela_repeticao
+):
+    configurar(_formato)
+    if janela_repeticao is None:
+        janela_repeticao = _janela_repeticao
+    with _lock:
+        anexados = _caminhos.setdefault(logger.name, set())
+        if chave in anexados:
+            # setup_logger chamado de novo: não duplica o handler
+            return False
+        handler = criar_handler()
+        handler.setLevel(nivel)
+        handler.setFormatter(_formatter(formato_texto))
+        _rotas.setdefault(logger.name, []).append(handler)
+        anexados.add(chave)
+        if not any(
+            isinstance(h, _HandlerFila) and h.destino == logger.name
+            for h in logger.handlers
+        ):
+            logger.addHandler(_HandlerFila(logger.name, janela_repeticao))
+        return True
+
+
+def anexar_arquivo(
+    logger: logging.Logger,
+    caminho: str,
+    nivel: int = logging.NOTSET,
+    formato_texto: str = FORMATO_TASK,
+    max_bytes: int = MAX_BYTES_PADRAO,
+    backup_count: int = BACKUPS_PADRAO,
+    janela_repeticao: float = None,
+):
+    """
+    Faz `logger` escrever em `caminho` através da fila (sem duplicar).
+    Ao passar de `max_bytes`, o arquivo é rotacionado e compactado,
+    mantendo `backup_count` cópias (max_bytes=0 desativa a rotação).
+    `janela_repeticao` (s) descarta INFO idênticos repetidos neste logger
+    (padrão: o de configurar, desligado se não informado).
+    """
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    pasta_absoluta = os.path.abspath(pasta or ".")
+    if pasta_absoluta not in _pastas:
+        _pastas.add(pasta_absoluta)
+        # Verifica o orçamento de disco já na inicialização
+        _compressor.submit(aplicar_orcamento, pasta_absoluta)
+
+    def criar_handler():
+        if max_bytes:
+            return RotatingGzipHandler(
+                filename=caminho,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8",
+            )
+        return logging.FileHandler(filename=caminho, encoding="utf-8", mode="a")
+
+    return _anexar(
+        logger, os.path.abspath(caminho), criar_handler, nivel, formato_texto, janela_repeticao
+    )
+
+
+def anexar_console(
+    logger: logging.Logger,
+    nivel: int = logging.NOTSET,
+    formato_texto: str = "%(message)s",
+    janela_repeticao: float = None,
+):
+    """Faz `logger` escrever no console (stdout) através da fila."""
+    return _anexar(
+        logger,
+        "<console>",
+        lambda: logging.StreamHandler(sys.stdout),
+        nivel,
+        formato_texto,
+        janela_repeticao,
+    )
+
+
+def console() -> logging.Logger:
+    """
+    Logger que substitui os print(): mesma fila, saída no stdout, sem
+    propagar para os arquivos do logger geral.
+    """
+    logger = logging.getLogger("discord_bot.console")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    anexar_console(logger)
+    return logger
@@ -6,44 +6,45 @@ from config import TOKEN
 from cogs.tasks_cog import TasksCog
 import os
 import logging
-from logging.handlers import RotatingFileHandler
-
-# Garantir que a pasta 'logs' existe
-os.makedirs("logs", exist_ok=True)
+import lideranca
+import log_setup
+import metrics
+import shards
+
+# Todos os logs passam por uma fila e são gravados em uma thread de fundo.
+# LOG_FORMAT=json gera logs estruturados (uma linha JSON por registro).
+# LOG_REPETICAO=600 descarta INFO idênticos repetidos em 600 s (padrão: desligado).
+# LOG_DIR troca a pasta dos arquivos (um processo por pasta; padrão: logs/).
+log_setup.configurar(
+    os.environ.get("LOG_FORMAT", "texto"),
+    float(os.environ.get("LOG_REPETICAO", 0)),
+    os.environ.get("LOG_DIR"),
+)
+console = log_setup.console()
 
 # Configuração do Logger Geral
 geral_logger = logging.getLogger("discord_bot")
 geral_logger.setLevel(logging.DEBUG)  # Captura todos os níveis de log
 
-# Formato do Log
-formatter = logging.Formatter(
-    fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-
 # Handler para Log Geral (INFO e superiores)
-geral_log_path = os.path.join("logs", "geral.log")
-geral_handler = RotatingFileHandler(
-    filename=geral_log_path,
-    maxBytes=5 * 1024 * 1024,  # 5 MB
-    backupCount=5,
-    encoding="utf-8",
+log_setup.anexar_arquivo(
+    geral_logger,
+    log_setup.caminho("geral.log"),
+    nivel=logging.INFO,
+    formato_texto=log_setup.FORMATO_GERAL,
+    max_bytes=5 * 1024 * 1024,  # 5 MB
+    backup_count=5,
 )
-geral_handler.setLevel(logging.INFO)
-geral_handler.setFormatter(formatter)
-geral_logger.addHandler(geral_handler)
 
 # Handler para Logs de Erro (ERROR e superiores)
-erros_log_path = os.path.join("logs", "erros.log")
-erros_handler = RotatingFileHandler(
-    filename=erros_log_path,
-    maxBytes=5 * 1024 * 1024,  # 5 MB
-    backupCount=5,
-    encoding="utf-8",
+log_setup.anexar_arquivo(
+    geral_logger,
+    log_setup.caminho("erros.log"),
+    nivel=logging.ERROR,
+    formato_texto=log_setup.FORMATO_GERAL,
+    max_bytes=5 * 1024 * 1024,  # 5 MB
+    backup_count=5,
 )
-erros_handler.setLevel(logging.ERROR)
-erros_handler.setFormatter(formatter)
-geral_logger.addHandler(erros_handler)
 
 # Configuração do Logger da Biblioteca discord.py
 discord_logger = logging.getLogger("discord")
@@ -54,7 +55,37 @@ intents = discord.Intents.default()
 intents.messages = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# AutoShardedBot: uma conexão com o gateway por shard, cada uma com suas
+# guildas. SHARD_COUNT/SHARD_IDS dividem os shards entre processos.
+bot = commands.AutoShardedBot(
+    command_prefix="!", intents=intents, **shards.configuracao_ambiente()
+)
+
+
+def criar_eleicao():
+    """
+    LIDERANCA=sqlite: várias cópias do bot (mesmo banco) elegem uma líder,
+    a única que envia. Sem a variável, a instância roda sozinha.
+    """
+    backend = os.environ.get("LIDERANCA", "").lower()
+    if not backend:
+        return None
+    if backend != "sqlite":
+        raise ValueError(f"LIDERANCA inválida: {backend} (use 'sqlite')")
+    ids = bot.shard_ids
+    # Uma líder por conjunto de shards (processos com shards diferentes não competem)
+    nome = "agendador:" + (",".join(str(shard) for shard in ids) if ids else "todos")
+    logger = logging.getLogger("discord_bot.lideranca")
+    log_setup.anexar_arquivo(
+        logger, log_setup.caminho("lideranca.log"), formato_texto=log_setup.FORMATO_TASK
+    )
+    return lideranca.Eleicao(nome, lideranca.BackendSQLite(), logger)
+
+
+@bot.event
+async def setup_hook():
+    # Cog criado já dentro do event loop do bot (agendador e despachante)
+    await bot.add_cog(TasksCog(bot, geral_logger, criar_eleicao()))
 
 
 @bot.event
@@ -63,12 +94,28 @@ async def on_ready():
     Este evento é chamado apenas uma vez, quando o bot se conecta com sucesso ao Discord.
     """
     geral_logger.info(f"Bot conectado como {bot.user}")
-    print(f"INICIALIZACAO DO BOT (MAIN) ----- {bot.user}")
+    console.info(f"INICIALIZACAO DO BOT (MAIN) ----- {bot.user}")
+
+
+@bot.event
+async def on_shard_ready(shard_id):
+    guildas = sum(1 for guild in bot.guilds if guild.shard_id == shard_id)
+    geral_logger.info(f"Shard {shard_id}/{bot.shard_count} pronto com {guildas} guilda(s).")
 
 
 def main():
-    # Adiciona o Cog com as tarefas, passando o logger geral
-    bot.add_cog(TasksCog(bot, geral_logger))
+    # Endpoint /metrics (formato Prometheus); METRICS_PORT=0 desativa
+    porta_metricas = int(os.environ.get("METRICS_PORT", metrics.PORTA_PADRAO))
+    if porta_metricas:
+        try:
+            metrics.iniciar_servidor(porta_metricas)
+            geral_logger.info(f"Métricas disponíveis em http://127.0.0.1:{porta_metricas}/metrics")
+        except OSError as e:
+            # Outro processo na mesma máquina já usa a porta: o bot segue sem /metrics
+            geral_logger.warning(
+                f"Endpoint de métricas desativado: porta {porta_metricas} indisponível ({e}). "
+                "Use um METRICS_PORT diferente por processo (ou METRICS_PORT=0)."
+            )
 
     # Executa o bot
     bot.run(TOKEN)
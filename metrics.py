@@ -0,0 +1,207 @@
+# metrics.py
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Endpoint local no formato texto do Prometheus (GET /metrics)
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 9108
+
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registro = []
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        _registro.append(self)
+
+    def _chave(self, rotulos) -> tuple:
+        return tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            linhas.extend(self._amostras())
+        return linhas
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def __init__(self, nome, descricao, rotulos=()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores = {}
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos):
+        with self._lock:
+            return self._valores.get(self._chave(rotulos), 0)
+
+    def _amostras(self):
+        for chave, valor in sorted(self._valores.items()):
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_numero(valor)}"
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_PADRAO):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # chave -> [contagens por bucket, soma, total]
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            if indice < len(self.buckets):
+                serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def total(self, **rotulos):
+        with self._lock:
+            serie = self._series.get(self._chave(rotulos))
+            return serie[2] if serie else 0
+
+    def _amostras(self):
+        for chave, (contagens, soma, total) in sorted(self._series.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_numero(limite)}"')
+                yield f"{self.nome}_bucket{rotulos} {acumulado}"
+            rotulos = _formatar_rotulos(self.rotulos, chave, 'le="+Inf"')
+            yield f"{self.nome}_bucket{rotulos} {total}"
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            yield f"{self.nome}_sum{rotulos} {_numero(soma)}"
+            yield f"{self.nome}_count{rotulos} {total}"
+
+
+def exportar() -> str:
+    """Todas as métricas no formato texto do Prometheus."""
+    linhas = []
+    for metrica in _registro:
+        linhas.extend(metrica.exportar())
+    return "\n".join(linhas) + "\n"
+
+
+# =====================================================
+# Métricas do bot
+# =====================================================
+TICK_SEGUNDOS = Histograma(
+    "bot_task_tick_seconds", "Duração de cada execução de task/regra.", ("task",)
+)
+ENVIO_SEGUNDOS = Histograma(
+    "bot_send_latency_seconds",
+    "Tempo entre enfileirar uma mensagem e o Discord confirmar o envio.",
+    ("task",),
+)
+ENVIO_FALHAS = Contador("bot_send_failures_total", "Envios que falharam.", ("task",))
+RETENTATIVAS_429 = Contador(
+    "bot_send_429_retries_total", "Retentativas após resposta 429 do Discord.", ("task",)
+)
+CANAL_NAO_ENCONTRADO = Contador(
+    "bot_channel_not_found_total", "Vezes em que get_channel retornou None.", ("task",)
+)
+SHEETS_SEGUNDOS = Histograma(
+    "bot_sheets_call_seconds", "Duração das chamadas ao Google Sheets.", ("method",)
+)
+SHEETS_LINHAS = Contador(
+    "bot_sheets_rows_processed_total", "Linhas da planilha de avisos processadas."
+)
+DB_SEGUNDOS = Histograma(
+    "bot_db_query_seconds", "Duração das unidades de trabalho no SQLite.", ("query",)
+)
+CACHE_SETTINGS = Contador(
+    "bot_settings_cache_total", "Consultas ao cache de Settings.", ("result",)
+)
+LOOP_ATRASO = Histograma(
+    "bot_event_loop_lag_seconds",
+    "Atraso do event loop medido pela batida do monitor.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LOOP_BLOQUEIOS = Contador(
+    "bot_event_loop_blocks_total",
+    "Bloqueios do event loop acima do limite, pela função que os causou.",
+    ("origem",),
+)
+DISPAROS_IGNORADOS = Contador(
+    "bot_scheduler_skipped_total",
+    "Disparos não executados porque esta instância não é a líder.",
+    ("task",),
+)
+LIDERANCA_ASSUMIDA = Contador(
+    "bot_leader_acquired_total", "Vezes em que esta instância assumiu a liderança."
+)
+
+
+# =====================================================
+# Servidor HTTP
+# =====================================================
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = exportar().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass  # sem log por requisição
+
+
+def iniciar_servidor(porta: int = PORTA_PADRAO, host: str = HOST_PADRAO):
+    """Sobe o endpoint /metrics em uma thread daemon e retorna o servidor."""
+    servidor = ThreadingHTTPServer((host, porta), _HandlerMetricas)
+    thread = threading.Thread(
+        target=servidor.serve_forever, name="metrics_http", daemon=True
+    )
+    thread.start()
+    return servidor
@@ -1,6 +1,17 @@
 # models.py
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+    Time,
+    UniqueConstraint,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -14,3 +25,135 @@ class Settings(Base):
 
     def __repr__(self):
         return f"<Settings(key='{self.key}', value='{self.value}')>"
+
+
+class Aviso(Base):
+    """Espelho local dos avisos da planilha do Google Sheets."""
+
+    __tablename__ = "avisos"
+    id = Column(Integer, primary_key=True)
+    aviso_id = Column(String(50), unique=True, nullable=False)  # coluna ID da planilha
+    linha = Column(Integer, nullable=False)  # linha na planilha
+    canal_id = Column(Integer, nullable=False)
+    mensagem = Column(Text, nullable=False)
+    send_date = Column(Date, nullable=False)
+    send_time = Column(Time, nullable=True)  # sem hora: início do dia
+    sent = Column(Boolean, nullable=False, default=False)
+    # False enquanto o "Enviado" ainda não foi gravado de volta na planilha
+    sheet_marked = Column(Boolean, nullable=False, default=True)
+
+    __table_args__ = (Index("ix_avisos_send_date_sent", "send_date", "sent"),)
+
+    def __repr__(self):
+        return (
+            f"<Aviso(aviso_id='{self.aviso_id}', send_date='{self.send_date}', "
+            f"sent={self.sent})>"
+        )
+
+
+class EnvioAgendado(Base):
+    """Envio atrasado/avulso persistido (sobrevive a reinícios do bot)."""
+
+    __tablename__ = "envios_agendados"
+    id = Column(Integer, primary_key=True)
+    chave = Column(String(100), unique=True, nullable=False)  # evita agendar duas vezes
+    origem = Column(String(50), nullable=False)  # task que criou o envio
+    canal_id = Column(Integer, nullable=False)
+    mensagem = Column(Text, nullable=False)
+    prioridade = Column(Integer, nullable=False, default=1)
+    executar_em = Column(DateTime, nullable=False)  # UTC, sem fuso
+    status = Column(String(20), nullable=False, default="pendente")
+    tentativas = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_envios_agendados_status_executar_em", "status", "executar_em"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<EnvioAgendado(chave='{self.chave}', executar_em='{self.executar_em}', "
+            f"status='{self.status}')>"
+        )
+
+
+class UltimoDisparo(Base):
+    """Último disparo de cada regra do agendador (recuperação após queda)."""
+
+    __tablename__ = "ultimos_disparos"
+    id = Column(Integer, primary_key=True)
+    regra = Column(String(100), unique=True, nullable=False)
+    instante = Column(DateTime, nullable=False)  # UTC, sem fuso
+
+    def __repr__(self):
+        return f"<UltimoDisparo(regra='{self.regra}', instante='{self.instante}')>"
+
+
+class Agendamento(Base):
+    """Mensagem recorrente configurada por servidor (comando !agendar)."""
+
+    __tablename__ = "agendamentos"
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(Integer, nullable=False)
+    nome = Column(String(50), nullable=False)
+    canal_id = Column(Integer, nullable=False)
+    regra = Column(String(100), nullable=False)  # ex.: "09:00/uteis" (ver agendamentos.py)
+    ativo = Column(Boolean, nullable=False, default=True)
+    proximo_disparo = Column(DateTime, nullable=True)  # UTC, sem fuso; None: esgotado
+
+    __table_args__ = (
+        UniqueConstraint("guild_id", "nome", name="uq_agendamentos_guild_id_nome"),
+        Index("ix_agendamentos_ativo_proximo_disparo", "ativo", "proximo_disparo"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<Agendamento(guild_id={self.guild_id}, nome='{self.nome}', "
+            f"regra='{self.regra}', proximo_disparo='{self.proximo_disparo}')>"
+        )
+
+
+class MensagemAgendamento(Base):
+    """Mensagem do conjunto sorteado a cada disparo de um agendamento."""
+
+    __tablename__ = "mensagens_agendamento"
+    id = Column(Integer, primary_key=True)
+    agendamento_id = Column(Integer, nullable=False, index=True)
+    texto = Column(Text, nullable=False)
+
+    def __repr__(self):
+        return f"<MensagemAgendamento(agendamento_id={self.agendamento_id})>"
+
+
+class Lideranca(Base):
+    """Concessão (lease) de liderança entre instâncias do bot."""
+
+    __tablename__ = "liderancas"
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(100), unique=True, nullable=False)  # ex.: "agendador:todos"
+    dono = Column(String(100), nullable=False)  # instância que detém a concessão
+    expira_em = Column(DateTime, nullable=False)  # UTC, sem fuso
+
+    def __repr__(self):
+        return f"<Lideranca(nome='{self.nome}', dono='{self.dono}', expira_em='{self.expira_em}')>"
+
+
+class EnvioRealizado(Base):
+    """Histórico de envios: no máximo um por (regra, período, canal)."""
+
+    __tablename__ = "historico_envios"
+    id = Column(Integer, primary_key=True)
+    regra = Column(String(100), nullable=False)
+    periodo = Column(String(50), nullable=False)  # ex.: "2026-W11", "2026-03-15"
+    canal_id = Column(Integer, nullable=False)
+    mensagem_id = Column(Integer, nullable=True)  # ID da mensagem no Discord
+    enviado_em = Column(DateTime, nullable=False, index=True)  # UTC, sem fuso
+
+    __table_args__ = (
+        UniqueConstraint("regra", "periodo", "canal_id", name="uq_historico_envios_chave"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<EnvioRealizado(regra='{self.regra}', periodo='{self.periodo}', "
+            f"canal_id={self.canal_id}, mensagem_id={self.mensagem_id})>"
+        )
@@ -0,0 +1,123 @@
+# monitor_loop.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+import metrics
+
+# Intervalo da batida no event loop e a partir de quanto tempo parado é bloqueio
+INTERVALO_BATIDA = 0.1
+LIMITE_BLOQUEIO = 0.5
+
+_PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _callback_em_execucao(pilha):
+    """Corta a pilha no callback que o event loop está executando."""
+    for indice in range(len(pilha) - 1, -1, -1):
+        quadro = pilha[indice]
+        if quadro.name == "_run" and os.sep + "asyncio" + os.sep in quadro.filename:
+            return pilha[indice + 1 :]
+    return pilha
+
+
+def _cadeia(pilha) -> str:
+    """
+    Resumo "a → b → c" da pilha: funções do projeto, da mais externa à mais
+    interna, seguidas da chamada (de biblioteca) que estava em execução.
+    """
+    pilha = _callback_em_execucao(pilha)
+    nomes = [
+        quadro.name
+        for quadro in pilha
+        if quadro.filename.startswith(_PASTA_PROJETO)
+        and os.path.abspath(quadro.filename) != os.path.abspath(__file__)
+    ]
+    if pilha and (not nomes or pilha[-1].name != nomes[-1]):
+        nomes.append(pilha[-1].name)
+    return " → ".join(nomes) or "desconhecido"
+
+
+class MonitorLoop:
+    """
+    Mede continuamente o atraso do event loop. Uma corrotina "bate" a cada
+    `intervalo` segundos; uma thread vigia a batida e, se o loop ficar mais
+    de `limite` segundos sem bater, captura a pilha da thread do loop (quem
+    está segurando o loop) e registra o bloqueio quando ele termina.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger = None,
+        intervalo: float = INTERVALO_BATIDA,
+        limite: float = LIMITE_BLOQUEIO,
+    ):
+        self.logger = logger or logging.getLogger("discord_bot.loop_lag")
+        self.intervalo = intervalo
+        self.limite = limite
+        self.bloqueios = 0
+        self.maior_atraso = 0.0
+        self._batida = time.monotonic()
+        self._thread_loop = None
+        self._task = None
+        self._vigia = None
+        self._parar = threading.Event()
+
+    def iniciar(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._bater())
+        return self._task
+
+    def parar(self):
+        self._parar.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _bater(self):
+        self._thread_loop = threading.get_ident()
+        self._batida = time.monotonic()
+        self._parar.clear()
+        if self._vigia is None or not self._vigia.is_alive():
+            self._vigia = threading.Thread(
+                target=self._vigiar, name="monitor_loop", daemon=True
+            )
+            self._vigia.start()
+        while True:
+            inicio = time.monotonic()
+            await asyncio.sleep(self.intervalo)
+            agora = time.monotonic()
+            atraso = max(0.0, agora - inicio - self.intervalo)
+            metrics.LOOP_ATRASO.observar(atraso)
+            self.maior_atraso = max(self.maior_atraso, atraso)
+            self._batida = agora
+
+    def _vigiar(self):
+        bloqueio = None  # (batida em que o loop parou, pilha capturada)
+        while not self._parar.wait(self.intervalo):
+            batida = self._batida
+            parado = time.monotonic() - batida
+            if bloqueio is None:
+                if parado >= self.limite:
+                    quadro = sys._current_frames().get(self._thread_loop)
+                    pilha = traceback.extract_stack(quadro) if quadro else []
+                    bloqueio = (batida, pilha)
+            elif batida != bloqueio[0]:
+                # O loop voltou a bater: registra quanto tempo ficou preso
+                self._registrar(batida - bloqueio[0] - self.intervalo, bloqueio[1])
+                bloqueio = None
+
+    def _registrar(self, duracao: float, pilha):
+        self.bloqueios += 1
+        cadeia = _cadeia(pilha)
+        origem = cadeia.split(" → ")[0]
+        metrics.LOOP_BLOQUEIOS.inc(origem=origem)
+        self.logger.warning(
+            f"Event loop bloqueado por {duracao:.2f}s: {cadeia}\n"
+            + "".join(traceback.format_list(_callback_em_execucao(pilha)))
+        )
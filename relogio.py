@@ -0,0 +1,106 @@
+# relogio.py
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import math
+import time
+
+from config import TIMEZONE
+
+# Todo acesso ao tempo do bot (data/hora atual, esperas e intervalos) passa
+# pelo relógio atual. Em produção é o relógio do sistema; o modo replay
+# (benchmarks/replay.py) troca por um RelogioVirtual, que avança sem esperar.
+
+
+class Relogio:
+    """Relógio do sistema."""
+
+    def agora(self) -> datetime.datetime:
+        return datetime.datetime.now(TIMEZONE)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def dormir(self, segundos: float):
+        await asyncio.sleep(max(0.0, segundos))
+
+    async def aguardar_evento(self, evento: asyncio.Event, timeout: float) -> bool:
+        """Espera `evento` por até `timeout` segundos. Retorna se ele foi sinalizado."""
+        try:
+            await asyncio.wait_for(evento.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class RelogioVirtual(Relogio):
+    """
+    Relógio simulado: o tempo só anda quando `avancar` é chamado. Cada
+    `dormir` vira uma entrada em uma fila de prioridade; `avancar` salta
+    direto para a próxima e acorda quem estava esperando por ela.
+    """
+
+    def __init__(self, inicio: datetime.datetime):
+        self._agora = inicio
+        self._espera = []  # heap de (instante, seq, futuro)
+        self._seq = itertools.count()
+
+    def agora(self) -> datetime.datetime:
+        return self._agora
+
+    def monotonic(self) -> float:
+        return self._agora.timestamp()
+
+    async def dormir(self, segundos: float):
+        if segundos <= 0:
+            await asyncio.sleep(0)
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        # Arredonda para cima: uma espera < 1µs (ex.: balde de tokens quase
+        # cheio) não pode virar zero, senão o tempo nunca anda
+        instante = self._agora + datetime.timedelta(microseconds=math.ceil(segundos * 1e6))
+        heapq.heappush(self._espera, (instante, next(self._seq), futuro))
+        await futuro
+
+    async def aguardar_evento(self, evento: asyncio.Event, timeout: float) -> bool:
+        sinal = asyncio.ensure_future(evento.wait())
+        prazo = asyncio.ensure_future(self.dormir(timeout))
+        try:
+            await asyncio.wait({sinal, prazo}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sinal.cancel()
+            prazo.cancel()
+        return evento.is_set()
+
+    def proximo(self):
+        """Instante da próxima espera pendente (ou None)."""
+        while self._espera and self._espera[0][2].done():
+            heapq.heappop(self._espera)  # espera cancelada
+        return self._espera[0][0] if self._espera else None
+
+    def avancar(self):
+        """Salta para a próxima espera e acorda todas as que vencem nesse instante."""
+        instante = self.proximo()
+        if instante is None:
+            return None
+        self._agora = max(self._agora, instante)
+        while self._espera and self._espera[0][0] <= self._agora:
+            _, _, futuro = heapq.heappop(self._espera)
+            if not futuro.done():
+                futuro.set_result(None)
+        return self._agora
+
+
+_atual = Relogio()
+
+
+def atual() -> Relogio:
+    return _atual
+
+
+def definir(relogio: Relogio):
+    """Troca o relógio usado pelo bot (ex.: RelogioVirtual no replay)."""
+    global _atual
+    _atual = relogio
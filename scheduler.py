@@ -0,0 +1,511 @@
+# scheduler.py
+
+import array
+import asyncio
+import bisect
+import calendar
+import datetime
+import heapq
+import itertools
+import logging
+
+import metrics
+import relogio
+from calendario import CALENDARIO_PADRAO, Calendario
+from config import TIMEZONE
+
+# Limite de busca para regras que nunca casam (ex.: dia 31 em todos os meses de 30 dias)
+MAX_MESES_BUSCA = 14
+# Tabelas mensais de disparo mantidas por regra (mês atual, vizinhos e recuperação)
+MESES_EM_CACHE = 3
+# Atraso a partir do qual um disparo conta como perdido (e não só um loop ocupado)
+ATRASO_TOLERADO = datetime.timedelta(minutes=1)
+
+
+# Função auxiliar para retornar a data/hora no fuso definido (relógio injetável).
+def get_now():
+    return relogio.atual().agora()
+
+
+def localizar(data: datetime.date, horario: datetime.time) -> datetime.datetime:
+    """Monta um datetime no fuso configurado (respeitando horário de verão)."""
+    ingenuo = datetime.datetime.combine(data, horario)
+    if hasattr(TIMEZONE, "localize"):
+        # normalize: um horário que não existe (início do horário de verão)
+        # vira o instante real correspondente, já no deslocamento certo
+        return TIMEZONE.normalize(TIMEZONE.localize(ingenuo))
+    return ingenuo.replace(tzinfo=TIMEZONE)
+
+
+def proximo_mes(ano: int, mes: int):
+    return (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+
+# =====================================================
+# Regras de agendamento
+# =====================================================
+class Regra:
+    """
+    Regra base. Sabe calcular o próximo instante de disparo a partir de um momento.
+    """
+
+    def proximo_disparo(self, depois: datetime.datetime):
+        """Retorna o primeiro disparo estritamente depois de `depois` (ou None)."""
+        raise NotImplementedError
+
+    def disparo_inicial(self, agora: datetime.datetime):
+        """Primeiro disparo ao registrar a regra no agendador."""
+        return self.proximo_disparo(agora)
+
+
+class RegraMensal(Regra):
+    """
+    Base das regras de horários fixos em datas do mês. Os disparos de cada
+    mês são calculados uma vez (datas × horários, já no fuso) e guardados
+    como timestamps em um array ordenado; o próximo disparo é uma busca
+    binária nesse array.
+    """
+
+    def __init__(self, horarios):
+        self.horarios = sorted(horarios)
+        self._tabelas = {}  # (ano, mês) -> array("d") de timestamps
+
+    def datas_do_mes(self, ano: int, mes: int):
+        """Datas do mês em que a regra dispara."""
+        raise NotImplementedError
+
+    def tabela(self, ano: int, mes: int) -> array.array:
+        chave = (ano, mes)
+        tabela = self._tabelas.get(chave)
+        if tabela is None:
+            instantes = {
+                localizar(data, horario).timestamp()
+                for data in self.datas_do_mes(ano, mes)
+                for horario in self.horarios
+            }
+            tabela = array.array("d", sorted(instantes))
+            if len(self._tabelas) >= MESES_EM_CACHE:
+                del self._tabelas[next(iter(self._tabelas))]  # a mais antiga calculada
+            self._tabelas[chave] = tabela
+        return tabela
+
+    def proximo_disparo(self, depois):
+        referencia = depois.timestamp()
+        local = depois.astimezone(TIMEZONE)
+        ano, mes = local.year, local.month
+        for _ in range(MAX_MESES_BUSCA):
+            tabela = self.tabela(ano, mes)
+            indice = bisect.bisect_right(tabela, referencia)
+            if indice < len(tabela):
+                return datetime.datetime.fromtimestamp(tabela[indice], TIMEZONE)
+            ano, mes = proximo_mes(ano, mes)
+        return None
+
+
+class RegraHorarios(RegraMensal):
+    """
+    Dispara em horários fixos do dia, opcionalmente filtrando dias do mês
+    (1-31), dias da semana (0 = segunda) e, com `calendario`, só em dias
+    úteis.
+    """
+
+    def __init__(self, horarios, dias_do_mes=None, dias_da_semana=None, calendario=None):
+        super().__init__(horarios)
+        self.dias_do_mes = set(dias_do_mes) if dias_do_mes else None
+        self.dias_da_semana = set(dias_da_semana) if dias_da_semana else None
+        self.calendario = calendario
+
+    def dia_valido(self, data: datetime.date) -> bool:
+        if self.dias_do_mes is not None and data.day not in self.dias_do_mes:
+            return False
+        if self.dias_da_semana is not None and data.weekday() not in self.dias_da_semana:
+            return False
+        if self.calendario is not None and not self.calendario.dia_util(data):
+            return False
+        return True
+
+    def datas_do_mes(self, ano, mes):
+        _, ultimo = calendar.monthrange(ano, mes)
+        for dia in range(1, ultimo + 1):
+            data = datetime.date(ano, mes, dia)
+            if self.dia_valido(data):
+                yield data
+
+    def __repr__(self):
+        return (
+            f"<RegraHorarios(horarios={self.horarios}, dias_do_mes={self.dias_do_mes}, "
+            f"dias_da_semana={self.dias_da_semana}, "
+            f"dias_uteis={self.calendario is not None})>"
+        )
+
+
+class RegraDiaUtil(RegraMensal):
+    """
+    Dispara no N-ésimo dia útil de cada mês (1 = primeiro, -1 = último),
+    nos horários informados.
+    """
+
+    def __init__(self, horarios, dias_uteis, calendario: Calendario = None):
+        super().__init__(horarios)
+        if 0 in dias_uteis:
+            raise ValueError("Dia útil inválido: 0")
+        self.dias_uteis = sorted(dias_uteis)
+        self.calendario = calendario or CALENDARIO_PADRAO
+
+    def datas_do_mes(self, ano, mes):
+        datas = (self.calendario.enesimo_dia_util(ano, mes, n) for n in self.dias_uteis)
+        return {data for data in datas if data is not None}
+
+    def __repr__(self):
+        return f"<RegraDiaUtil(horarios={self.horarios}, dias_uteis={self.dias_uteis})>"
+
+
+class RegraJanela(Regra):
+    """
+    Dispara uma vez por período ("semana" ou "mes"), dentro da janela diária
+    [hora_inicio, hora_fim). O disparo normal é no início do período; ao
+    registrar a regra no meio do período, dispara na próxima janela aberta
+    (a deduplicação por período fica a cargo da task).
+    """
+
+    PERIODOS = ("semana", "mes")
+
+    def __init__(self, periodo: str, hora_inicio: int, hora_fim: int):
+        if periodo not in self.PERIODOS:
+            raise ValueError(f"Período inválido: {periodo}")
+        self.periodo = periodo
+        self.hora_inicio = hora_inicio
+        self.hora_fim = hora_fim
+
+    def inicio_periodo(self, data: datetime.date) -> datetime.date:
+        if self.periodo == "semana":
+            return data - datetime.timedelta(days=data.weekday())
+        return data.replace(day=1)
+
+    def proximo_periodo(self, inicio: datetime.date) -> datetime.date:
+        if self.periodo == "semana":
+            return inicio + datetime.timedelta(days=7)
+        if inicio.month == 12:
+            return inicio.replace(year=inicio.year + 1, month=1)
+        return inicio.replace(month=inicio.month + 1)
+
+    def proximo_disparo(self, depois):
+        depois = depois.astimezone(TIMEZONE)
+        inicio = self.inicio_periodo(depois.date())
+        disparo = localizar(inicio, datetime.time(self.hora_inicio))
+        if disparo > depois:
+            return disparo
+        return localizar(self.proximo_periodo(inicio), datetime.time(self.hora_inicio))
+
+    def disparo_inicial(self, agora):
+        agora = agora.astimezone(TIMEZONE)
+        data = agora.date()
+        fim_periodo = self.proximo_periodo(self.inicio_periodo(data))
+        while data < fim_periodo:
+            abertura = localizar(data, datetime.time(self.hora_inicio))
+            fechamento = localizar(data, datetime.time(self.hora_fim))
+            if agora < fechamento:
+                return max(agora, abertura)
+            data += datetime.timedelta(days=1)
+        return self.proximo_disparo(agora)
+
+    def __repr__(self):
+        return (
+            f"<RegraJanela(periodo='{self.periodo}', "
+            f"janela={self.hora_inicio}h-{self.hora_fim}h)>"
+        )
+
+
+class RegraIntervalo(Regra):
+    """
+    Dispara a cada `intervalo` (datetime.timedelta), a primeira vez ao ser
+    registrada (equivalente a um tasks.loop).
+    """
+
+    def __init__(self, intervalo: datetime.timedelta):
+        if intervalo <= datetime.timedelta(0):
+            raise ValueError(f"Intervalo inválido: {intervalo}")
+        self.intervalo = intervalo
+
+    def proximo_disparo(self, depois):
+        return depois + self.intervalo
+
+    def disparo_inicial(self, agora):
+        return agora
+
+    def __repr__(self):
+        return f"<RegraIntervalo(intervalo='{self.intervalo}')>"
+
+
+class RegraUnica(Regra):
+    """
+    Dispara uma única vez no instante informado. Se o instante já passou
+    quando a regra é registrada, dispara imediatamente.
+    """
+
+    def __init__(self, instante: datetime.datetime):
+        self.instante = instante
+
+    def proximo_disparo(self, depois):
+        return self.instante if self.instante > depois else None
+
+    def disparo_inicial(self, agora):
+        return self.instante
+
+    def __repr__(self):
+        return f"<RegraUnica(instante='{self.instante}')>"
+
+
+# =====================================================
+# Disparos perdidos (bot fora do ar ou loop parado)
+# =====================================================
+class PoliticaAtraso:
+    """
+    O que fazer com disparos perdidos de uma regra:
+    - DISPARAR: executa cada disparo perdido há no máximo `tolerancia`;
+    - AGRUPAR: executa uma única vez (o mais recente) se estiver na tolerância;
+    - PULAR: descarta e segue para o próximo disparo.
+    Atrasos de até ATRASO_TOLERADO nunca contam como perda.
+    """
+
+    DISPARAR = "disparar"
+    AGRUPAR = "agrupar"
+    PULAR = "pular"
+    MODOS = (DISPARAR, AGRUPAR, PULAR)
+
+    def __init__(
+        self, modo: str = AGRUPAR, tolerancia: datetime.timedelta = datetime.timedelta(hours=1)
+    ):
+        if modo not in self.MODOS:
+            raise ValueError(f"Política de atraso inválida: {modo}")
+        self.modo = modo
+        self.tolerancia = tolerancia
+
+    def perdidos(self, regra: Regra, depois: datetime.datetime, agora: datetime.datetime):
+        """
+        Disparos de `regra` em (depois, agora] que devem ser executados. Só a
+        janela de tolerância é percorrida, então o custo não cresce com o
+        tempo fora do ar.
+        """
+        if self.modo == self.PULAR:
+            tolerancia = ATRASO_TOLERADO
+        else:
+            tolerancia = max(self.tolerancia, ATRASO_TOLERADO)
+        instantes = []
+        instante = regra.proximo_disparo(max(depois, agora - tolerancia))
+        while instante is not None and instante <= agora:
+            instantes.append(instante)
+            instante = regra.proximo_disparo(instante)
+        if self.modo == self.AGRUPAR:
+            return instantes[-1:]
+        return instantes
+
+    def __repr__(self):
+        return f"<PoliticaAtraso(modo='{self.modo}', tolerancia='{self.tolerancia}')>"
+
+
+# =====================================================
+# Agendador central
+# =====================================================
+class TarefaAgendada:
+    def __init__(self, nome: str, regra: Regra, callback, politica: PoliticaAtraso = None):
+        self.nome = nome
+        self.regra = regra
+        self.callback = callback
+        self.politica = politica
+        self.proximo = None
+        self.ultimo_disparo = None
+        self.cancelada = False
+
+
+class Agendador:
+    """
+    Mantém o próximo disparo de cada regra em uma fila de prioridade e dorme
+    até o mais próximo. Não há polling: sem disparos pendentes, o custo é zero.
+
+    Regras com `politica` têm o último disparo gravado em `registro` (objeto
+    com `carregar()` e `registrar(nome, instante)` assíncronos). Ao iniciar,
+    os disparos perdidos enquanto o bot esteve fora são recuperados em uma
+    única passada, conforme a política de cada regra.
+
+    Com `lideranca` (objeto com `sou_lider()`, ver lideranca.py), a fila anda
+    em todas as instâncias, mas só a líder executa os disparos; a recuperação
+    passa a ser feita por quem assume (`recuperar_perdidos`).
+    """
+
+    def __init__(self, logger: logging.Logger = None, registro=None, lideranca=None):
+        self.logger = logger or logging.getLogger("discord_bot.scheduler")
+        self.registro = registro
+        self.lideranca = lideranca
+        self._fila = []  # heap de (instante, seq, TarefaAgendada)
+        self._seq = itertools.count()
+        self._tarefas = {}
+        self._acordar = None
+        self._task = None
+        self._em_execucao = set()
+
+    def agendar(
+        self, nome: str, regra: Regra, callback, politica: PoliticaAtraso = None
+    ) -> TarefaAgendada:
+        """
+        Registra uma regra. `callback` é uma corrotina que recebe o instante
+        agendado do disparo. `politica` define o tratamento de disparos
+        perdidos (sem política, a regra não grava o último disparo).
+        """
+        if nome in self._tarefas:
+            self.cancelar(nome)
+        tarefa = TarefaAgendada(nome, regra, callback, politica)
+        self._tarefas[nome] = tarefa
+        self._enfileirar(tarefa, regra.disparo_inicial(get_now()))
+        return tarefa
+
+    def tarefa(self, nome: str):
+        return self._tarefas.get(nome)
+
+    def cancelar(self, nome: str):
+        tarefa = self._tarefas.pop(nome, None)
+        if tarefa:
+            tarefa.cancelada = True
+
+    def proximos_disparos(self):
+        """Retorna {nome: próximo instante} para inspeção/log."""
+        return {nome: t.proximo for nome, t in self._tarefas.items()}
+
+    def _enfileirar(self, tarefa: TarefaAgendada, instante):
+        tarefa.proximo = instante
+        if instante is None:
+            # Regra esgotada (ex.: disparo único): sai do agendador
+            if self._tarefas.get(tarefa.nome) is tarefa:
+                del self._tarefas[tarefa.nome]
+            self.logger.info(f"Regra '{tarefa.nome}' sem próximos disparos. Removida.")
+            return
+        heapq.heappush(self._fila, (instante, next(self._seq), tarefa))
+        self.logger.info(
+            f"Regra '{tarefa.nome}' agendada para {instante.strftime('%Y-%m-%d %H:%M:%S')}."
+        )
+        if self._acordar is not None:
+            self._acordar.set()
+
+    def iniciar(self, aguardar=None):
+        """
+        Inicia o laço do agendador. `aguardar` é uma corrotina opcional
+        (ex.: bot.wait_until_ready) executada antes do primeiro disparo.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._executar(aguardar))
+        return self._task
+
+    def parar(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _executar(self, aguardar=None):
+        self._acordar = asyncio.Event()
+        if aguardar is not None:
+            await aguardar()
+        if self.lideranca is None:
+            await self.recuperar_perdidos()
+        while True:
+            # Descarta entradas de tarefas canceladas ou reagendadas
+            while self._fila and (
+                self._fila[0][2].cancelada or self._fila[0][2].proximo != self._fila[0][0]
+            ):
+                heapq.heappop(self._fila)
+
+            self._acordar.clear()
+            if not self._fila:
+                await self._acordar.wait()
+                continue
+
+            instante, _, tarefa = self._fila[0]
+            atraso = (instante - get_now()).total_seconds()
+            if atraso > 0:
+                # Dorme até o disparo, acordando antes se uma regra nova entrar na fila
+                await relogio.atual().aguardar_evento(self._acordar, atraso)
+                continue
+
+            heapq.heappop(self._fila)
+            agora = get_now()
+            if tarefa.politica is not None and agora - instante > ATRASO_TOLERADO:
+                # O loop ficou parado (suspensão, reconexão longa): aplica a política
+                for perdido in tarefa.politica.perdidos(
+                    tarefa.regra, instante - datetime.timedelta(microseconds=1), agora
+                ):
+                    self._iniciar_disparo(tarefa, perdido, atrasado=True)
+                self._retomar(tarefa, agora)
+                continue
+
+            self._iniciar_disparo(tarefa, instante)
+            # Sem política, uma parada longa vira um único disparo (como no tasks.loop):
+            # o próximo é contado a partir de agora, não do instante atrasado
+            base = agora if agora - instante > ATRASO_TOLERADO else instante
+            self._enfileirar(tarefa, tarefa.regra.proximo_disparo(base))
+
+    async def recuperar_perdidos(self):
+        """Uma passada por todas as regras com política, com os últimos disparos gravados."""
+        if self.registro is None:
+            return
+        try:
+            ultimos = await self.registro.carregar()
+        except Exception as e:
+            self.logger.exception(f"Erro ao carregar os últimos disparos: {e}")
+            return
+        agora = get_now()
+        for tarefa in list(self._tarefas.values()):
+            ultimo = ultimos.get(tarefa.nome)
+            if tarefa.politica is None or ultimo is None:
+                continue
+            tarefa.ultimo_disparo = ultimo
+            for perdido in tarefa.politica.perdidos(tarefa.regra, ultimo, agora):
+                self._iniciar_disparo(tarefa, perdido, atrasado=perdido < agora - ATRASO_TOLERADO)
+            # O que venceu até agora já foi tratado acima
+            self._retomar(tarefa, agora)
+
+    def _retomar(self, tarefa: TarefaAgendada, agora):
+        """
+        Reenfileira depois de tratar os perdidos. Se o disparo do período
+        ficou fora da tolerância e nada foi executado desde então, vale o
+        disparo inicial da regra (ex.: janela ainda aberta no mesmo período);
+        senão, o próximo disparo regular.
+        """
+        proximo = tarefa.regra.proximo_disparo(agora)
+        inicial = tarefa.regra.disparo_inicial(agora)
+        ultimo = tarefa.ultimo_disparo
+        devido = None if ultimo is None else tarefa.regra.proximo_disparo(ultimo)
+        if (
+            inicial is not None
+            and (proximo is None or inicial < proximo)
+            and (ultimo is None or (devido is not None and devido <= inicial))
+        ):
+            proximo = inicial
+        self._enfileirar(tarefa, proximo)
+
+    def _iniciar_disparo(self, tarefa: TarefaAgendada, instante, atrasado: bool = False):
+        if atrasado:
+            self.logger.warning(
+                f"Disparo perdido da regra '{tarefa.nome}' "
+                f"({instante.strftime('%Y-%m-%d %H:%M:%S')}) executado com atraso "
+                f"(política '{tarefa.politica.modo}')."
+            )
+        tarefa.ultimo_disparo = instante
+        execucao = asyncio.ensure_future(self._disparar(tarefa, instante))
+        self._em_execucao.add(execucao)
+        execucao.add_done_callback(self._em_execucao.discard)
+
+    async def _disparar(self, tarefa: TarefaAgendada, instante):
+        if self.lideranca is not None and not self.lideranca.sou_lider():
+            metrics.DISPAROS_IGNORADOS.inc(task=tarefa.nome.split(":")[0])
+            return
+        if tarefa.politica is not None and self.registro is not None:
+            # Gravado antes da execução: um reinício no meio não repete o envio
+            try:
+                await self.registro.registrar(tarefa.nome, instante)
+            except Exception as e:
+                self.logger.exception(f"Erro ao gravar o disparo da regra '{tarefa.nome}': {e}")
+        # Regras únicas ("aviso:<id>") somam na métrica do prefixo
+        with metrics.TICK_SEGUNDOS.cronometrar(task=tarefa.nome.split(":")[0]):
+            try:
+                await tarefa.callback(instante)
+            except Exception as e:
+                self.logger.exception(f"Erro ao executar a regra '{tarefa.nome}': {e}")
@@ -0,0 +1,62 @@
+# shards.py
+
+import os
+
+# Divisão das guildas entre shards (conexões com o gateway) e entre
+# processos. Com AutoShardedBot em um único processo, todos os shards são
+# locais; para dividir entre processos, cada um recebe SHARD_COUNT (total)
+# e SHARD_IDS (os seus, ex.: "0,1" ou "0-3").
+
+
+def shard_da_guilda(guild_id: int, total: int) -> int:
+    """Shard de uma guilda (mesma fórmula do Discord)."""
+    return (guild_id >> 22) % total
+
+
+def interpretar_ids(texto: str):
+    """ "0,2" -> [0, 2]; "0-3" -> [0, 1, 2, 3]."""
+    ids = []
+    for parte in texto.split(","):
+        parte = parte.strip()
+        if "-" in parte:
+            inicio, fim = (int(n) for n in parte.split("-", 1))
+            ids.extend(range(inicio, fim + 1))
+        elif parte:
+            ids.append(int(parte))
+    return sorted(set(ids))
+
+
+def configuracao_ambiente(environ=os.environ) -> dict:
+    """
+    Argumentos de shard para o AutoShardedBot a partir de SHARD_COUNT e
+    SHARD_IDS. Sem variáveis, o discord.py escolhe o total e roda todos.
+    """
+    total = environ.get("SHARD_COUNT")
+    if not total:
+        return {}
+    total = int(total)
+    ids = interpretar_ids(environ["SHARD_IDS"]) if environ.get("SHARD_IDS") else None
+    if ids and not all(0 <= shard < total for shard in ids):
+        raise ValueError(f"SHARD_IDS fora do intervalo 0-{total - 1}: {ids}")
+    return {"shard_count": total, "shard_ids": ids}
+
+
+def shards_locais(bot):
+    """
+    (total, shards deste processo) quando os shards estão divididos entre
+    processos; None quando este processo roda todos.
+    """
+    total = getattr(bot, "shard_count", None)
+    ids = getattr(bot, "shard_ids", None)
+    if not total or ids is None or len(set(ids)) >= total:
+        return None
+    return total, frozenset(ids)
+
+
+def fracao_local(bot) -> float:
+    """Parte dos shards rodando neste processo (1.0 = todos)."""
+    locais = shards_locais(bot)
+    if locais is None:
+        return 1.0
+    total, ids = locais
+    return len(ids) / total
@@ -0,0 +1,258 @@
+# sheets.py
+
+import asyncio
+import datetime
+import functools
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import gspread
+from gspread.utils import ValueInputOption, rowcol_to_a1
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+import metrics
+from config import (
+    GOOGLE_SHEETS_CREDENTIALS,
+    GOOGLE_SHEETS_SPREADSHEET,
+    GOOGLE_SHEETS_WORKSHEET,
+)
+
+# Threads dedicadas ao Google Sheets: o gspread é síncrono, então toda chamada
+# roda aqui para nunca bloquear o event loop do discord.py (heartbeats etc.).
+SHEETS_MAX_WORKERS = 2
+# Tempo máximo (s) de uma requisição HTTP ao Google e de uma chamada completa.
+SHEETS_HTTP_TIMEOUT = 30
+SHEETS_CALL_TIMEOUT = 60
+
+# Colunas lidas da worksheet de avisos e tamanho da janela de leitura (linhas)
+COLUNAS_AVISOS = ("ID", "Canal_ID", "Mensagem", "Data", "Enviado")
+COLUNAS_OPCIONAIS_AVISOS = ("Hora",)
+TAMANHO_JANELA = 500
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+_executor = ThreadPoolExecutor(
+    max_workers=SHEETS_MAX_WORKERS, thread_name_prefix="google_sheets"
+)
+
+
+async def executar(func, *args, **kwargs):
+    """
+    Executa uma chamada síncrona do gspread no pool de threads do Sheets.
+    Levanta asyncio.TimeoutError se a chamada passar de SHEETS_CALL_TIMEOUT.
+    """
+    loop = asyncio.get_running_loop()
+    futuro = loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    return await asyncio.wait_for(futuro, timeout=SHEETS_CALL_TIMEOUT)
+
+
+class ClienteSheets:
+    """
+    Cliente de longa duração do Google Sheets. Credenciais, cliente gspread,
+    planilha e worksheet são criados sob demanda uma única vez e reutilizados;
+    o token OAuth só é renovado perto de expirar e a reconexão completa só
+    acontece após uma falha real de autenticação.
+    """
+
+    # Renova o token quando faltar menos que isso para expirar
+    MARGEM_RENOVACAO = datetime.timedelta(minutes=5)
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger or logging.getLogger("discord_bot.sheets")
+        self._creds = None
+        self._client = None
+        self._planilha = None
+        self._worksheet = None
+        self._mapa_colunas = None  # cabeçalho -> número da coluna (1-based)
+        self._lock = threading.Lock()
+        self.reconexoes = 0
+        self.renovacoes_token = 0
+
+    # ---- Métodos síncronos (sempre executados no pool de threads) ----
+    def _credenciais(self):
+        if self._creds is None:
+            self._creds = Credentials.from_service_account_file(
+                GOOGLE_SHEETS_CREDENTIALS, scopes=SCOPES
+            )
+        return self._creds
+
+    def _garantir_token(self):
+        creds = self._credenciais()
+        expira = creds.expiry  # datetime UTC ingênuo (google-auth)
+        agora = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        if not creds.token or expira is None or expira - agora < self.MARGEM_RENOVACAO:
+            creds.refresh(Request())
+            self.renovacoes_token += 1
+            self.logger.info("Token OAuth do Google Sheets renovado.")
+
+    def _conectar(self):
+        with self._lock:
+            return self._conectar_sem_lock()
+
+    def _conectar_sem_lock(self):
+        self._garantir_token()
+        if self._worksheet is None:
+            self._client = gspread.authorize(self._credenciais())
+            # Evita que uma requisição travada prenda uma thread do pool indefinidamente
+            self._client.set_timeout(SHEETS_HTTP_TIMEOUT)
+            self._planilha = self._client.open(GOOGLE_SHEETS_SPREADSHEET)
+            self._worksheet = self._planilha.worksheet(GOOGLE_SHEETS_WORKSHEET)
+            self.logger.info("Conexão com o Google Sheets estabelecida.")
+        return self._worksheet
+
+    def _descartar(self):
+        self._creds = None
+        self._client = None
+        self._planilha = None
+        self._worksheet = None
+        self._mapa_colunas = None
+
+    def _com_reconexao(self, acao):
+        try:
+            return acao(self._conectar())
+        except Exception as e:
+            if not falha_de_autenticacao(e):
+                raise
+            # Credencial revogada/expirada: refaz o handshake completo uma vez
+            self.logger.warning(f"Falha de autenticação no Google Sheets: {e}. Reconectando.")
+            with self._lock:
+                self._descartar()
+                self.reconexoes += 1
+            return acao(self._conectar())
+
+    def _chamar(self, metodo: str, *args, **kwargs):
+        return self._com_reconexao(
+            lambda worksheet: getattr(worksheet, metodo)(*args, **kwargs)
+        )
+
+    # ---- API assíncrona ----
+    async def executar(self, metodo: str, *args, **kwargs):
+        """
+        Executa `worksheet.<metodo>(*args, **kwargs)` fora do event loop,
+        reutilizando a conexão existente.
+        """
+        with metrics.SHEETS_SEGUNDOS.cronometrar(method=metodo):
+            return await executar(self._chamar, metodo, *args, **kwargs)
+
+    async def ultima_modificacao(self) -> str:
+        """
+        modifiedTime da planilha (API do Drive). É uma chamada leve, usada
+        para pular a leitura completa quando nada mudou.
+        """
+        with metrics.SHEETS_SEGUNDOS.cronometrar(method="get_lastUpdateTime"):
+            return await executar(
+                self._com_reconexao,
+                lambda worksheet: worksheet.spreadsheet.get_lastUpdateTime(),
+            )
+
+    async def atualizar_celulas(self, linhas, coluna: int, valor: str):
+        """
+        Grava `valor` na coluna `coluna` de todas as `linhas` em uma única
+        requisição (batch_update), independente da quantidade de linhas.
+        O valor é interpretado como se fosse digitado (USER_ENTERED, como o
+        update_cell): "TRUE" vira booleano, e caixas de seleção continuam valendo.
+        """
+        if not linhas:
+            return
+        atualizacoes = [
+            {"range": rowcol_to_a1(linha, coluna), "values": [[valor]]}
+            for linha in sorted(set(linhas))
+        ]
+        await self.executar(
+            "batch_update", atualizacoes, value_input_option=ValueInputOption.user_entered
+        )
+
+    async def valores_nas_linhas(self, linhas, coluna: int):
+        """{linha: valor} da coluna `coluna` nas `linhas`, em uma única requisição."""
+        linhas = sorted(set(linhas))
+        if not linhas:
+            return {}
+        blocos = await self.executar(
+            "batch_get",
+            [f"{rowcol_to_a1(linha, coluna)}:{rowcol_to_a1(linha, coluna)}" for linha in linhas],
+        )
+        return {
+            linha: bloco[0][0] if bloco and bloco[0] else ""
+            for linha, bloco in zip(linhas, blocos)
+        }
+
+    async def mapa_colunas(self, recarregar: bool = False):
+        """Mapa cabeçalho -> coluna, lido uma vez e mantido em cache."""
+        if self._mapa_colunas is None or recarregar:
+            cabecalho = await self.executar("row_values", 1)
+            self._mapa_colunas = {
+                nome: indice for indice, nome in enumerate(cabecalho, start=1) if nome
+            }
+        return self._mapa_colunas
+
+    async def coluna(self, nome: str) -> int:
+        """Número (1-based) da coluna `nome`; ValueError se não existir."""
+        mapa = await self.mapa_colunas()
+        if nome not in mapa:
+            mapa = await self.mapa_colunas(recarregar=True)
+        if nome not in mapa:
+            raise ValueError(f"Coluna '{nome}' não encontrada no cabeçalho da planilha.")
+        return mapa[nome]
+
+    async def ler_registros(
+        self,
+        colunas=COLUNAS_AVISOS,
+        opcionais=COLUNAS_OPCIONAIS_AVISOS,
+        tamanho_janela=TAMANHO_JANELA,
+    ):
+        """
+        Gerador assíncrono de (linha, registro) lendo apenas `colunas` (e as
+        `opcionais` que existirem no cabeçalho), em janelas de
+        `tamanho_janela` linhas (uma requisição batch_get por janela).
+        Memória e tráfego ficam limitados a uma janela por vez.
+        A leitura termina na primeira janela sem nenhuma linha preenchida.
+        """
+        numeros = [await self.coluna(nome) for nome in colunas]
+        mapa = await self.mapa_colunas()
+        presentes = [nome for nome in opcionais if nome in mapa]
+        colunas = list(colunas) + presentes
+        numeros += [mapa[nome] for nome in presentes]
+        inicio = 2  # a linha 1 é o cabeçalho
+        while True:
+            fim = inicio + tamanho_janela - 1
+            intervalos = [
+                f"{rowcol_to_a1(inicio, numero)}:{rowcol_to_a1(fim, numero)}"
+                for numero in numeros
+            ]
+            blocos = await self.executar("batch_get", intervalos)
+            valores = [[celulas[0] if celulas else "" for celulas in bloco] for bloco in blocos]
+            total = max((len(coluna) for coluna in valores), default=0)
+            if total == 0:
+                return
+            metrics.SHEETS_LINHAS.inc(total)
+            for deslocamento in range(total):
+                registro = {
+                    nome: coluna[deslocamento] if deslocamento < len(coluna) else ""
+                    for nome, coluna in zip(colunas, valores)
+                }
+                yield inicio + deslocamento, registro
+            # Uma janela "curta" não é o fim: a API omite as linhas em branco
+            # do fim de cada intervalo, e pode haver linhas preenchidas depois
+            inicio = fim + 1
+
+
+def hash_registro(registro) -> bytes:
+    """Assinatura compacta do conteúdo de uma linha, para detectar alterações."""
+    conteudo = "\x1f".join(str(valor) for valor in registro.values())
+    return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=8).digest()
+
+
+def falha_de_autenticacao(erro: Exception) -> bool:
+    """Indica se o erro é uma falha real de autenticação (e não de rede/cota)."""
+    if isinstance(erro, RefreshError):
+        return True
+    if isinstance(erro, gspread.exceptions.APIError):
+        return getattr(erro.response, "status_code", None) == 401
+    return False
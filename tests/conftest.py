@@ -0,0 +1,87 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+# database.py cria o banco no diretório atual ao ser importado: os testes
+# rodam em um diretório descartável e nunca tocam no bot_database.db real
+os.chdir(tempfile.mkdtemp(prefix="testes_bot_"))
+
+import relogio  # noqa: E402
+
+
+@pytest.fixture
+def relogio_virtual():
+    """Instala um RelogioVirtual e devolve uma fábrica: relogio_virtual(inicio)."""
+
+    def instalar(inicio):
+        virtual = relogio.RelogioVirtual(inicio)
+        relogio.definir(virtual)
+        return virtual
+
+    yield instalar
+    relogio.definir(relogio.Relogio())
+
+
+async def _avancar_ate(virtual, fim):
+    from benchmarks.replay import _aguardar_ociosidade
+
+    while True:
+        await _aguardar_ociosidade()
+        proximo = virtual.proximo()
+        if proximo is None or proximo > fim:
+            break
+        virtual.avancar()
+    await _aguardar_ociosidade()
+
+
+@pytest.fixture
+def avancar_ate():
+    """`await avancar_ate(virtual, fim)`: salta de espera em espera até `fim` (como o replay)."""
+    return _avancar_ate
+
+
+@pytest.fixture(autouse=True)
+def banco_limpo():
+    """Cada teste começa com todas as tabelas vazias."""
+    from database import session_scope
+    from models import Base
+
+    with session_scope() as session:
+        for tabela in reversed(Base.metadata.sorted_tables):
+            session.execute(tabela.delete())
+    yield
+
+
+@pytest.fixture
+def criar_cog():
+    """
+    `criar_cog(linhas)`, chamado dentro do event loop: TasksCog sobre o bot
+    falso e uma worksheet falsa com `linhas`. O agendador fica parado; o
+    teste chama as tasks diretamente.
+    """
+    import logging
+
+    from benchmarks.bench import CABECALHO
+    from benchmarks.falsos import BotFalso, ClienteSheetsFalso, WorksheetFalsa
+    from benchmarks.replay import canais_configurados
+    from cogs.tasks_cog import TasksCog
+
+    def criar(linhas=()):
+        bot = BotFalso(latencia=0, relogio=relogio.atual().agora)
+        for canal_id in canais_configurados():
+            bot.criar_canal(canal_id)
+        cog = TasksCog(bot, logging.getLogger("discord_bot"))
+        cog.agendador.parar()
+        cog.monitor_loop.parar()
+        cog.sheets = ClienteSheetsFalso(WorksheetFalsa(CABECALHO, linhas, latencia=0))
+        return cog
+
+    return criar
@@ -0,0 +1,146 @@
+# tests/test_avisos.py
+
+import asyncio
+import datetime
+
+import avisos
+import relogio
+from database import executar_db
+
+CANAL = 555
+ENVIO = avisos.localizar(datetime.date(2026, 4, 14), datetime.time(10))
+
+
+def linha(aviso_id, mensagem, enviado=""):
+    return [aviso_id, str(CANAL), mensagem, "2026-04-14", "10:00", enviado]
+
+
+def test_linha_apagada_nao_envia_o_aviso_nem_marca_o_vizinho(relogio_virtual, criar_cog):
+    relogio_virtual(datetime.datetime(2026, 4, 14, 8, tzinfo=datetime.timezone.utc))
+
+    async def cenario():
+        cog = criar_cog([linha("A", "a"), linha("B", "b"), linha("C", "c")])
+        cog.bot.criar_canal(CANAL)
+        worksheet = cog.sheets.worksheet_falsa
+        await cog.sincronizar_avisos()
+
+        # Apaga a linha do aviso A: B e C sobem uma linha
+        del worksheet.linhas[0]
+        worksheet.versao += 1
+        await cog.sincronizar_avisos()
+        devidos = await executar_db(avisos.avisos_devidos, datetime.date(2026, 4, 14))
+
+        await cog.enviar_aviso_excel(ENVIO, "B")
+        await cog.gravar_enviados_na_planilha()
+        return devidos, worksheet
+
+    devidos, worksheet = asyncio.run(cenario())
+    assert [(aviso.aviso_id, aviso.linha) for aviso in devidos] == [("B", 2), ("C", 3)]
+    assert [(celulas[0], celulas[-1]) for celulas in worksheet.linhas] == [
+        ("B", "TRUE"),
+        ("C", ""),
+    ]
+
+
+def test_marcacao_espera_a_releitura_quando_a_linha_mudou(relogio_virtual, criar_cog):
+    relogio_virtual(datetime.datetime(2026, 4, 14, 8, tzinfo=datetime.timezone.utc))
+
+    async def cenario():
+        cog = criar_cog([linha("A", "a"), linha("B", "b")])
+        cog.bot.criar_canal(CANAL)
+        worksheet = cog.sheets.worksheet_falsa
+        await cog.sincronizar_avisos()
+        await cog.enviar_aviso_excel(ENVIO, "B")
+
+        # Linha acima apagada antes da gravação do "Enviado"
+        del worksheet.linhas[0]
+        worksheet.versao += 1
+        await cog.gravar_enviados_na_planilha()
+        antes = [celulas[-1] for celulas in worksheet.linhas]
+        await cog.sincronizar_avisos()
+        await cog.gravar_enviados_na_planilha()
+        return antes, worksheet
+
+    antes, worksheet = asyncio.run(cenario())
+    assert antes == [""]
+    assert [(celulas[0], celulas[-1]) for celulas in worksheet.linhas] == [("B", "TRUE")]
+
+
+def test_falha_no_banco_nao_congela_as_linhas_alteradas(relogio_virtual, criar_cog, monkeypatch):
+    relogio_virtual(datetime.datetime(2026, 4, 14, 8, tzinfo=datetime.timezone.utc))
+
+    async def cenario():
+        cog = criar_cog([linha("A", "a")])
+        worksheet = cog.sheets.worksheet_falsa
+        await cog.sincronizar_avisos()
+        worksheet.alterar(2, "Mensagem", "a2")
+
+        original = avisos.aplicar_sincronizacao
+
+        def falhar(*args, **kwargs):
+            raise RuntimeError("banco indisponível")
+
+        monkeypatch.setattr(avisos, "aplicar_sincronizacao", falhar)
+        try:
+            await cog.sincronizar_avisos()
+        except RuntimeError:
+            pass
+        monkeypatch.setattr(avisos, "aplicar_sincronizacao", original)
+        await cog.sincronizar_avisos()
+        return await executar_db(avisos.buscar_aviso, "A")
+
+    assert asyncio.run(cenario()).mensagem == "a2"
+
+
+def test_data_adiada_cancela_o_disparo_antigo(relogio_virtual, criar_cog):
+    relogio_virtual(datetime.datetime(2026, 4, 14, 8, tzinfo=datetime.timezone.utc))
+    novo = avisos.localizar(datetime.date(2026, 4, 15), datetime.time(10))
+
+    async def cenario():
+        cog = criar_cog([linha("A", "a")])
+        canal = cog.bot.criar_canal(CANAL)
+        worksheet = cog.sheets.worksheet_falsa
+        await cog.sincronizar_avisos_task(relogio.atual().agora())
+        agendado = cog.agendador.tarefa("aviso:A").proximo
+
+        worksheet.alterar(2, "Data", "2026-04-15")
+        await cog.sincronizar_avisos_task(relogio.atual().agora())
+        depois = cog.agendador.tarefa("aviso:A")
+        # Um disparo antigo que já estivesse em curso também não envia
+        await cog.enviar_aviso_excel(ENVIO, "A")
+        antes_da_data = list(canal.mensagens)
+
+        await cog.enviar_aviso_excel(novo, "A")
+        return agendado, depois, antes_da_data, canal.mensagens
+
+    agendado, depois, antes_da_data, mensagens = asyncio.run(cenario())
+    assert agendado == ENVIO
+    assert depois is None
+    assert antes_da_data == []
+    assert [conteudo for _, conteudo in mensagens] == ["a"]
+
+
+def test_sincronizacao_em_lote_insere_atualiza_e_respeita_o_enviado(relogio_virtual, criar_cog):
+    relogio_virtual(datetime.datetime(2026, 4, 14, 8, tzinfo=datetime.timezone.utc))
+
+    async def cenario():
+        cog = criar_cog([linha("A", "a"), linha("B", "b", "TRUE")])
+        worksheet = cog.sheets.worksheet_falsa
+        await cog.sincronizar_avisos()
+        primeira = await executar_db(avisos.avisos_devidos, datetime.date(2026, 4, 14))
+
+        # B tem o "Enviado" limpo; A muda de texto; C é novo
+        worksheet.alterar(3, "Enviado", "")
+        worksheet.alterar(2, "Mensagem", "a2")
+        worksheet.linhas.append(linha("C", "c"))
+        await cog.sincronizar_avisos()
+        segunda = await executar_db(avisos.avisos_devidos, datetime.date(2026, 4, 14))
+        return primeira, segunda
+
+    primeira, segunda = asyncio.run(cenario())
+    assert [aviso.aviso_id for aviso in primeira] == ["A"]
+    assert [(aviso.aviso_id, aviso.linha, aviso.mensagem) for aviso in segunda] == [
+        ("A", 2, "a2"),
+        ("B", 3, "b"),
+        ("C", 4, "c"),
+    ]
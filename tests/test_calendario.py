@@ -0,0 +1,82 @@
+# tests/test_calendario.py
+
+import datetime
+
+from calendario import Calendario, feriados_nacionais, pascoa
+from scheduler import MESES_EM_CACHE, RegraDiaUtil, RegraHorarios, localizar
+
+NOVE = datetime.time(9)
+
+
+def quando(ano, mes, dia, hora=0, minuto=0):
+    return localizar(datetime.date(ano, mes, dia), datetime.time(hora, minuto))
+
+
+def sequencia(regra, depois, quantidade):
+    disparos = []
+    for _ in range(quantidade):
+        depois = regra.proximo_disparo(depois)
+        disparos.append(depois)
+    return disparos
+
+
+def test_feriados_moveis_e_consciencia_negra():
+    assert pascoa(2026) == datetime.date(2026, 4, 5)
+    assert datetime.date(2026, 4, 3) in feriados_nacionais(2026)  # Sexta-feira Santa
+    assert datetime.date(2023, 11, 20) not in feriados_nacionais(2023)
+    assert datetime.date(2024, 11, 20) in feriados_nacionais(2024)
+
+
+def test_enesimo_dia_util_com_feriados_extras():
+    calendario = Calendario([datetime.date(2026, 4, 1)])
+    assert calendario.enesimo_dia_util(2026, 4, 1) == datetime.date(2026, 4, 2)
+    assert calendario.enesimo_dia_util(2026, 4, -1) == datetime.date(2026, 4, 30)
+    assert calendario.enesimo_dia_util(2026, 4, 40) is None
+    # 1º de maio (sexta) é feriado: o primeiro dia útil é segunda, dia 4
+    assert Calendario().enesimo_dia_util(2026, 5, 1) == datetime.date(2026, 5, 4)
+
+
+def test_regra_dia_util_atravessa_meses():
+    regra = RegraDiaUtil([NOVE], [1, -1], Calendario())
+    assert sequencia(regra, quando(2026, 3, 31, 12), 3) == [
+        quando(2026, 4, 1, 9),
+        quando(2026, 4, 30, 9),
+        quando(2026, 5, 4, 9),
+    ]
+
+
+def test_regra_horarios_so_em_dias_uteis_pula_feriado():
+    regra = RegraHorarios([NOVE, datetime.time(18)], calendario=Calendario())
+    assert sequencia(regra, quando(2026, 4, 20, 10), 3) == [
+        quando(2026, 4, 20, 18),
+        quando(2026, 4, 22, 9),  # 21/04 (Tiradentes) pulado
+        quando(2026, 4, 22, 18),
+    ]
+
+
+def test_proximo_disparo_e_estritamente_depois():
+    regra = RegraHorarios([NOVE])
+    assert regra.proximo_disparo(quando(2026, 4, 14, 9)) == quando(2026, 4, 15, 9)
+    assert regra.proximo_disparo(quando(2026, 4, 14, 8, 59)) == quando(2026, 4, 14, 9)
+
+
+def test_dia_inexistente_em_alguns_meses():
+    regra = RegraHorarios([NOVE], dias_do_mes=[31])
+    assert sequencia(regra, quando(2026, 1, 31, 10), 2) == [
+        quando(2026, 3, 31, 9),
+        quando(2026, 5, 31, 9),
+    ]
+
+
+def test_tabelas_mensais_em_cache_limitado():
+    regra = RegraHorarios([NOVE])
+    sequencia(regra, quando(2026, 1, 1), 200)
+    assert len(regra._tabelas) <= MESES_EM_CACHE
+
+
+def test_horario_inexistente_no_inicio_do_horario_de_verao():
+    # 04/11/2018: à meia-noite os relógios de São Paulo pularam para 01:00
+    regra = RegraHorarios([datetime.time(0, 0)])
+    disparo = regra.proximo_disparo(quando(2018, 11, 3, 12))
+    assert (disparo.hour, disparo.utcoffset()) == (1, datetime.timedelta(hours=-2))
+    assert regra.proximo_disparo(disparo) == quando(2018, 11, 5)
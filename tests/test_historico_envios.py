@@ -0,0 +1,151 @@
+# tests/test_historico_envios.py
+
+import asyncio
+import datetime
+
+import pytest
+
+import avisos
+import historico_envios
+from cogs import tasks_cog
+from database import executar_db, salvar_setting
+from scheduler import localizar
+
+CANAL = 555
+
+
+def quando(ano, mes, dia, hora=0, minuto=0):
+    return localizar(datetime.date(ano, mes, dia), datetime.time(hora, minuto))
+
+
+def test_reservar_confirmar_e_desfazer(relogio_virtual):
+    agora = quando(2026, 4, 15, 9)
+    relogio_virtual(agora)
+
+    async def cenario():
+        historico = historico_envios.HistoricoEnvios()
+        await historico.carregar(agora)
+        assert historico.reservar("r", "2026-04-15", 1)
+        assert not historico.reservar("r", "2026-04-15", 1)  # em envio
+        historico.desfazer("r", "2026-04-15", 1)  # o envio falhou
+        assert historico.reservar("r", "2026-04-15", 1)
+        assert historico.em_envio("r", "2026-04-15", 1)
+        await historico.confirmar("r", "2026-04-15", 1, None, agora)
+        assert not historico.em_envio("r", "2026-04-15", 1)
+
+        # Outro processo (reinício) lê a chave do banco
+        novo = historico_envios.HistoricoEnvios()
+        await novo.carregar(agora)
+        return novo
+
+    novo = asyncio.run(cenario())
+    assert novo.ja_enviado("r", "2026-04-15", 1)
+    assert not novo.reservar("r", "2026-04-15", 1)
+    assert novo.reservar("r", "2026-04-16", 1)
+
+
+def test_recarregar_mantem_reservas_em_andamento(relogio_virtual):
+    agora = quando(2026, 4, 15, 9)
+    relogio_virtual(agora)
+
+    async def cenario():
+        historico = historico_envios.HistoricoEnvios()
+        historico.reservar("r", "p", 1)
+        await historico.carregar(agora)  # ex.: assumir a liderança no meio do envio
+        return historico.reservar("r", "p", 1)
+
+    assert asyncio.run(cenario()) is False
+
+
+def test_envio_que_falha_libera_a_chave(relogio_virtual, criar_cog):
+    agora = quando(2026, 4, 15, 9)
+    relogio_virtual(agora)
+
+    async def cenario():
+        cog = criar_cog()
+        canal = cog.bot.criar_canal(CANAL)
+        envio_real = canal.send
+
+        async def falhar(*args, **kwargs):
+            raise RuntimeError("Discord indisponível")
+
+        canal.send = falhar
+        with pytest.raises(RuntimeError):
+            await cog.enviar_uma_vez("regra", "p", canal, "oi", agora)
+        canal.send = envio_real
+        primeira = await cog.enviar_uma_vez("regra", "p", canal, "oi", agora)
+        segunda = await cog.enviar_uma_vez("regra", "p", canal, "oi", agora)
+        return primeira, segunda, canal
+
+    primeira, segunda, canal = asyncio.run(cenario())
+    assert primeira is not None and segunda is None
+    assert len(canal.mensagens) == 1
+
+
+def test_quinzenal_com_erro_nas_settings_nao_prende_reservas(
+    relogio_virtual, criar_cog, monkeypatch
+):
+    agora = quando(2026, 4, 15, 9)
+    relogio_virtual(agora)
+    monkeypatch.setattr(tasks_cog, "CHANNEL_IDS", [701, 702])
+
+    async def cenario():
+        cog = criar_cog()
+        for canal_id in (701, 702):
+            cog.bot.criar_canal(canal_id)
+        obter = cog.settings.obter
+
+        async def falhar(*args, **kwargs):
+            raise RuntimeError("banco indisponível")
+
+        cog.settings.obter = falhar
+        await cog.quinzenal_message_task(agora)
+        cog.settings.obter = obter
+        await cog.quinzenal_message_task(agora)
+        await cog.quinzenal_message_task(agora)  # mesmo período: nada sai
+        return cog
+
+    cog = asyncio.run(cenario())
+    assert [len(cog.bot.canais[canal_id].mensagens) for canal_id in (701, 702)] == [1, 1]
+
+
+def test_settings_antigas_entram_no_historico(relogio_virtual, criar_cog):
+    agora = quando(2026, 4, 15, 10)  # semana ISO 16, abril
+    relogio_virtual(agora)
+
+    async def cenario():
+        await executar_db(salvar_setting, "last_week_sent", "16")
+        await executar_db(salvar_setting, "last_month_oracle_sent", "3")  # mês passado
+        cog = criar_cog()
+        await cog.preparar()
+        await cog.semanal_message_task(agora)
+        await cog.oracle_configuracao_task(agora)
+        restantes = await cog.settings.obter("last_week_sent")
+        return cog, restantes
+
+    cog, restantes = asyncio.run(cenario())
+    canal = cog.bot.canais[tasks_cog.AVISOS_GERAIS_CANAL]
+    # Só o Oracle sai: a semanal desta semana já tinha sido enviada
+    assert len(canal.mensagens) == 1
+    assert restantes is None
+
+
+def test_aviso_reagendado_durante_o_envio_sai_uma_vez(relogio_virtual, criar_cog):
+    agora = quando(2026, 4, 14, 10)
+    relogio_virtual(agora)
+    linha = ["A", str(CANAL), "aviso", "2026-04-14", "10:00", ""]
+
+    async def cenario():
+        cog = criar_cog([linha])
+        canal = cog.bot.criar_canal(CANAL)
+        await cog.sincronizar_avisos()
+        # Dois disparos do mesmo aviso ao mesmo tempo (reagendado na sincronização)
+        await asyncio.gather(
+            cog.enviar_aviso_excel(agora, "A"), cog.enviar_aviso_excel(agora, "A")
+        )
+        aviso = await executar_db(avisos.buscar_aviso, "A")
+        return canal, aviso
+
+    canal, aviso = asyncio.run(cenario())
+    assert len(canal.mensagens) == 1
+    assert aviso.sent
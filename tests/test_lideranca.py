@@ -0,0 +1,138 @@
+# tests/test_lideranca.py
+
+import asyncio
+import datetime
+
+import lideranca
+from database import executar_db
+from scheduler import Agendador, PoliticaAtraso, RegraHorarios, localizar
+
+SEGUNDO = datetime.timedelta(seconds=1)
+
+
+def quando(ano, mes, dia, hora=0, minuto=0, segundo=0):
+    return localizar(datetime.date(ano, mes, dia), datetime.time(hora, minuto, segundo))
+
+
+class RegistroMemoria:
+    def __init__(self):
+        self.ultimos = {}
+
+    async def carregar(self):
+        return dict(self.ultimos)
+
+    async def registrar(self, nome, instante):
+        self.ultimos[nome] = instante
+
+
+def test_concessao_no_sqlite_so_troca_de_dono_apos_expirar(relogio_virtual):
+    agora = quando(2026, 4, 14, 9)
+    relogio_virtual(agora)
+    duracao = lideranca.DURACAO
+
+    async def adquirir(dono, instante):
+        return await executar_db(
+            lideranca.adquirir_lideranca, "teste", dono, instante, instante + duracao
+        )
+
+    async def cenario():
+        return [
+            await adquirir("a", agora),
+            await adquirir("b", agora + SEGUNDO),  # a ainda é a dona
+            await adquirir("a", agora + 5 * SEGUNDO),  # renovação
+            await adquirir("b", agora + duracao + 6 * SEGUNDO),  # a parou de renovar
+            await adquirir("a", agora + duracao + 7 * SEGUNDO),
+        ]
+
+    assert asyncio.run(cenario()) == [True, False, True, True, False]
+
+
+def test_liberar_deixa_a_outra_instancia_assumir_na_hora(relogio_virtual):
+    agora = quando(2026, 4, 14, 9)
+    relogio_virtual(agora)
+    expira = agora + lideranca.DURACAO
+
+    async def cenario():
+        await executar_db(lideranca.adquirir_lideranca, "teste", "a", agora, expira)
+        await executar_db(lideranca.liberar_lideranca, "teste", "b")  # não é a dona: nada muda
+        antes = await executar_db(lideranca.adquirir_lideranca, "teste", "b", agora, expira)
+        await executar_db(lideranca.liberar_lideranca, "teste", "a")
+        depois = await executar_db(lideranca.adquirir_lideranca, "teste", "b", agora, expira)
+        return antes, depois
+
+    assert asyncio.run(cenario()) == (False, True)
+
+
+def test_failover_recupera_o_disparo_sem_duplicar(relogio_virtual, avancar_ate):
+    # A líder cai às 08:59:40; a outra instância assume e envia o das 09:00 uma vez
+    virtual = relogio_virtual(quando(2026, 4, 14, 8, 59))
+    backend = lideranca.BackendLocal()
+    registro = RegistroMemoria()
+    disparos = []
+
+    def instancia(dono):
+        eleicao = lideranca.Eleicao("agendador", backend, dono=dono)
+        agendador = Agendador(registro=registro, lideranca=eleicao)
+
+        async def callback(instante):
+            disparos.append((dono, instante))
+
+        agendador.agendar(
+            "diaria",
+            RegraHorarios([datetime.time(9)]),
+            callback,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=1)),
+        )
+        agendador.iniciar()
+        eleicao.iniciar(agendador.recuperar_perdidos)
+        return eleicao, agendador
+
+    async def cenario():
+        lider, agendador_lider = instancia("a")
+        await avancar_ate(virtual, virtual.agora())
+        reserva, agendador_reserva = instancia("b")
+        await avancar_ate(virtual, quando(2026, 4, 14, 8, 59, 40))
+        assert lider.sou_lider() and not reserva.sou_lider()
+
+        # Queda: sem liberar a concessão
+        lider._task.cancel()
+        agendador_lider.parar()
+        await avancar_ate(virtual, quando(2026, 4, 15, 9, 0, 30))
+        estado = reserva.sou_lider()
+        reserva.parar()
+        agendador_reserva.parar()
+        return estado
+
+    assert asyncio.run(cenario()) is True
+    assert disparos == [
+        ("b", quando(2026, 4, 14, 9)),
+        ("b", quando(2026, 4, 15, 9)),
+    ]
+
+
+def test_sem_queda_so_a_lider_dispara(relogio_virtual, avancar_ate):
+    virtual = relogio_virtual(quando(2026, 4, 14, 8))
+    backend = lideranca.BackendLocal()
+    disparos = []
+
+    async def cenario():
+        instancias = []
+        for dono in ("a", "b"):
+            eleicao = lideranca.Eleicao("agendador", backend, dono=dono)
+            agendador = Agendador(lideranca=eleicao)
+
+            async def callback(instante, dono=dono):
+                disparos.append(dono)
+
+            agendador.agendar("diaria", RegraHorarios([datetime.time(9)]), callback)
+            agendador.iniciar()
+            eleicao.iniciar()
+            instancias.append((eleicao, agendador))
+            await avancar_ate(virtual, virtual.agora())
+        await avancar_ate(virtual, quando(2026, 4, 17, 8))
+        for eleicao, agendador in instancias:
+            eleicao.parar()
+            agendador.parar()
+
+    asyncio.run(cenario())
+    assert disparos == ["a", "a", "a"]
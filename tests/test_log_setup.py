@@ -0,0 +1,88 @@
+# tests/test_log_setup.py
+
+import gzip
+import logging
+import os
+import time
+
+import log_setup
+
+
+def _esperar_compactacao():
+    log_setup._compressor.submit(lambda: None).result()
+
+
+def test_rotacoes_seguidas_nao_perdem_logs(tmp_path, monkeypatch):
+    # Compactação lenta: a segunda rotação acontece antes de a primeira terminar
+    original = log_setup._comprimir
+
+    def comprimir_devagar(origem, destino):
+        time.sleep(0.2)
+        original(origem, destino)
+
+    monkeypatch.setattr(log_setup, "_comprimir", comprimir_devagar)
+    caminho = str(tmp_path / "teste.log")
+    handler = log_setup.RotatingGzipHandler(
+        caminho, maxBytes=10**9, backupCount=5, encoding="utf-8"
+    )
+    for texto in ("primeiro", "segundo"):
+        handler.emit(logging.LogRecord("t", logging.INFO, __file__, 0, texto, None, None))
+        handler.doRollover()
+    handler.close()
+    _esperar_compactacao()
+
+    with gzip.open(caminho + ".1.gz", "rt", encoding="utf-8") as arquivo:
+        assert arquivo.read().strip() == "segundo"
+    with gzip.open(caminho + ".2.gz", "rt", encoding="utf-8") as arquivo:
+        assert arquivo.read().strip() == "primeiro"
+    assert sorted(os.listdir(tmp_path)) == ["teste.log", "teste.log.1.gz", "teste.log.2.gz"]
+
+
+def test_nome_temporario_unico_por_rotacao(tmp_path, monkeypatch):
+    pendentes = []
+    monkeypatch.setattr(log_setup, "_comprimir", lambda *args: pendentes.append(args))
+    caminho = str(tmp_path / "teste.log")
+    handler = log_setup.RotatingGzipHandler(caminho, maxBytes=10**9, backupCount=5, encoding="utf-8")
+    for texto in ("a", "b"):
+        handler.emit(logging.LogRecord("t", logging.INFO, __file__, 0, texto, None, None))
+        handler.doRollover()
+    handler.close()
+    _esperar_compactacao()
+    temporarios = [argumentos[0] for argumentos in pendentes]
+    assert len(set(temporarios)) == 2
+    assert all(os.path.exists(temporario) for temporario in temporarios)
+
+
+def test_filtro_de_repeticao_e_opcional_e_nao_altera_o_registro():
+    registros = []
+
+    class Coletor(logging.Handler):
+        def emit(self, record):
+            registros.append(record)
+
+    sem_filtro = log_setup._HandlerFila("teste_sem_filtro")
+    com_filtro = log_setup._HandlerFila("teste_com_filtro", janela_repeticao=600)
+    outro = Coletor()
+    logger = logging.getLogger("teste_log_setup")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in (sem_filtro, com_filtro, outro):
+        logger.addHandler(handler)
+    enfileirados = {"teste_sem_filtro": [], "teste_com_filtro": []}
+    for handler in (sem_filtro, com_filtro):
+        handler.enqueue = lambda record, h=handler: enfileirados[h.destino].append(record)
+    try:
+        for _ in range(3):
+            logger.info("mesma mensagem")
+        com_filtro.repeticao._vistas["mesma mensagem"][0] -= 601  # janela passou
+        logger.info("mesma mensagem")
+    finally:
+        for handler in (sem_filtro, com_filtro, outro):
+            logger.removeHandler(handler)
+
+    assert len(enfileirados["teste_sem_filtro"]) == 4
+    assert [r.msg for r in enfileirados["teste_com_filtro"]] == [
+        "mesma mensagem",
+        "mesma mensagem (repetida 2 vez(es) desde o último registro)",
+    ]
+    assert [r.getMessage() for r in registros] == ["mesma mensagem"] * 4
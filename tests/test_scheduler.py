@@ -0,0 +1,191 @@
+# tests/test_scheduler.py
+
+import asyncio
+import datetime
+
+from scheduler import (
+    Agendador,
+    PoliticaAtraso,
+    RegraHorarios,
+    RegraIntervalo,
+    RegraJanela,
+    localizar,
+)
+
+
+def quando(ano, mes, dia, hora=0, minuto=0):
+    return localizar(datetime.date(ano, mes, dia), datetime.time(hora, minuto))
+
+
+class RegistroMemoria:
+    """Registro de disparos em memória (mesma interface do RegistroDisparos)."""
+
+    def __init__(self, ultimos=None):
+        self.ultimos = dict(ultimos or {})
+
+    async def carregar(self):
+        return dict(self.ultimos)
+
+    async def registrar(self, nome, instante):
+        self.ultimos[nome] = instante
+
+
+def semanal(agendador, disparos):
+    async def callback(instante):
+        disparos.append(instante)
+
+    return agendador.agendar(
+        "semanal",
+        RegraJanela("semana", hora_inicio=9, hora_fim=18),
+        callback,
+        politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=9)),
+    )
+
+
+def test_reinicio_no_meio_da_janela_dispara_no_mesmo_periodo(relogio_virtual, avancar_ate):
+    # Último envio na segunda anterior; fora do ar a segunda inteira; volta terça 10h
+    virtual = relogio_virtual(quando(2026, 4, 14, 10))
+    registro = RegistroMemoria({"semanal": quando(2026, 4, 6, 9)})
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador(registro=registro)
+        tarefa = semanal(agendador, disparos)
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 4, 14, 12))
+        agendador.parar()
+        return tarefa
+
+    tarefa = asyncio.run(cenario())
+    assert disparos == [quando(2026, 4, 14, 10)]
+    assert tarefa.proximo == quando(2026, 4, 20, 9)
+
+
+def test_reinicio_mensal_fora_do_dia_1(relogio_virtual, avancar_ate):
+    # Oracle: fora do ar no dia 1; volta dia 2 às 8h, antes da janela abrir
+    virtual = relogio_virtual(quando(2026, 6, 2, 8))
+    registro = RegistroMemoria({"mensal": quando(2026, 5, 1, 9)})
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador(registro=registro)
+
+        async def callback(instante):
+            disparos.append(instante)
+
+        agendador.agendar(
+            "mensal",
+            RegraJanela("mes", hora_inicio=9, hora_fim=18),
+            callback,
+            politica=PoliticaAtraso(PoliticaAtraso.AGRUPAR, datetime.timedelta(hours=9)),
+        )
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 6, 3))
+        agendador.parar()
+
+    asyncio.run(cenario())
+    assert disparos == [quando(2026, 6, 2, 9)]
+
+
+def test_reinicio_depois_do_envio_do_periodo_nao_repete(relogio_virtual, avancar_ate):
+    virtual = relogio_virtual(quando(2026, 4, 14, 10))
+    registro = RegistroMemoria({"semanal": quando(2026, 4, 13, 9)})
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador(registro=registro)
+        tarefa = semanal(agendador, disparos)
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 4, 19, 23))
+        agendador.parar()
+        return tarefa
+
+    tarefa = asyncio.run(cenario())
+    assert disparos == []
+    assert tarefa.proximo == quando(2026, 4, 20, 9)
+
+
+def test_atraso_na_tolerancia_agrupa_em_um_disparo(relogio_virtual, avancar_ate):
+    # Volta segunda 12h: o disparo das 9h ainda está na tolerância de 9h
+    virtual = relogio_virtual(quando(2026, 4, 13, 12))
+    registro = RegistroMemoria({"semanal": quando(2026, 4, 6, 9)})
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador(registro=registro)
+        semanal(agendador, disparos)
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 4, 19, 23))
+        agendador.parar()
+
+    asyncio.run(cenario())
+    assert disparos == [quando(2026, 4, 13, 9)]
+    assert registro.ultimos["semanal"] == quando(2026, 4, 13, 9)
+
+
+def test_loop_parado_na_janela_retoma_no_mesmo_periodo(relogio_virtual, avancar_ate):
+    # O loop trava antes da segunda 9h e só volta na terça 10h
+    virtual = relogio_virtual(quando(2026, 4, 12, 20))
+    registro = RegistroMemoria({"semanal": quando(2026, 4, 6, 9)})
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador(registro=registro)
+        semanal(agendador, disparos)
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 4, 12, 21))
+        virtual._agora = quando(2026, 4, 14, 10)
+        virtual.avancar()
+        await avancar_ate(virtual, quando(2026, 4, 14, 12))
+        agendador.parar()
+
+    asyncio.run(cenario())
+    assert disparos == [quando(2026, 4, 14, 10)]
+
+
+def test_pular_descarta_disparos_perdidos(relogio_virtual, avancar_ate):
+    virtual = relogio_virtual(quando(2026, 4, 14, 10))
+    registro = RegistroMemoria({"diaria": quando(2026, 4, 13, 9)})
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador(registro=registro)
+
+        async def callback(instante):
+            disparos.append(instante)
+
+        agendador.agendar(
+            "diaria",
+            RegraHorarios([datetime.time(9)]),
+            callback,
+            politica=PoliticaAtraso(PoliticaAtraso.PULAR),
+        )
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 4, 15, 10))
+        agendador.parar()
+
+    asyncio.run(cenario())
+    assert disparos == [quando(2026, 4, 15, 9)]
+
+
+def test_intervalo_sem_politica_nao_gera_rajada_apos_parada(relogio_virtual, avancar_ate):
+    # Loop travado por 3h: o intervalo de 15 min dispara uma vez só na volta
+    virtual = relogio_virtual(quando(2026, 4, 14, 8))
+    disparos = []
+
+    async def cenario():
+        agendador = Agendador()
+
+        async def callback(instante):
+            disparos.append(virtual.agora())
+
+        agendador.agendar("intervalo", RegraIntervalo(datetime.timedelta(minutes=15)), callback)
+        agendador.iniciar()
+        await avancar_ate(virtual, quando(2026, 4, 14, 8, 1))
+        virtual._agora = quando(2026, 4, 14, 11, 1)
+        virtual.avancar()
+        await avancar_ate(virtual, quando(2026, 4, 14, 11, 10))
+        agendador.parar()
+
+    asyncio.run(cenario())
+    assert disparos == [quando(2026, 4, 14, 8), quando(2026, 4, 14, 11, 1)]
@@ -0,0 +1,36 @@
+# tests/test_sheets.py
+
+import asyncio
+
+from gspread.utils import ValueInputOption
+
+from benchmarks.bench import CABECALHO
+from benchmarks.falsos import ClienteSheetsFalso, WorksheetFalsa
+
+
+def test_linha_em_branco_no_fim_da_janela_nao_encerra_a_leitura():
+    linhas = [
+        ["1", "10", "a", "2026-04-14", "", ""],
+        ["", "", "", "", "", ""],  # última linha da primeira janela, em branco
+        ["3", "10", "c", "2026-04-14", "", ""],
+        ["4", "10", "d", "2026-04-14", "", ""],
+    ]
+    cliente = ClienteSheetsFalso(WorksheetFalsa(CABECALHO, linhas, latencia=0))
+
+    async def ler():
+        return [
+            (linha, registro["ID"])
+            async for linha, registro in cliente.ler_registros(tamanho_janela=2)
+        ]
+
+    assert asyncio.run(ler()) == [(2, "1"), (4, "3"), (5, "4")]
+
+
+def test_enviado_e_gravado_como_valor_digitado():
+    linhas = [["1", "10", "a", "2026-04-14", "", ""], ["2", "10", "b", "2026-04-14", "", ""]]
+    worksheet = WorksheetFalsa(CABECALHO, linhas, latencia=0)
+    cliente = ClienteSheetsFalso(worksheet)
+
+    asyncio.run(cliente.atualizar_celulas([2, 3], 6, "TRUE"))
+    assert worksheet.opcoes_entrada == [ValueInputOption.user_entered]
+    assert [linha[-1] for linha in worksheet.linhas] == ["TRUE", "TRUE"]